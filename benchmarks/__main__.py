@@ -0,0 +1,116 @@
+import argparse
+import json
+import logging
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import end_to_end, micro, subset
+from benchmarks.compare import regressions
+
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+handler = logging.StreamHandler(sys.stdout)
+handler.setLevel(logging.INFO)
+root.addHandler(handler)
+# Benchmarks only report their own progress
+logging.getLogger('ltl_learner').setLevel(logging.WARNING)
+logger = logging.getLogger('benchmarks')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog = 'benchmarks',
+        description = '''
+        Runs microbenchmarks of the encoder, traces and converter, and learns formulas for a fixed stratified
+        subset of the dataset (benchmarks/subset.json), each in its own process. Results are written as JSON
+        and compared to a baseline: the exit code is 1 if any time or peak memory regressed past the threshold.
+        '''
+    )
+    parser.add_argument('--select',
+        action = 'store_true',
+        help = 'Recomputes the subset of the dataset from its strata instead of running benchmarks.'
+    )
+    parser.add_argument('--only',
+        choices = ('micro', 'end_to_end'),
+        help = 'Only runs one part of the benchmarks.'
+    )
+    parser.add_argument('-o', '--output',
+        type = Path,
+        default = Path(Path(__file__) / '..' / 'results' / f'{datetime.now().strftime("%Y%m%d%H%M%S")}.json').resolve(),
+        help = 'The JSON file to write results to.'
+    )
+    parser.add_argument('-b', '--baseline',
+        type = Path,
+        help = 'A results file to compare to.'
+    )
+    parser.add_argument('--save-baseline',
+        type = Path,
+        help = 'Also writes the results to this file, to be used as a baseline later on.'
+    )
+    parser.add_argument('--time-threshold',
+        type = float,
+        default = 0.25,
+        help = 'The ratio by which a case may get slower than in the baseline. Defaults to 0.25.'
+    )
+    parser.add_argument('--memory-threshold',
+        type = float,
+        default = 0.25,
+        help = 'The ratio by which the peak memory of a case may grow compared to the baseline. Defaults to 0.25.'
+    )
+    parser.add_argument('-t', '--timeout',
+        type = float,
+        default = 60,
+        help = 'The time (in seconds) after which an end-to-end case is abandoned. Defaults to 60.'
+    )
+    parser.add_argument('-k', '--cutoff',
+        type = int,
+        default = 10,
+        help = 'The maximum DAG length of end-to-end cases. Defaults to 10.'
+    )
+    parser.add_argument('--options',
+        type = json.loads,
+        default = {},
+        help = 'Learner arguments for end-to-end cases, as a JSON object (e.g. \'{"child_values": true}\').'
+    )
+    parser.add_argument('-r', '--repeat',
+        type = int,
+        default = 5,
+        help = 'The number of runs of each microbenchmark, the best one being kept. Defaults to 5.'
+    )
+    args = parser.parse_args()
+    if args.select:
+        subset.save(subset.select())
+        logger.info(f'Wrote {len(subset.load())} samples to {subset.subset_file}')
+        return 0
+    results = {
+        'date': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'options': args.options,
+    }
+    if args.only in (None, 'micro'):
+        results['micro'] = micro.run(repeat = args.repeat)
+    if args.only in (None, 'end_to_end'):
+        results['end_to_end'] = end_to_end.run(k = args.cutoff, timeout = args.timeout, options = args.options)
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.parent.mkdir(parents = True, exist_ok = True)
+            with open(path, 'w') as f:
+                json.dump(results, f, indent = 2)
+            logger.info(f'Results written to {path}')
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.time_threshold, args.memory_threshold)
+        for regression in found:
+            logger.error(f'Regression: {regression}')
+        if found:
+            return 1
+        logger.info('No regression.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
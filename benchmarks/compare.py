@@ -0,0 +1,28 @@
+# Differences in time (in seconds) below which a case is not considered slower, being mostly noise
+noise = {'micro': 0.001, 'end_to_end': 0.5}
+
+
+def regressions(results: dict, baseline: dict, time_threshold: float = 0.25, memory_threshold: float = 0.25) -> list:
+    '''
+    Compares benchmark results to a baseline of the same format.
+    A case regresses when its time (or peak memory) exceeds the baseline by more than the threshold (a ratio),
+    or when it stops succeeding. Cases missing from either side are ignored.
+    :return: A description of every regression.
+    '''
+    found = []
+    for part in ('micro', 'end_to_end'):
+        for name, new in results.get(part, {}).items():
+            old = baseline.get(part, {}).get(name)
+            if old is None:
+                continue
+            if old.get('status', 'ok') == 'ok' and new.get('status', 'ok') != 'ok':
+                found.append(f'{part} {name}: {new["status"]} (was ok)')
+                continue
+            if old.get('status', 'ok') != 'ok' or new.get('status', 'ok') != 'ok':
+                # Times of unfinished runs are meaningless
+                continue
+            if old.get('time') is not None and new['time'] - old['time'] > max(noise[part], old['time'] * time_threshold):
+                found.append(f'{part} {name}: time {new["time"]:.3f}s (was {old["time"]:.3f}s)')
+            if old.get('peak_rss') and new.get('peak_rss') and new['peak_rss'] > old['peak_rss'] * (1 + memory_threshold):
+                found.append(f'{part} {name}: peak memory {new["peak_rss"] >> 20}MB (was {old["peak_rss"] >> 20}MB)')
+    return found
@@ -0,0 +1,66 @@
+import logging
+import multiprocessing as mp
+import time
+from multiprocessing.connection import Connection
+
+from benchmarks import subset
+from ltl_learner.learner import Learner, PartialResult
+from ltl_learner.metrics import peak_rss
+
+logger = logging.getLogger(__name__)
+
+
+def learn(path, k: int, options: dict, connection: Connection) -> None:
+    '''
+    Benchmark process: learns a formula for the sample at path and sends back its measurements.
+    '''
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    learner = Learner(k = k, sample = path, **options)
+    result = learner.main()
+    elapsed = time.perf_counter() - start
+    metrics = learner.metrics.as_dict()
+    connection.send({
+        'status': 'ok' if isinstance(result, tuple) else 'partial' if isinstance(result, PartialResult) else 'not found',
+        'time': elapsed,
+        'peak_rss': peak_rss(),
+        'size': learner.size,
+        'encode_time': metrics['phases'].get('encode', 0),
+        'solve_time': metrics['phases'].get('solve', 0),
+    })
+    connection.close()
+
+
+def run_case(case: dict, k: int, timeout: float, options: dict) -> dict:
+    '''
+    Runs a case in a fresh interpreter, so that its peak memory is its own.
+    '''
+    context = mp.get_context('spawn')
+    reader, writer = context.Pipe(duplex = False)
+    process = context.Process(target = learn, args = (subset.dataset / case['file'], k, options, writer))
+    process.start()
+    writer.close()
+    if reader.poll(timeout):
+        try:
+            result = reader.recv()
+        except EOFError:
+            result = {'status': 'crashed', 'time': None, 'peak_rss': None}
+    else:
+        result = {'status': 'timeout', 'time': timeout, 'peak_rss': None}
+    process.kill()
+    process.join()
+    reader.close()
+    return result
+
+
+def run(k: int = 10, timeout: float = 60, options: dict = None) -> dict:
+    '''
+    :return: The measurements of every case of the subset, by file name.
+    '''
+    results = {}
+    for case in subset.load():
+        results[case['file']] = dict(run_case(case, k, timeout, options or {}), **{
+            key: case[key] for key in ('variables', 'length')
+        }, expected_size = case['size'])
+        logger.info(f'{case["file"]}: {results[case["file"]]["status"]} in {results[case["file"]]["time"]}')
+    return results
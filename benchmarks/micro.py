@@ -0,0 +1,130 @@
+import gc
+import json
+import time
+from pathlib import Path
+
+from z3 import Solver, is_true
+
+from benchmarks import subset
+from ltl_learner.dag.builder import DAGBuilder
+from ltl_learner.ltl.converter import LTLConverter
+from ltl_learner.traces import Sample
+
+mutex = Path(Path(__file__) / '..' / '..' / 'ltl_learner' / 'mutex.json').resolve()
+
+# Length of the DAGs encoded by the builder benchmarks
+length = 5
+
+
+def measure(function, setup = None, repeat: int = 5) -> float:
+    '''
+    Best time of a call to function over repeat calls, setup (if any) being called before each call and not timed.
+    setup returns the arguments of function. As with timeit, the garbage collector is off during calls,
+    and the best time is kept as the least disturbed by the rest of the machine.
+    '''
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function(*args)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(times)
+
+
+def load(path: Path = mutex) -> tuple:
+    with open(path, 'r') as f:
+        spec = json.load(f)
+    return spec, Sample(spec['positives'], spec['variables']), Sample(spec['negatives'], spec['variables'])
+
+
+def builder_with_nodes(variables: list, positives: Sample, negatives: Sample, nodes: int) -> DAGBuilder:
+    builder = DAGBuilder(solver = Solver(), variables = variables)
+    builder._reset()
+    for _ in range(nodes):
+        builder.add_node(positives, negatives)
+    return builder
+
+
+def builder_benchmarks(spec: dict, positives: Sample, negatives: Sample, repeat: int) -> dict:
+    results = {
+        f'builder.build({length})': measure(
+            lambda builder: builder.build(length, positives, negatives),
+            lambda: (DAGBuilder(solver = Solver(), variables = spec['variables']),),
+            repeat
+        )
+    }
+
+    def last_node():
+        '''
+        A builder with all nodes but the last one encoded, and the variables of the last one declared.
+        '''
+        builder = builder_with_nodes(spec['variables'], positives, negatives, length - 1)
+        builder.generate_node_vars(length - 1, positives, negatives)
+        return builder
+
+    families = ['ap'] + [family for family, _ in DAGBuilder(variables = spec['variables']).semantic_families()]
+    for family in families:
+        def encode(builder, family = family):
+            add = dict([('ap', builder.add_ap_constraints)] + builder.semantic_families())[family]
+            for sample, symbol in ((positives, 'p'), (negatives, 'n')):
+                for j, word in enumerate(sample):
+                    add(length - 1, word, j, symbol)
+        results[f'builder.{family}'] = measure(encode, lambda: (last_node(),), repeat)
+    return results
+
+
+def trace_benchmarks(spec: dict, positives: Sample, repeat: int) -> dict:
+    words = spec['positives'] + spec['negatives']
+    return {
+        'Sample()': measure(lambda: Sample(words, spec['variables']), repeat = repeat),
+        'Sample.canonical': measure(lambda: positives.canonical(), repeat = repeat),
+        'Sample.keys': measure(lambda: positives.keys(), repeat = repeat),
+        'Trace.reachable': measure(
+            lambda sample: [trace.reachable for trace in sample],
+            lambda: (Sample(words, spec['variables']),),
+            repeat
+        ),
+        'Trace.generate_aux_set': measure(
+            lambda: [trace.generate_aux_set(t) for trace in positives for t in range(len(trace))],
+            repeat = repeat
+        ),
+    }
+
+
+def converter_benchmarks(spec: dict, positives: Sample, repeat: int) -> dict:
+    '''
+    Decodes a DAG modelling the positive words only, which is quick to find but keeps a model as large as usual.
+    '''
+    solver = Solver()
+    DAGBuilder(solver = solver, variables = spec['variables']).build(length, positives, Sample())
+    solver.check()
+    converter = LTLConverter(solver)
+    model = solver.model()
+    true_nodes = sorted(
+        x.name() for x in model.decls()
+        if x.name().split('_')[0] in ('x', 'l', 'r') and is_true(model[x])
+    )
+    return {
+        'LTLConverter.build(model)': measure(lambda: converter.build(length = length), repeat = repeat),
+        'LTLConverter.build(true_nodes)': measure(lambda: converter.build(length, true_nodes), repeat = repeat),
+    }
+
+
+def run(repeat: int = 5) -> dict:
+    '''
+    :return: The best time (in seconds) of every microbenchmark, by name.
+    '''
+    spec, positives, negatives = load()
+    results = {}
+    results.update(builder_benchmarks(spec, positives, negatives, repeat))
+    # Words of mutex are too short for trace helpers to be measured
+    longest = max(subset.load(), key = lambda case: case['length'])
+    large, large_positives, _ = load(subset.dataset / longest['file'])
+    results.update(trace_benchmarks(large, large_positives, repeat))
+    results.update(converter_benchmarks(spec, positives, repeat))
+    return {name: {'time': value} for name, value in results.items()}
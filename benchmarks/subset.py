@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+from ltl_learner.ltl.converter import parse
+
+dataset = Path(Path(__file__) / '..' / '..' / 'dataset' / 'json').resolve()
+subset_file = Path(Path(__file__) / '..' / 'subset.json').resolve()
+
+# Strata bounds: a sample falls in the first bin whose bound it does not exceed
+variable_bins = (2, 3, 4)
+length_bins = (1200, 2500)
+size_bins = (5, 7)
+
+
+def formula_size(node) -> int:
+    return 1 + sum(formula_size(child) for child in (node.left, node.right) if child)
+
+
+def stratum(value: int, bounds: tuple) -> int:
+    return next((k for k, bound in enumerate(bounds) if value <= bound), len(bounds))
+
+
+def features(path: Path) -> dict:
+    '''
+    What a sample is stratified on: its number of variables, the total length of its words
+    and the size of its expected formula.
+    '''
+    with open(path, 'r') as f:
+        spec = json.load(f)
+    return {
+        'variables': len(spec['variables']),
+        'length': sum(len(w['traces']) for w in spec['positives'] + spec['negatives']),
+        'size': formula_size(parse(spec['expected'])),
+    }
+
+
+def select(folder: Path = dataset, per_stratum: int = 1) -> list:
+    '''
+    Picks the per_stratum shortest samples (by total length of their words, then by name) of every stratum,
+    so that the subset covers the dataset while staying cheap enough to run often.
+    '''
+    strata = {}
+    for path in sorted(folder.glob('*.json')):
+        f = features(path)
+        key = (stratum(f['variables'], variable_bins), stratum(f['length'], length_bins), stratum(f['size'], size_bins))
+        strata.setdefault(key, []).append((f['length'], path.name, f))
+    subset = []
+    for key in sorted(strata):
+        for _, name, f in sorted(strata[key])[:per_stratum]:
+            subset.append(dict(file = name, **f))
+    return subset
+
+
+def load() -> list:
+    with open(subset_file, 'r') as f:
+        return json.load(f)
+
+
+def save(subset: list) -> None:
+    with open(subset_file, 'w') as f:
+        json.dump(subset, f, indent = 2)
+        f.write('\n')
@@ -1,58 +1,85 @@
+import argparse
+import hashlib
 import json
 import os
-import uuid
-from multiprocessing.pool import ThreadPool
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+root = Path(Path(__file__) / '..').resolve()
+# This script is run from the dataset folder, next to the ltl_learner package
+sys.path.insert(0, str(root.parent))
 
-def generate_word(trace_in: str, variables: list):
-    trace, repeat = trace_in.split('::')
-    json_traces = []
-    for word in trace.split(';'):
-        w = []
-        for i, symbol in enumerate(word.split(',')):
-            if symbol == '1':
-                w.append(variables[i])
-        json_traces.append(w)
-    return {
-        "traces": json_traces,
-        "repeat": int(repeat),
-    }
-
-
-def convert_trace(raw_trace):
-    trace = raw_trace.read_text()
-    positives, negatives, operators, num_variables, expected_result = trace.split('---')
-    positives = positives.strip()
-    negatives = negatives.strip()
-    operators = operators.strip()
-    num_variables = num_variables.strip()
-    expected_result = expected_result.strip()
-    num_variables = int(num_variables)
-    json_trace = {
-        "variables": [f'x{i}' for i in range(num_variables)],
-        "positives": [],
-        "negatives": [],
-        "expected": expected_result
-    }
-    json_trace['positives'] = [
-        generate_word(positive, json_trace['variables'])
-        for positive in positives.split('\n')
-    ]
-    json_trace['negatives'] = [
-        generate_word(negative, json_trace['variables'])
-        for negative in negatives.split('\n')
-    ]
-    with open(Path(Path(__file__) / '..' / 'json' / f'{uuid.uuid4().hex}.json').resolve(), 'w') as f:
-        json.dump(json_trace, f, indent = 2)
-    return json_trace
+from ltl_learner import raw
+
+
+def content_hash(path: Path) -> str:
+    '''
+    Names converted samples after their raw content, so that converting the same file twice gives the same file.
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def convert_trace(raw_trace: Path, output: Path, force: bool = False) -> tuple:
+    '''
+    Converts a raw sample to a JSON file of the output folder, unless it was already converted.
+    :return: The path of the JSON file, and whether it was written.
+    '''
+    target = output / f'{content_hash(raw_trace)}.json'
+    if target.exists() and not force:
+        return target, False
+    spec = raw.to_spec(raw_trace)
+    # Written under another name first, so that an interrupted conversion does not leave a truncated sample
+    partial = target.with_suffix(f'.json.{os.getpid()}.part')
+    with open(partial, 'w') as f:
+        json.dump(spec, f, indent = 2)
+    os.replace(partial, target)
+    return target, True
 
 
 def main():
-    workers = os.cpu_count() * 2 + 1
-    root = Path(Path(__file__) / '..').resolve()
-    with ThreadPool(processes = workers) as pool:
-        pool.map(convert_trace, root.glob('raw/**/*.trace'))
+    parser = argparse.ArgumentParser(
+        prog = 'traces_converter',
+        description = '''
+        Converts raw samples (.trace files) to JSON, on several processes. Each JSON file is named after
+        the content of its raw file, and raw files already converted are skipped.
+        '''
+    )
+    parser.add_argument('-i', '--input',
+        type = Path,
+        default = root / 'raw',
+        help = 'The folder to look for .trace files in (recursively).'
+    )
+    parser.add_argument('-o', '--output',
+        type = Path,
+        default = root / 'json',
+        help = 'The folder to write JSON files to.'
+    )
+    parser.add_argument('-j', '--workers',
+        type = int,
+        default = os.cpu_count(),
+        help = 'The number of processes converting files. Defaults to the number of cores.'
+    )
+    parser.add_argument('--force',
+        action = 'store_true',
+        help = 'Converts every file again, even those already converted.'
+    )
+    args = parser.parse_args()
+    args.output.mkdir(parents = True, exist_ok = True)
+    files = sorted(args.input.glob('**/*.trace'))
+    written = 0
+    with ProcessPoolExecutor(max_workers = args.workers) as pool:
+        results = pool.map(
+            convert_trace, files, [args.output] * len(files), [args.force] * len(files),
+            chunksize = max(1, len(files) // (4 * args.workers))
+        )
+        for _, new in results:
+            written += new
+    print(f'Converted {written} files, {len(files) - written} were already converted.')
 
 
 if __name__ == '__main__':
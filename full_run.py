@@ -1,97 +1,88 @@
-import csv
-import json
-import time
-import threading
-import multiprocessing as mp
+import argparse
+import logging
+import os
+import sys
 from datetime import datetime
 from pathlib import Path
 
-from tqdm import tqdm
-
-from ltl_learner.learner import Learner
-from ltl_learner.traces import Sample
+from ltl_learner import archive
+from ltl_learner.batch import BatchRunner
 
 TIMEOUT = 300
 
-
-def read_sample(sample: Path):
-    with open(sample, 'r') as f:
-        spec = json.load(f)
-    return (
-        spec['variables'],
-        Sample(spec['positives']),
-        Sample(spec['negatives']),
-        spec.get('expected', '')
-    )
-
-
-def worker(filepath: Path, queue: mp.Queue):
-    start = time.time_ns()
-    l = Learner(k = 10, sample = filepath)
-    ltl_formula, expected_formula = l.main()
-    end = time.time_ns()
-    total = (end - start) / 10**9
-    queue.put_nowait([ltl_formula, total])
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+handler = logging.StreamHandler(sys.stdout)
+handler.setLevel(logging.INFO)
+root.addHandler(handler)
 
 
 def main():
-    dataset_folder = Path(Path(__file__) / '..' / 'dataset' / 'json').resolve()
-    files = dataset_folder.glob('*.json')
-
-    outfile_name = datetime.now().strftime('%Y%m%d%H%M%S')
-    output = Path(Path(__file__) / '..' / 'results' / f'{outfile_name}_experiment.csv').resolve()
-
-    csv_headers = [
-        'experiment_time',
-        'specs_file',
-        'learned_formula',
-        'expected_formula',
-        'elapsed_time',
-        'number_of_variables',
-        'positive_length',
-        'negative_length',
-        'cutoff',
-        'comment'
-    ]
-
-    with open(output, 'w') as f:
-        writer = csv.writer(f)
-        writer.writerow(csv_headers)
+    parser = argparse.ArgumentParser(
+        prog = 'full_run',
+        description = '''
+        Learns a formula for every sample of a folder, in parallel, writing one row per sample
+        as soon as it is done. Samples already present in the output file are skipped,
+        so that an interrupted run can be resumed by giving the same output file;
+        samples whose worker timed out, crashed or raised are run again.
+        '''
+    )
+    parser.add_argument('-d', '--dataset',
+        type = Path,
+        default = Path(Path(__file__) / '..' / 'dataset' / 'json').resolve(),
+        help = 'The folder containing the samples (as JSON files), or an archive of samples (see ltl_learner.archive).'
+    )
+    parser.add_argument('-o', '--output',
+        type = Path,
+        default = Path(Path(__file__) / '..' / 'results' / f'{datetime.now().strftime("%Y%m%d%H%M%S")}_experiment.csv').resolve(),
+        help = 'The CSV (or, ending in .jsonl, JSON lines) file to write results to.'
+    )
+    parser.add_argument('-j', '--workers',
+        type = int,
+        default = os.cpu_count(),
+        help = 'The number of samples to learn from at the same time. Defaults to the number of cores.'
+    )
+    parser.add_argument('-t', '--timeout',
+        type = float,
+        default = TIMEOUT,
+        help = f'''
+        The time (in seconds) given to learning each sample. Samples running out of time still report the lengths
+        proven unsatisfiable (lower_bound). Defaults to {TIMEOUT}.
+        '''
+    )
+    parser.add_argument('--check-timeout',
+        type = float,
+        help = 'The time (in seconds) given to the solver for each length. Undecided lengths are skipped.'
+    )
+    parser.add_argument('--max-memory',
+        type = int,
+        help = 'The memory (in MB) the solver may use for each sample.'
+    )
+    parser.add_argument('--cache',
+        type = Path,
+        help = 'A directory caching results across runs (see ltl_learner.cache), shared by the workers.'
+    )
+    parser.add_argument('-k', '--cutoff',
+        type = int,
+        default = 10,
+        help = 'The cutoff value for the length of the DAG. Defaults to 10.'
+    )
+    args = parser.parse_args()
+    if args.dataset.is_file():
+        files = archive.members(args.dataset)
+    else:
+        files = sorted(args.dataset.glob('*.json'))
+    BatchRunner(
+        files = files,
+        output = args.output,
+        processes = args.workers,
+        timeout = args.timeout,
+        k = args.cutoff,
+        check_timeout = args.check_timeout,
+        max_memory = args.max_memory,
+        cache = args.cache
+    ).main()
 
-    i = 0
-    total = len(list(files))
-    files = dataset_folder.glob('*.json')
-    for f in tqdm(files, total = total):
-        i += 1
-        queue = mp.Queue(5)
-        experiment_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        variables, positives, negatives, expected = read_sample(f)
-        ltl_formula, elapsed_time, comment = '', '', ''
-        p = mp.Process(target = worker, args = (f,queue,), )
-        p.start()
-        p.join(timeout = TIMEOUT)
-        if p.is_alive:
-            p.terminate()
-        while p.exitcode is None:
-            time.sleep(1)
-        if p.exitcode == 0:
-            ltl_formula, elapsed_time = queue.get()
-        else:
-            comment = f'timeout: {TIMEOUT}s'
-        results = [
-            experiment_time,
-            f.name,
-            ltl_formula,
-            expected,
-            elapsed_time,
-            len(variables),
-            len(positives), 
-            len(negatives), 
-            comment
-        ]
-        with open(output, 'a+') as f:
-            writer = csv.writer(f)
-            writer.writerow(results)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
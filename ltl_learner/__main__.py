@@ -4,7 +4,11 @@ import sys
 import time
 from pathlib import Path
 
-from ltl_learner.learner import Learner
+from ltl_learner.backends.backend import backends
+from ltl_learner.dag.builder import temporal_encodings
+from ltl_learner.enumeration.templates import templates
+from ltl_learner.learner import Learner, engines
+from ltl_learner.portfolio import Portfolio
 
 root = logging.getLogger()
 root.setLevel(logging.INFO)
@@ -56,13 +60,270 @@ parser.add_argument('-o', '--operators',
     nargs='+',
     required=False
 )
+parser.add_argument('--non-incremental',
+    action='store_true',
+    help='''
+    Re-encodes the whole DAG from scratch for every length instead of adding one node at a time
+    on the same solver.
+    '''
+)
+parser.add_argument('--temporal-encoding',
+    action='store',
+    choices=temporal_encodings,
+    default='expanded',
+    help='''
+    How the semantics of U, F and G are encoded. "expanded" lists every position reachable
+    from each position of a word, "fixpoint" unrolls their fixpoint definition around the loop
+    and grows linearly with the length of the words. Defaults to "expanded".
+    '''
+)
+parser.add_argument('--child-values',
+    action='store_true',
+    help='''
+    Introduces variables holding the truth values of the children of each node, so that
+    the semantics of operators is encoded once per node instead of once per possible child.
+    '''
+)
+parser.add_argument('--symmetry-breaking',
+    action='store_true',
+    help='''
+    Only allows one of the DAGs describing the same formula (up to the numbering of their nodes
+    or the order of the operands of commutative operators), which mostly speeds up lengths with no solution.
+    '''
+)
+parser.add_argument('--engine',
+    action='store',
+    choices=engines,
+    default='sat',
+    help='''
+    The search engine: "sat" encodes DAGs of increasing length for Z3, "enumerative" enumerates
+    formulas bottom-up by size, dropping those equivalent on the sample, "greedy" combines small formulas
+    with & and | (in seconds on large samples, but not minimal), "templates" combines Declare-style patterns
+    (see --templates). Defaults to "sat".
+    '''
+)
+parser.add_argument('--mining-size',
+    action='store',
+    default=3,
+    help='With the greedy engine, the size of the formulas combined (one size more is tried too). Defaults to 3.',
+    type=strictly_positive_integer
+)
+parser.add_argument('--templates',
+    action='store',
+    choices=list(templates),
+    nargs='+',
+    help='With the templates engine, the patterns to use. Defaults to all of them.',
+    metavar='TEMPLATE'
+)
+parser.add_argument('--minimize',
+    action='store_true',
+    help='With the greedy engine, then looks for a smaller formula with the SAT encoding.'
+)
+parser.add_argument('--backend',
+    action='store',
+    choices=backends,
+    default='z3',
+    help='''
+    What decides the encoding: "z3" solves it with Z3, "dimacs" bit-blasts it to CNF for an external
+    SAT solver (see --sat-command), "cnf" only writes the CNF of every length to --cnf-directory. Defaults to "z3".
+    '''
+)
+parser.add_argument('--sat-command',
+    action='store',
+    help='''
+    With the dimacs backend, the command running the SAT solver, the path to a DIMACS file being appended to it.
+    The solver must print its answer as in the SAT competitions. Defaults to "z3 -dimacs".
+    ''',
+    required=False
+)
+parser.add_argument('--cnf-directory',
+    action='store',
+    help='The directory to write the CNF of every length to, n.cnf being the CNF of the n-th check.',
+    type=Path,
+    required=False
+)
+parser.add_argument('--cores',
+    action='store_true',
+    help='''
+    Tracks every assertion under its label so that Z3 can give unsat cores. Tracking is off otherwise,
+    as it slows Z3 down.
+    '''
+)
+parser.add_argument('--metrics',
+    action='store',
+    help='''
+    Writes measurements of the run to the given JSON file: time spent in each phase (loading, encoding,
+    solving, decoding) and on each family of constraints, size of the encoding and solver statistics
+    for every length, and peak memory.
+    ''',
+    type=Path,
+    required=False
+)
+parser.add_argument('--cegis',
+    action='store_true',
+    help='''
+    Only encodes a few words of each sample at first, then checks every formula found against the whole sample
+    and adds the words it misclassifies, until a formula separates the whole sample.
+    '''
+)
+parser.add_argument('--cegis-initial',
+    action='store',
+    default=4,
+    help='With --cegis, the number of words of each sample encoded at first. Defaults to 4.',
+    type=positive_integer
+)
+parser.add_argument('--cegis-step',
+    action='store',
+    default=8,
+    help='With --cegis, the most misclassified words of each sample added after each formula. Defaults to 8.',
+    type=strictly_positive_integer
+)
+parser.add_argument('--check-timeout',
+    action='store',
+    help='''
+    The time (in seconds) given to the solver for each length. Lengths left undecided are skipped,
+    and what was proven is reported.
+    ''',
+    type=float,
+    required=False
+)
+parser.add_argument('--timeout',
+    action='store',
+    help='The time (in seconds) given to the whole run. What was proven when it runs out is reported.',
+    type=float,
+    required=False
+)
+parser.add_argument('--max-memory',
+    action='store',
+    help='The memory (in MB) the solver may use.',
+    type=strictly_positive_integer,
+    required=False
+)
+parser.add_argument('--error-rate',
+    action='store',
+    help='''
+    For noisy samples, the fraction of the words the formula may misclassify (e.g. 0.01).
+    The formula misclassifying the fewest words so far is reported if none within it is found.
+    ''',
+    type=float,
+    required=False
+)
+parser.add_argument('--cache',
+    action='store',
+    help='''
+    A directory caching results across runs, keyed by the canonical sample and the options changing the answer.
+    Answers found there are given right away, and lengths proven unsatisfiable there are not checked again.
+    ''',
+    type=Path,
+    required=False
+)
+parser.add_argument('--cache-size',
+    action='store',
+    default=64,
+    help='The size (in MB) above which the least recently used results are evicted from the cache. Defaults to 64.',
+    type=strictly_positive_integer
+)
+parser.add_argument('--formulas',
+    action='store',
+    help='''
+    Prints up to this many minimal separating formulas (0 meaning all of them) instead of the first one.
+    ''',
+    type=positive_integer,
+    required=False
+)
+parser.add_argument('--raw-sample',
+    action='store_true',
+    help='''
+    Encodes the words as given in the input file, instead of replacing each of them by its shortest lasso
+    and removing duplicate words beforehand.
+    '''
+)
+parser.add_argument('--portfolio',
+    action='store',
+    help='''
+    Solves several lengths in parallel with the given number of processes (0 meaning one per core),
+    instead of trying lengths one after the other. Cannot be combined with --engine, --cegis, --timeout,
+    --metrics, --cache or --formulas.
+    ''',
+    type=positive_integer,
+    required=False
+)
+parser.add_argument('--seeds',
+    action='store',
+    default=1,
+    help='''
+    With --portfolio, solves each length with this many different Z3 random seeds. Defaults to 1.
+    ''',
+    type=strictly_positive_integer
+)
 args = parser.parse_args()
+if args.portfolio is not None:
+    # Workers solve a single length each with the SAT engine: options spanning the whole run do not apply to them
+    unsupported = {
+        '--engine': args.engine != 'sat',
+        '--cegis': args.cegis,
+        '--timeout': args.timeout is not None,
+        '--metrics': args.metrics is not None,
+        '--cache': args.cache is not None,
+        '--formulas': args.formulas is not None,
+    }
+    used = [option for option, given in unsupported.items() if given]
+    if used:
+        parser.error(f'--portfolio cannot be combined with {", ".join(used)}')
 start = time.time()
-result = Learner(
-    k=args.cutoff,
-    sample=args.input_file,
-    syntax=args.operators
-).main()
+if args.portfolio is not None:
+    result = Portfolio(
+        k=args.cutoff,
+        sample=args.input_file,
+        syntax=args.operators,
+        processes=args.portfolio or None,
+        configs=[{'random_seed': seed} for seed in range(args.seeds)],
+        temporal_encoding=args.temporal_encoding,
+        child_values=args.child_values,
+        symmetry_breaking=args.symmetry_breaking,
+        canonicalize=not args.raw_sample,
+        backend=args.backend,
+        cores=args.cores,
+        sat_command=args.sat_command,
+        cnf_directory=args.cnf_directory,
+        check_timeout=args.check_timeout,
+        max_memory=args.max_memory,
+        error_rate=args.error_rate
+    ).main()
+else:
+    learner = Learner(
+        k=args.cutoff,
+        sample=args.input_file,
+        syntax=args.operators,
+        incremental=not args.non_incremental,
+        temporal_encoding=args.temporal_encoding,
+        child_values=args.child_values,
+        symmetry_breaking=args.symmetry_breaking,
+        engine=args.engine,
+        canonicalize=not args.raw_sample,
+        backend=args.backend,
+        cores=args.cores,
+        sat_command=args.sat_command,
+        cnf_directory=args.cnf_directory,
+        metrics_file=args.metrics,
+        cegis=args.cegis,
+        cegis_initial=args.cegis_initial,
+        cegis_step=args.cegis_step,
+        check_timeout=args.check_timeout,
+        timeout=args.timeout,
+        max_memory=args.max_memory,
+        mining_size=args.mining_size,
+        minimize=args.minimize,
+        error_rate=args.error_rate,
+        templates=args.templates,
+        cache=args.cache,
+        cache_size=args.cache_size * 2 ** 20
+    )
+    if args.formulas is not None:
+        for formula in learner.formulas(args.formulas or None):
+            print(formula)
+    else:
+        result = learner.main()
 end = time.time()
 
 print(f"It took {end - start} seconds to give this answer.")
@@ -0,0 +1,194 @@
+import argparse
+import json
+import mmap
+import struct
+from pathlib import Path
+
+from ltl_learner.traces import Sample, variables_of
+
+# An archive packs a directory of samples into a single file, laid out as:
+#   * a header: magic, version, number of samples;
+#   * an index: one fixed size entry per sample, locating its name, variables, expected formula, words and letters;
+#   * word records: (first position, length, loop start) of every positive then every negative word of each sample;
+#   * letters: one bitmask per position (see Sample), on the smallest number of bytes holding all variables of the sample;
+#   * strings: names, variables (one per line) and expected formulas, in UTF-8.
+# Samples of an archive are addressed as files of a directory: archive.ltlpack/sample.json.
+
+suffix = '.ltlpack'
+magic = b'LTLPACK\0'
+version = 1
+header = struct.Struct('<8sII')
+# name, variables and expected formula (offset, length) in strings, offset of the first word record,
+# number of positive and negative words, offset of letters, number of positions, bytes per letter
+entry = struct.Struct('<QIQIQIQIIQIB')
+word = struct.Struct('<QII')
+widths = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+def width(variables: int) -> int:
+    for w in widths:
+        if variables <= 8 * w:
+            return w
+    raise ValueError(f'Archives hold at most 64 variables per sample, not {variables}')
+
+
+def pack(files: list, output: Path) -> int:
+    '''
+    Packs the given JSON samples into an archive.
+    :return: The number of samples packed.
+    '''
+    strings = bytearray()
+    entries = []
+    words = bytearray()
+    letters = bytearray()
+
+    def string(s: str) -> tuple:
+        data = s.encode('utf-8')
+        strings.extend(data)
+        return len(strings) - len(data), len(data)
+
+    for path in files:
+        with open(path, 'r') as f:
+            spec = json.load(f)
+        variables = variables_of(spec['positives'] + spec['negatives'], spec['variables'])
+        index = {a: i for i, a in enumerate(variables)}
+        w = width(len(variables))
+        # Letters of a sample are aligned on 8 bytes
+        letters.extend(bytes(-len(letters) % 8))
+        start, first_word, position = len(letters), len(words), 0
+        for trace in spec['positives'] + spec['negatives']:
+            words.extend(word.pack(position, len(trace['traces']), trace['repeat']))
+            for letter in trace['traces']:
+                letters.extend(sum(1 << index[a] for a in set(letter)).to_bytes(w, 'little'))
+            position += len(trace['traces'])
+        entries.append((
+            *string(Path(path).name),
+            *string('\n'.join(variables)),
+            *string(spec.get('expected', '')),
+            first_word,
+            len(spec['positives']),
+            len(spec['negatives']),
+            start,
+            position,
+            w
+        ))
+    index_end = header.size + entry.size * len(entries)
+    words_start = index_end
+    letters_start = words_start + len(words)
+    letters_start += -letters_start % 8
+    strings_start = letters_start + len(letters)
+    with open(output, 'wb') as f:
+        f.write(header.pack(magic, version, len(entries)))
+        for (name, name_length, variables, variables_length, expected, expected_length,
+                first_word, positives, negatives, start, positions, w) in entries:
+            f.write(entry.pack(
+                strings_start + name, name_length,
+                strings_start + variables, variables_length,
+                strings_start + expected, expected_length,
+                words_start + first_word, positives, negatives,
+                letters_start + start, positions, w
+            ))
+        f.write(words)
+        f.write(bytes(letters_start - words_start - len(words)))
+        f.write(letters)
+        f.write(strings)
+    return len(entries)
+
+
+class Archive:
+    '''
+    A memory mapped archive. Samples are built as views over the mapped letters, without copying them,
+    so the archive stays mapped as long as any of its samples is alive.
+    '''
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        found, found_version, count = header.unpack_from(self.map, 0)
+        if found != magic:
+            raise ValueError(f'{self.path} is not a sample archive')
+        if found_version != version:
+            raise ValueError(f'{self.path} is an archive of version {found_version}, expected {version}')
+        self.index = {}
+        for k in range(count):
+            fields = entry.unpack_from(self.map, header.size + k * entry.size)
+            self.index[self.string(fields[0], fields[1])] = fields[2:]
+
+    def string(self, offset: int, length: int) -> str:
+        return bytes(self.view[offset:offset + length]).decode('utf-8')
+
+    def names(self) -> list:
+        return list(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def load(self, name: str) -> tuple:
+        '''
+        :return: The variables, positive sample, negative sample and expected formula of the named sample,
+                 as Learner.read_sample does.
+        '''
+        (variables, variables_length, expected, expected_length,
+            first_word, positives, negatives, start, positions, w) = self.index[name]
+        variables = tuple(self.string(variables, variables_length).split('\n')) if variables_length else ()
+        letters = self.view[start:start + positions * w].cast(widths[w])
+        words = list(word.iter_unpack(self.view[first_word:first_word + (positives + negatives) * word.size]))
+        return (
+            list(variables),
+            Sample.from_masks(variables, letters, words[:positives]),
+            Sample.from_masks(variables, letters, words[positives:]),
+            self.string(expected, expected_length)
+        )
+
+
+_archives = {}
+
+
+def open_archive(path: Path) -> Archive:
+    '''
+    Archives are mapped once per process.
+    '''
+    path = Path(path).resolve()
+    if path not in _archives:
+        _archives[path] = Archive(path)
+    return _archives[path]
+
+
+def is_member(sample: Path) -> bool:
+    '''
+    Whether the path designates a sample of an archive (archive.ltlpack/sample.json).
+    '''
+    parent = Path(sample).parent
+    return parent.suffix == suffix and parent.is_file()
+
+
+def members(path: Path) -> list:
+    '''
+    Paths of every sample of an archive.
+    '''
+    return [Path(path) / name for name in open_archive(path).names()]
+
+
+def load(sample: Path) -> tuple:
+    sample = Path(sample)
+    return open_archive(sample.parent).load(sample.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog = 'ltl_learner.archive',
+        description = 'Packs a directory of JSON samples into a single memory mappable archive.'
+    )
+    parser.add_argument('directory', type = Path, help = 'The directory containing the samples (as JSON files).')
+    parser.add_argument('output', type = Path, help = f'The archive to write, which should end in {suffix}.')
+    args = parser.parse_args()
+    count = pack(sorted(args.directory.glob('*.json')), args.output)
+    print(f'Packed {count} samples into {args.output}.')
+
+
+if __name__ == '__main__':
+    main()
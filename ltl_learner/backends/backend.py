@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from z3 import Solver
+
+from ltl_learner.backends.dimacs import DimacsBackend
+
+# A backend receives the encoding and decides it. It offers the part of the API of z3.Solver used
+# by the builder and the learner: add, assert_and_track, set, reset, check (under assumptions),
+# model (a Z3 model of the encoding variables, which the converter decodes) and sexpr.
+#   * z3: Z3 itself, assertions being tracked under their label only when unsat cores are asked for;
+#   * dimacs: the encoding is bit-blasted to CNF and solved by an external SAT solver;
+#   * cnf: the encoding is bit-blasted to CNF and written to files for offline solving, without being solved.
+backends = ('z3', 'dimacs', 'cnf')
+
+
+class Z3Backend(Solver):
+    '''
+    A Z3 solver which only tracks assertions when unsat cores are asked for.
+    Tracking adds a literal per assertion, and keeps Z3 from simplifying the encoding as much.
+    '''
+    def __init__(self, cores: bool = False) -> None:
+        super().__init__()
+        self.cores = cores
+        if cores:
+            self.set(unsat_core = True)
+
+    def assert_and_track(self, expression, label: str) -> None:
+        if self.cores:
+            super().assert_and_track(expression, label)
+        else:
+            self.add(expression)
+
+
+def make_backend(name: str = 'z3', cores: bool = False, command: str = None, directory: Path = None):
+    '''
+    :@param name: One of backends.
+    :@param cores: Whether to track assertions for unsat cores, only available with Z3.
+    :@param command: The SAT solver command of the dimacs backend, defaults to Z3 reading DIMACS.
+    :@param directory: Where to write CNF files, required by the cnf backend, optional with the dimacs one.
+    '''
+    if name not in backends:
+        raise ValueError(f'Unknown backend {name}, expected one of {backends}')
+    if cores and name != 'z3':
+        raise ValueError(f'Unsat cores are only available with the z3 backend, not {name}')
+    if name == 'z3':
+        return Z3Backend(cores = cores)
+    if name == 'dimacs':
+        return DimacsBackend(command = command or 'z3 -dimacs', directory = directory)
+    if directory is None:
+        raise ValueError('The cnf backend needs a directory to write CNF files to')
+    return DimacsBackend(command = None, directory = directory)
@@ -0,0 +1,176 @@
+import logging
+import shlex
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from z3 import (
+    BoolVal, Goal, ModelRef, Then, With, Z3_mk_model,
+    is_const, is_false, is_not, is_or, is_true, main_ctx, sat, unknown, unsat
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DimacsBackend:
+    '''
+    Bit-blasts the encoding to CNF with Z3 tactics and hands it to a SAT solver.
+    The SAT solver is an external process reading a DIMACS file, and printing its answer
+    in the format of the SAT competitions ("s SATISFIABLE" then "v" lines of literals).
+    Its assignment is translated back to the variables of the encoding, so that models can be decoded
+    the same way as Z3 models.
+    Without a command, the CNF of every check is only written to the given directory, for offline solving,
+    and checks are unknown. Every CNF file lists the name of each of its variables in "c <variable> <name>" comments.
+    External solvers are not incremental: each check sends every assertion, assumptions being unit clauses.
+    '''
+    # The default pb.solver of card2bv leaves weighted pseudo-Boolean constraints (the error bound) untouched
+    tactic = Then('simplify', With('card2bv', **{'pb.solver': 'binary_merge'}), 'simplify', 'bit-blast', 'tseitin-cnf')
+
+    def __init__(self, command: str = 'z3 -dimacs', directory: Path = None) -> None:
+        '''
+        :@param command: The command running the SAT solver, the path to the CNF file being appended to it.
+        :@param directory: Where to write the CNF of every check, the n-th check being written to n.cnf.
+        '''
+        self.command = shlex.split(command) if command else None
+        self.directory = Path(directory) if directory else None
+        if self.directory:
+            self.directory.mkdir(parents = True, exist_ok = True)
+        self.expressions = []
+        self.checks = 0
+        self.timeout = None
+        self.reason = None
+        self._model = None
+        self._statistics = {}
+
+    def assert_and_track(self, expression, label: str) -> None:
+        '''
+        Labels are only useful to unsat cores, which SAT solvers do not give.
+        '''
+        self.add(expression)
+
+    def add(self, *expressions) -> None:
+        self.expressions.extend(expressions)
+
+    def set(self, **params) -> None:
+        '''
+        Only the timeout (in milliseconds) applies to the external solver, which is killed when it runs out.
+        '''
+        if 'timeout' in params:
+            self.timeout = params.pop('timeout')
+        if params:
+            logger.debug(f'Ignoring Z3 parameters {params} for an external SAT solver.')
+
+    def reason_unknown(self) -> str:
+        return self.reason
+
+    def reset(self) -> None:
+        self.expressions = []
+        self._model = None
+
+    def assertions(self) -> list:
+        return list(self.expressions)
+
+    def statistics(self) -> dict:
+        '''
+        Size of the CNF of the last check, and the time spent bit-blasting and solving it.
+        '''
+        return dict(self._statistics)
+
+    def sexpr(self) -> str:
+        return '\n'.join(f'(assert {a.sexpr()})' for a in self.expressions)
+
+    def cnf(self, *assumptions) -> tuple:
+        '''
+        Bit-blasts the assertions and the given assumptions.
+        :return: The CNF goal, its clauses as lists of DIMACS literals (None if the goal is trivially false),
+                 and its variables, variable k + 1 being the k-th one.
+        '''
+        goal = Goal()
+        goal.add(*self.expressions, *assumptions)
+        subgoal = self.tactic(goal)[0]
+        index = {}
+        variables = []
+        clauses = []
+
+        def literal(e) -> int:
+            negative = is_not(e)
+            atom = e.arg(0) if negative else e
+            if not is_const(atom):
+                raise ValueError(f'Bit-blasting left an atom which is not a Boolean variable: {atom}')
+            if atom.decl() not in index:
+                variables.append(atom.decl())
+                index[atom.decl()] = len(variables)
+            return -index[atom.decl()] if negative else index[atom.decl()]
+
+        for clause in subgoal:
+            if is_false(clause):
+                return subgoal, None, variables
+            if is_true(clause):
+                continue
+            clauses.append([literal(e) for e in (clause.children() if is_or(clause) else [clause])])
+        return subgoal, clauses, variables
+
+    def dimacs(self, clauses: list, variables: list) -> str:
+        lines = [f'c {k} {v.name()}' for k, v in enumerate(variables, 1)]
+        lines.append(f'p cnf {len(variables)} {len(clauses)}')
+        lines.extend(' '.join(map(str, clause + [0])) for clause in clauses)
+        return '\n'.join(lines) + '\n'
+
+    def check(self, *assumptions):
+        self.checks += 1
+        self._model = None
+        self.reason = None
+        start = time.perf_counter()
+        subgoal, clauses, variables = self.cnf(*assumptions)
+        text = self.dimacs(clauses if clauses is not None else [[]], variables)
+        self._statistics = {
+            'cnf variables': len(variables),
+            'cnf clauses': len(clauses) if clauses is not None else 1,
+            'bit-blast time': time.perf_counter() - start,
+        }
+        if self.directory:
+            (self.directory / f'{self.checks}.cnf').write_text(text)
+        if self.command is None:
+            self.reason = 'not solved'
+            return unknown
+        if clauses is None:
+            return unsat
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'encoding.cnf'
+            path.write_text(text)
+            start = time.perf_counter()
+            try:
+                output = subprocess.run(
+                    self.command + [str(path)], capture_output = True, text = True,
+                    timeout = self.timeout / 1000 if self.timeout else None
+                ).stdout
+            except subprocess.TimeoutExpired:
+                self.reason = 'timeout'
+                return unknown
+            finally:
+                self._statistics['time'] = time.perf_counter() - start
+        return self.read_answer(output, subgoal, variables)
+
+    def read_answer(self, output: str, subgoal: Goal, variables: list):
+        status = None
+        values = set()
+        for line in output.splitlines():
+            if line.startswith('s '):
+                status = line[2:].strip()
+            elif line.startswith('v '):
+                values.update(int(v) for v in line[2:].split())
+        if status == 'UNSATISFIABLE':
+            return unsat
+        if status != 'SATISFIABLE':
+            logger.warning(f'Unexpected answer from {" ".join(self.command)}: {output[:200]}')
+            self.reason = f'unexpected answer: {status}'
+            return unknown
+        model = ModelRef(Z3_mk_model(main_ctx().ref()), main_ctx())
+        for k, v in enumerate(variables, 1):
+            model.update_value(v, BoolVal(k in values))
+        self._model = subgoal.convert_model(model)
+        return sat
+
+    def model(self) -> ModelRef:
+        return self._model
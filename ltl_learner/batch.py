@@ -0,0 +1,351 @@
+import csv
+import json
+import logging
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from datetime import datetime
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+
+from ltl_learner.learner import Learner, PartialResult
+
+logger = logging.getLogger(__name__)
+
+# Seconds workers are given on top of the time budget of their learner before being killed,
+# so that learners running out of time can still report what they proved
+grace = 10
+
+columns = [
+    'experiment_time',
+    'specs_file',
+    'learned_formula',
+    'expected_formula',
+    'elapsed_time',
+    'load_time',
+    'search_time',
+    'number_of_variables',
+    'positive_length',
+    'negative_length',
+    'cutoff',
+    'size',
+    'lower_bound',
+    'errors',
+    'encode_time',
+    'solve_time',
+    'decode_time',
+    'peak_rss',
+    'metrics',
+    'comment'
+]
+
+
+def serve(handler, connection: Connection, initializer = None) -> None:
+    '''
+    Main loop of a worker process: runs handler on every (key, payload) task received, until None is received.
+    initializer, if any, is run once before the first task.
+    '''
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        key, payload = task
+        try:
+            answer = ('ok', handler(payload))
+        except Exception as e:
+            logger.exception(f'Task {key} failed')
+            answer = ('error', f'{type(e).__name__}: {e}')
+        connection.send((key, answer))
+    connection.close()
+
+
+class WorkerPool:
+    '''
+    A bounded pool of long-lived worker processes, each running handler on the tasks it is given.
+    Unlike multiprocessing.Pool, a task running for longer than the timeout (its own, or the pool's)
+    gets its worker killed (and replaced), and results are handed back as soon as they are available.
+    '''
+    def __init__(self, handler, processes: int = None, timeout: float = None, initializer = None, context = None) -> None:
+        '''
+        :@param initializer: Run by every worker before its first task.
+        :@param context: The multiprocessing context starting workers, the default one if not given.
+        '''
+        self.handler = handler
+        self.processes = processes or os.cpu_count()
+        self.timeout = timeout
+        self.initializer = initializer
+        self.context = context or mp.get_context()
+        self.pending = deque()
+        self.idle = []
+        # connection -> (process, key, start time, timeout)
+        self.busy = {}
+        self.workers = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self) -> None:
+        while len(self.workers) < self.processes:
+            self._spawn()
+
+    def _spawn(self) -> None:
+        connection, child = self.context.Pipe()
+        process = self.context.Process(target = serve, args = (self.handler, child, self.initializer), daemon = True)
+        process.start()
+        child.close()
+        self.workers[connection] = process
+        self.idle.append(connection)
+
+    def _kill(self, connection: Connection) -> None:
+        process = self.workers.pop(connection)
+        process.terminate()
+        process.join()
+        connection.close()
+
+    def close(self) -> None:
+        for connection in list(self.workers):
+            if connection in self.busy:
+                self.busy.pop(connection)
+                self._kill(connection)
+                continue
+            connection.send(None)
+            self.workers.pop(connection).join()
+            connection.close()
+        self.idle = []
+
+    def submit(self, key, payload, timeout: float = None) -> None:
+        '''
+        :@param timeout: The time the task may run for, instead of the timeout of the pool.
+        '''
+        self.pending.append((key, payload, timeout if timeout is not None else self.timeout))
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.pending and self.idle:
+            connection = self.idle.pop()
+            key, payload, timeout = self.pending.popleft()
+            connection.send((key, payload))
+            self.busy[connection] = (self.workers[connection], key, time.time(), timeout)
+
+    def __len__(self) -> int:
+        '''
+        Number of tasks not finished yet.
+        '''
+        return len(self.pending) + len(self.busy)
+
+    def poll(self, timeout: float = None) -> list:
+        '''
+        Waits until at least one task finishes (or timeout seconds elapse).
+        :return: a list of (key, status, result, elapsed time) tuples, status being one of
+                 "ok" (result is what handler returned), "error" (result is the error message),
+                 "timeout" or "crashed" (result is None).
+        '''
+        finished = []
+        if not self.busy:
+            return finished
+        now = time.time()
+        waiting = timeout
+        deadlines = [start + limit for _, _, start, limit in self.busy.values() if limit is not None]
+        if deadlines:
+            deadline = min(deadlines) - now
+            waiting = max(0, deadline) if waiting is None else max(0, min(waiting, deadline))
+        for connection in wait(list(self.busy), timeout = waiting):
+            _, key, start, _ = self.busy.pop(connection)
+            try:
+                _, (status, result) = connection.recv()
+            except EOFError:
+                self._kill(connection)
+                self._spawn()
+                finished.append((key, 'crashed', None, time.time() - start))
+                continue
+            self.idle.append(connection)
+            finished.append((key, status, result, time.time() - start))
+        for connection, (_, key, start, limit) in list(self.busy.items()):
+            if limit is not None and time.time() - start >= limit:
+                self.busy.pop(connection)
+                self._kill(connection)
+                self._spawn()
+                finished.append((key, 'timeout', None, time.time() - start))
+        self._dispatch()
+        return finished
+
+    def run(self, tasks):
+        '''
+        Runs every (key, payload) task, yielding results in the order they finish.
+        '''
+        for key, payload in tasks:
+            self.submit(key, payload)
+        while len(self):
+            yield from self.poll()
+
+
+def learn(payload: dict) -> dict:
+    '''
+    Learns a formula for the sample at payload["sample"], with the other entries of payload as Learner arguments.
+    Solver assertions are not dumped unless payload asks for it, as runs are many.
+    '''
+    start = time.time()
+    learner = Learner(**{'dump_model': False, **payload})
+    loaded = time.time()
+    result = learner.main()
+    end = time.time()
+    metrics = learner.metrics.as_dict()
+    partial = result if isinstance(result, PartialResult) else None
+    if isinstance(result, tuple):
+        formula = result[0]
+    else:
+        formula = (partial and partial.formula) or ''
+    return {
+        'learned_formula': formula,
+        'expected_formula': learner.expected_formula,
+        'elapsed_time': end - start,
+        'load_time': loaded - start,
+        'search_time': end - loaded,
+        'number_of_variables': len(learner.variables),
+        'positive_length': len(learner.positive.original),
+        'negative_length': len(learner.negative.original),
+        'size': learner.size,
+        'lower_bound': partial.lower_bound if partial else learner.size,
+        'errors': learner.errors,
+        'encode_time': metrics['phases'].get('encode', 0),
+        'solve_time': metrics['phases'].get('solve', 0),
+        'decode_time': metrics['phases'].get('decode', 0),
+        'peak_rss': metrics['peak_rss'],
+        'metrics': json.dumps(metrics),
+        'comment': f'partial: {json.dumps(partial.as_dict())}' if partial else '',
+    }
+
+
+def make_row(specs_file: str, status: str, result, elapsed: float, started: str, cutoff: int, timeout: float) -> dict:
+    '''
+    The output row of a sample, from what a WorkerPool running learn gave for it.
+    :@param timeout: The timeout of the pool, reported for samples exceeding it.
+    '''
+    row = {column: '' for column in columns}
+    row.update({
+        'experiment_time': started,
+        'specs_file': specs_file,
+        'elapsed_time': elapsed,
+        'cutoff': cutoff,
+    })
+    if status == 'ok':
+        row.update(result)
+    elif status == 'timeout':
+        row['comment'] = f'timeout: {timeout}s'
+    else:
+        row['comment'] = f'{status}: {result}' if result else status
+    return row
+
+
+def failed(row: dict) -> bool:
+    '''
+    Whether a row reports a worker which timed out, crashed or raised, rather than an answer (complete or partial).
+    '''
+    return row['comment'].split(':')[0] in ('timeout', 'crashed', 'error')
+
+
+def write(row: dict, output, jsonl: bool = False) -> None:
+    '''
+    Writes a row to an open CSV (or, if jsonl is set, JSON lines) file.
+    '''
+    if jsonl:
+        output.write(json.dumps(row) + '\n')
+    else:
+        csv.DictWriter(output, fieldnames = columns).writerow(row)
+    output.flush()
+
+
+class BatchRunner:
+    '''
+    Learns formulas for a batch of sample files on a pool of workers, streaming one row per file
+    to a CSV (or, if the output file ends in .jsonl, JSON lines) file as soon as it is done.
+    Files that already have a row in the output file are skipped, so that interrupted runs can be resumed,
+    unless their row reports a failure (see failed): such rows are removed from the output file and run again.
+    '''
+    def __init__(self, files: list, output: Path, processes: int = None, timeout: float = 300, k: int = 10, **options) -> None:
+        '''
+        :@param timeout: The time budget of each learner, in seconds. Workers still running after grace
+                         more seconds are killed.
+        :@param options: Any other argument of Learner (e.g. engine, child_values, check_timeout).
+        '''
+        self.files = [Path(f) for f in files]
+        self.output = Path(output)
+        self.processes = processes
+        self.timeout = timeout
+        self.cutoff = k
+        self.options = options
+        self.jsonl = self.output.suffix == '.jsonl'
+
+    def existing(self) -> list:
+        '''
+        The rows already in the output file.
+        '''
+        if not self.output.exists():
+            return []
+        with open(self.output, 'r', newline = '') as f:
+            if self.jsonl:
+                return [json.loads(line) for line in f if line.strip()]
+            return list(csv.DictReader(f))
+
+    def done(self) -> set:
+        '''
+        Names of the files already having a result in the output file.
+        '''
+        return {row['specs_file'] for row in self.existing() if not failed(row)}
+
+    def drop_failed(self) -> None:
+        '''
+        Rewrites the output file without the rows reporting a failure, which are about to be run again.
+        '''
+        rows = self.existing()
+        if not any(failed(row) for row in rows):
+            return
+        with open(self.output, 'w', newline = '') as output:
+            if not self.jsonl:
+                csv.DictWriter(output, fieldnames = columns).writeheader()
+            for row in rows:
+                if not failed(row):
+                    self.write(row, output)
+
+    def write(self, row: dict, output) -> None:
+        write(row, output, self.jsonl)
+
+    def pool_timeout(self) -> float:
+        return None if self.timeout is None else self.timeout + grace
+
+    def main(self):
+        '''
+        :return: the rows written during this run, in the order they were computed.
+        '''
+        done = self.done()
+        self.drop_failed()
+        todo = [f for f in self.files if f.name not in done]
+        logger.info(f'{len(todo)} files to run, {len(self.files) - len(todo)} already done.')
+        self.output.parent.mkdir(parents = True, exist_ok = True)
+        new_file = not self.output.exists()
+        rows = []
+        with open(self.output, 'a', newline = '') as output, \
+                WorkerPool(learn, processes = self.processes, timeout = self.pool_timeout()) as pool:
+            if new_file and not self.jsonl:
+                csv.DictWriter(output, fieldnames = columns).writeheader()
+            tasks = [
+                (f, dict(sample = f, k = self.cutoff, timeout = self.timeout, **self.options))
+                for f in todo
+            ]
+            started = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            for f, status, result, elapsed in pool.run(tasks):
+                row = make_row(f.name, status, result, elapsed, started, self.cutoff, self.pool_timeout())
+                logger.info(f'{f.name}: {row["learned_formula"] or row["comment"]}')
+                self.write(row, output)
+                rows.append(row)
+        return rows
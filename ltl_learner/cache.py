@@ -0,0 +1,131 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from ltl_learner.traces import Sample
+
+logger = logging.getLogger(__name__)
+
+# Results are cached on disk, one JSON file per entry, named after the hash of what determines the answer:
+# the variables, the canonical words of the sample (in any order, duplicates merged) and the options
+# of the engine changing the answer (not those only changing how fast it is found).
+# An entry holds the smallest formula found, if any, and the largest n such that lengths 1 to n were proven
+# to have no separating DAG (unsat), so that a run with a larger cutoff resumes from length n + 1.
+# Entries are written to a temporary file which then replaces the entry, so that readers never see
+# a partial entry, and writers take a lock on the cache to merge their entry with the current one.
+
+DEFAULT_SIZE = 64 * 2 ** 20
+
+
+def words(sample: Sample, weighted: bool = False) -> list:
+    '''
+    The canonical words of a sample, sorted, as [loop start, letters] lists (letters being sorted lists),
+    followed by the number of words of the original sample they stand for if weighted is set.
+    '''
+    canonical = sample if sample.original is not sample else sample.canonical()
+    counts = Counter(canonical.origin)
+    result = []
+    for k, trace in enumerate(canonical):
+        word = [trace.loop_start, [sorted(letter) for letter in trace.data]]
+        result.append(word + [counts[k]] if weighted else word)
+    return sorted(result)
+
+
+def fingerprint(variables: list, positives: Sample, negatives: Sample, options: dict, weighted: bool = False) -> str:
+    '''
+    :return: The key of the cache entry of a sample learned with the given options.
+    '''
+    content = {
+        'variables': sorted(variables),
+        'positives': words(positives, weighted),
+        'negatives': words(negatives, weighted),
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys = True, separators = (',', ':')).encode('utf-8')).hexdigest()
+
+
+def merge(entry: dict, update: dict) -> dict:
+    '''
+    Merges what a new run found into an entry: the largest unsat bound wins, and a formula replaces none.
+    '''
+    merged = dict(entry)
+    merged['unsat'] = max(entry.get('unsat', 0), update.get('unsat', 0))
+    if update.get('formula') is not None and entry.get('formula') is None:
+        merged.update({key: update.get(key) for key in ('formula', 'size', 'errors')})
+    return merged
+
+
+class ResultCache:
+    '''
+    A directory of cache entries, shared by concurrent learners. Hits refresh the modification time
+    of their entry, and the least recently used entries are evicted once the entries exceed max_size bytes.
+    '''
+    def __init__(self, directory: Path, max_size: int = DEFAULT_SIZE) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents = True, exist_ok = True)
+        self.max_size = max_size
+
+    def path(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+    def get(self, key: str) -> dict:
+        '''
+        :return: The entry of key, or None if there is none.
+        '''
+        path = self.path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f'Ignoring unreadable cache entry {path}')
+            return None
+        return entry
+
+    @contextmanager
+    def lock(self):
+        with open(self.directory / '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def update(self, key: str, entry: dict) -> dict:
+        '''
+        Merges entry into the entry of key (see merge), then evicts entries if needed.
+        :return: The merged entry.
+        '''
+        with self.lock():
+            merged = merge(self.get(key) or {}, entry)
+            with tempfile.NamedTemporaryFile('w', dir = self.directory, suffix = '.tmp', delete = False) as f:
+                json.dump(merged, f)
+            os.replace(f.name, self.path(key))
+            self.evict()
+        return merged
+
+    def evict(self) -> None:
+        '''
+        Removes the least recently used entries until the others fit in max_size bytes.
+        '''
+        entries = []
+        for path in self.directory.glob('*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok = True)
+            total -= size
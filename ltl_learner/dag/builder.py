@@ -1,17 +1,47 @@
+from contextlib import nullcontext
 from typing import Any, Union
 
-from z3 import Bool, And, Or, Not, Implies, AtMost, AtLeast, Solver
+from z3 import Bool, And, Or, Not, Implies, AtMost, AtLeast, ModelRef, PbLe, Solver, is_true
 
 from ltl_learner.constants import operators
+from ltl_learner.metrics import Metrics
 from ltl_learner.traces import Sample, Trace
 
+temporal_encodings = ('expanded', 'fixpoint')
+
 # We encode a syntax DAG with 3 types of variables:
 #   * x_i_label (i in [1, ..., n] and label in {AP U O}) : if variable x_i_label is true, then node i is labeled with label
 #   * l_i_j (i in [2, ..., n] and j in [1, ..., i - 1]): if l_i_j is set to true, j is the identifier to the left of node i.
 #   * r_i_j (i in [2, ..., n] and j in [1, ..., i - 1]): if r_i_j is set to true, j is the identifier to the right of node i.
+# On top of those, y_i_s_w_t holds the truth value of node i on position t of word w, with s in {p, n}.
+# With the fixpoint temporal encoding, z_i_s_w_t holds the truth value of an until node
+# on position t of the second unrolling of the loop of word w.
+# With child values, lv_i_s_w_t and rv_i_s_w_t hold the truth values of the left and right children of node i,
+# so that the semantics of each operator is stated once instead of once per possible child.
+# With symmetry breaking, labels are ordered (variables first, in the given order, then operators)
+# and only one of the DAGs that are equal up to renumbering of their nodes or swapping of
+# commutative operands is allowed.
+
+commutative = {'|', '&'}
 
 class DAGBuilder:
-    def __init__(self, solver=None, variables: list[Any]=None, ops: Union[None, list, set, tuple] = None) -> None:
+    def __init__(
+        self,
+        solver=None,
+        variables: list[Any]=None,
+        ops: Union[None, list, set, tuple] = None,
+        temporal_encoding: str = 'expanded',
+        child_values: bool = False,
+        symmetry_breaking: bool = False,
+        weights: tuple = None,
+        metrics: Metrics = None
+    ) -> None:
+        '''
+        :@param weights: For noisy samples, the weights of the positive words and those of the negative words
+                         (two lists). Words may then be misclassified by the root: instead of requiring it to
+                         classify every word, the total weight of the words it misclassifies is bounded
+                         by assuming the literal error_bound returns.
+        '''
         self.solver = solver
         self.variables = variables
         self.labels = None
@@ -22,11 +52,26 @@ class DAGBuilder:
         self.y = {}
         self.l = {}
         self.r = {}
+        self.z = {}
+        self.lv = {}
+        self.rv = {}
         self.current_length = 0
+        self.selectors = {}
+        self.bounds = {}
+        self.weights = weights
+        self.child_values = child_values
+        self.symmetry_breaking = symmetry_breaking
+        self.metrics = metrics
+        if temporal_encoding not in temporal_encodings:
+            raise ValueError(f'Unknown temporal encoding {temporal_encoding}, expected one of {temporal_encodings}')
+        self.temporal_encoding = temporal_encoding
         if not ops:
             ops = operators['all']
         self.operators = [o for o in ops if o in operators['all']]
         self.symbols = set(self.variables).union(set(self.operators))
+        self.order = {
+            symb: k for k, symb in enumerate(list(dict.fromkeys(self.variables)) + sorted(self.operators))
+        }
 
     def _reset(self):
         self.labels = None
@@ -34,8 +79,16 @@ class DAGBuilder:
         self.left_children = None
         self.right_children = None
         self.vars = {}
+        self.x = {}
+        self.y = {}
+        self.l = {}
+        self.r = {}
+        self.z = {}
+        self.lv = {}
+        self.rv = {}
         self.current_length = 0
-        self.solver.set(unsat_core = True)
+        self.selectors = {}
+        self.bounds = {}
 
     def generate_vars(self, length: int, positives: Sample, negatives: Sample) -> tuple:
         '''
@@ -43,22 +96,38 @@ class DAGBuilder:
         :return: a 4-length tuple corresponding to the variables (x_il, l_ij, r_ij, yuv_it).
         '''
         for i in range(length):
-            for symb in self.symbols:
-                name = f'x_{i}_{symb}'
-                self.x[(i, symb)] = Bool(name)
-        for i in range(1, length):
-            for j in range(i):
-                self.l[(i, j)] = Bool(f'l_{i}_{j}')
-                self.r[(i, j)] = Bool(f'r_{i}_{j}')
-        for i in range(length):
-            for j, trace in enumerate(positives):
-                for t in range(len(trace)):
-                    self.y[(i, 'p', j, t)] = Bool(f'y_{i}_p_{j}_{t}')
-            for j, trace in enumerate(negatives):
-                for t in range(len(trace)):
-                    self.y[(i, 'n', j, t)] = Bool(f'y_{i}_n_{j}_{t}')
+            self.generate_node_vars(i, positives, negatives)
         return self.x, self.l, self.r, self.y
 
+    def generate_node_vars(self, i: int, positives: Sample, negatives: Sample) -> None:
+        '''
+        Generates the variables belonging to node i only (its labels, children and truth values).
+        '''
+        for symb in self.symbols:
+            self.x[(i, symb)] = Bool(f'x_{i}_{symb}')
+        for j in range(i):
+            self.l[(i, j)] = Bool(f'l_{i}_{j}')
+            self.r[(i, j)] = Bool(f'r_{i}_{j}')
+        for symbol, sample in (('p', positives), ('n', negatives)):
+            for j, trace in enumerate(sample):
+                self.generate_word_vars(i, trace, j, symbol)
+
+    def generate_word_vars(self, i: int, trace: Trace, j: int, symbol: str) -> None:
+        '''
+        Generates the variables holding truth values of node i on word j of the positive (p) or negative (n) sample.
+        '''
+        for t in range(len(trace)):
+            self.y[(i, symbol, j, t)] = Bool(f'y_{i}_{symbol}_{j}_{t}')
+        if self.temporal_encoding == 'fixpoint' and 'U' in self.operators:
+            for t in range(trace.loop_start, len(trace)):
+                self.z[(i, symbol, j, t)] = Bool(f'z_{i}_{symbol}_{j}_{t}')
+        if self.child_values and i > 0:
+            binary = any(o in operators['binary'] for o in self.operators)
+            for t in range(len(trace)):
+                self.lv[(i, symbol, j, t)] = Bool(f'lv_{i}_{symbol}_{j}_{t}')
+                if binary:
+                    self.rv[(i, symbol, j, t)] = Bool(f'rv_{i}_{symbol}_{j}_{t}')
+
     def build(self, length: int, positives: Sample, negatives: Sample) -> Solver:
         '''
         Constructs the full formula that encodes a DAG with the given number of nodes.
@@ -69,348 +138,554 @@ class DAGBuilder:
         :return: This builder's instance solver.
         '''
         self._reset()
-        self.current_length = length
-        self.generate_vars(length, positives, negatives)
-        self.add_node_1_constraints()
-        self.add_general_constraints(length)
-        if self.current_length > 1:
-            self._get_left(length)
-            self._get_right(length)
-        self.add_consistency_with(positives)
-        self.add_consistency_with(negatives, positive = False)
+        for _ in range(length):
+            self.add_node(positives, negatives)
+        self.add_root_constraints(positives, negatives)
+        return self.solver
+
+    def extend(self, positives: Sample, negatives: Sample) -> Bool:
+        '''
+        Incremental counterpart of build: encodes one more node on top of the ones already
+        asserted on the solver, without touching them.
+        The constraints making the new node the root of the DAG are guarded by a selector literal,
+        so that checking the solver under that assumption decides whether a DAG of the
+        current length exists, while the solver keeps everything it learned on smaller lengths.
+        :@param positives: The positive words to learn from
+        :@param negatives: The negative words to learn from
+        :return: The selector literal to assume when checking the solver.
+        '''
+        if not self.current_length:
+            self._reset()
+        self.add_node(positives, negatives)
+        selector = Bool(f'root_{self.current_length - 1}')
+        self.add_root_constraints(positives, negatives, selector = selector)
+        self.selectors[self.current_length] = selector
+        return selector
+
+    def add_word(self, word: Trace, word_idx: int, positive: bool = True) -> None:
+        '''
+        Incremental counterpart of growing the sample: encodes one more word on every node already encoded,
+        and requires every root already selectable to model it (or not, for a negative word).
+        :@param word_idx: The index of the word in the sample it is added to, which must not be encoded yet.
+        '''
+        symbol = 'p' if positive else 'n'
+        for i in range(self.current_length):
+            with self.timed('variables'):
+                self.generate_word_vars(i, word, word_idx, symbol)
+            families = [('ap', self.add_ap_constraints)] + (self.semantic_families() if i > 0 else [])
+            for family, add in families:
+                with self.timed(family):
+                    add(i, word, word_idx, symbol)
+        with self.timed('root'):
+            for length, selector in self.selectors.items():
+                value = self.y[(length - 1, symbol, word_idx, 0)]
+                self.solver.assert_and_track(
+                    Implies(selector, value if positive else Not(value)),
+                    f"ensure model {'models' if positive else 'does not model'} {symbol} word {word_idx} for root {length - 1}"
+                )
+
+    def add_node(self, positives: Sample, negatives: Sample) -> None:
+        '''
+        Declares node number current_length along with its structural and semantic constraints.
+        Those only refer to nodes below it, so they stay valid whatever the final length of the DAG is.
+        '''
+        i = self.current_length
+        with self.timed('variables'):
+            self.generate_node_vars(i, positives, negatives)
+        self.current_length += 1
+        with self.timed('structure'):
+            if i == 0:
+                self.add_node_1_constraints()
+            self.add_general_constraints(i)
+            if i > 0:
+                self._get_left(i)
+                self._get_right(i)
+        if self.symmetry_breaking:
+            with self.timed('symmetry'):
+                self.add_symmetry_breaking_constraints(i)
+        self.add_consistency_with(i, positives)
+        self.add_consistency_with(i, negatives, positive = False)
 
+    def add_root_constraints(self, positives: Sample, negatives: Sample, selector: Bool = None) -> None:
+        '''
+        Makes the last node of the DAG its root: every other node needs a parent,
+        and the root must model the positive words but none of the negative ones (unless words may be misclassified,
+        see weights). If a selector is given, those constraints only hold when the selector is true.
+        '''
+        with self.timed('root'):
+            self._add_root_constraints(positives, negatives, selector)
+
+    def _add_root_constraints(self, positives: Sample, negatives: Sample, selector: Bool = None) -> None:
+        root = self.current_length - 1
+        guard = (lambda e: Implies(selector, e)) if selector is not None else (lambda e: e)
+        if self.current_length > 1:
+            self.solver.assert_and_track(
+                guard(And(*[
+                    Or(*[self.l[(parent, i)] for parent in range(i + 1, self.current_length)] +
+                        [self.r[(parent, i)] for parent in range(i + 1, self.current_length)])
+                    for i in range(root)
+                ])),
+                f"ensure that lower variables have at least one parent for root {root}"
+            )
+        if self.weights is not None:
+            return
         self.solver.assert_and_track(
-            And(*[
-                self.y[(self.current_length - 1, 'p', word_idx, 0)]
+            guard(And(*[
+                self.y[(root, 'p', word_idx, 0)]
                 for word_idx in range(len(positives))
-            ]),
-            f"ensure model models positive samples"
+            ])),
+            f"ensure model models positive samples for root {root}"
         )
         self.solver.assert_and_track(
-            And(*[
-                Not(self.y[(self.current_length - 1, 'n', word_idx, 0)])
+            guard(And(*[
+                Not(self.y[(root, 'n', word_idx, 0)])
                 for word_idx in range(len(negatives))
-            ]),
-            f"ensure model does not model negative samples"
+            ])),
+            f"ensure model does not model negative samples for root {root}"
         )
-        return self.solver
-    
-    def add_general_constraints(self, length: int):
-        self.solver.assert_and_track(And(*[
-            AtMost(*[self.x[t] for t in self.x if t[0] == i] + [1])
-            for i in range(length)
-        ]), 'at most one label per node')
-        self.solver.assert_and_track(And(*[
-            AtLeast(*[self.x[t] for t in self.x if t[0] == i] + [1])
-            for i in range(length)
-        ]), 'at least one label per node')
-        if self.current_length > 1:
+
+    def error_bound(self, length: int, bound: int) -> Bool:
+        '''
+        Noisy counterpart of the constraints classifying the words (see weights):
+        bounds the total weight of the words misclassified by the root of a DAG of the given length.
+        :return: The literal to assume for the bound to hold.
+        '''
+        if (length, bound) not in self.bounds:
+            root = length - 1
+            literal = Bool(f'errors_{root}_{bound}')
+            misclassified = (
+                [(Not(self.y[(root, 'p', k, 0)]), weight) for k, weight in enumerate(self.weights[0])] +
+                [(self.y[(root, 'n', k, 0)], weight) for k, weight in enumerate(self.weights[1])]
+            )
+            with self.timed('root'):
+                self.solver.assert_and_track(
+                    Implies(literal, PbLe(misclassified, bound)),
+                    f'ensure model misclassifies words of weight at most {bound} for root {root}'
+                )
+            self.bounds[(length, bound)] = literal
+        return self.bounds[(length, bound)]
+
+    def add_general_constraints(self, i: int):
+        labels = [self.x[(i, symb)] for symb in self.symbols]
+        self.solver.assert_and_track(AtMost(*labels + [1]), f'at most one label for node {i}')
+        self.solver.assert_and_track(AtLeast(*labels + [1]), f'at least one label for node {i}')
+        if i > 0:
             self.solver.assert_and_track(
                 And(*[
-                    And(*[
-                        Or(
-                            Not(self.l[(i, j)]),
-                            Not(self.r[(i, j)])
-                        )
-                        for j in range(i)
-                    ])
-                    for i in range(length)
+                    Or(
+                        Not(self.l[(i, j)]),
+                        Not(self.r[(i, j)])
+                    )
+                    for j in range(i)
                 ]),
-                f'nodes cannot have the same child on left and on right'
+                f'node {i} cannot have the same child on left and on right'
             )
             self.solver.assert_and_track(
-                And(*[
-                    Implies(
-                        Or(*[self.x[(i, a)] for a in self.variables]),
-                        Not(
-                            Or(
-                                Or(*[self.r[t] for t in self.r if t[0] == i]),
-                                Or(*[self.l[t] for t in self.l if t[0] == i])
-                            )
+                Implies(
+                    Or(*[self.x[(i, a)] for a in self.variables]),
+                    Not(
+                        Or(
+                            Or(*[self.r[(i, j)] for j in range(i)]),
+                            Or(*[self.l[(i, j)] for j in range(i)])
                         )
                     )
-                    for i in range(1, length)
-                ]),
-                'variables cannot have children'
+                ),
+                f'variable on node {i} cannot have children'
             )
+
+    def add_symmetry_breaking_constraints(self, i: int) -> None:
+        '''
+        Rules out DAGs that only differ from another one by the numbering of their nodes:
+            * operands of commutative operators are ordered (left below right);
+            * a variable labels at most one node;
+            * two consecutive nodes, the upper one not being a parent of the lower one, have ordered labels.
+        Every DAG of minimal length can be renumbered to satisfy those constraints: repeated variables can
+        be merged into a smaller DAG, unordered consecutive independent nodes can be swapped,
+        and operands of commutative operators can be swapped; so the minimal length is left unchanged.
+        Those constraints only refer to node i and nodes below it, so they suit incremental solving.
+        '''
+        for op in commutative.intersection(self.operators):
             self.solver.assert_and_track(
-                And(*[
-                    Or(
-                        AtLeast(*[self.l[(parent, i)] for parent in range(i + 1, length)] + [1]),
-                        AtLeast(*[self.r[(parent, i)] for parent in range(i + 1, length)] + [1])
-                    )
-                    for i in range(length - 1)
-                ]),
-                "ensure that lower variables have at least one parent"
+                Implies(
+                    self.x[(i, op)],
+                    And(*[
+                        Not(And(self.l[(i, j)], self.r[(i, k)]))
+                        for j in range(i) for k in range(j)
+                    ])
+                ),
+                f'operands of {op} on node {i} are ordered'
+            )
+        for a in self.variables:
+            self.solver.assert_and_track(
+                Implies(self.x[(i, a)], Not(Or(*[self.x[(j, a)] for j in range(i)]))),
+                f'variable {a} on node {i} labels no other node'
+            )
+        if i > 0:
+            independent = Not(Or(self.l[(i, i - 1)], self.r[(i, i - 1)]))
+            self.solver.assert_and_track(
+                Implies(
+                    independent,
+                    And(*[
+                        Implies(
+                            self.x[(i - 1, symb)],
+                            Not(Or(*[self.x[(i, lower)] for lower in self.symbols if self.order[lower] < k]))
+                        )
+                        for symb, k in self.order.items()
+                    ])
+                ),
+                f'labels of nodes {i - 1} and {i} are ordered'
             )
 
-    def _get_left(self, length: int) -> And:
+    def _get_left(self, i: int) -> None:
         '''
-        Builds the "left children" constraints for the given length.
+        Builds the "left children" constraints for node i.
         '''
+        left = [self.l[(i, j)] for j in range(i)]
         self.solver.assert_and_track(
-            And(*[
-                Implies(
-                    Or(*[self.x[(i, op)] for op in self.operators]),
-                    AtMost(*[self.l[t] for t in self.l if t[0] == i] + [1])
-                )
-                for i in range(1, length)
-            ]), "at most one left operand per operator"
+            Implies(
+                Or(*[self.x[(i, op)] for op in self.operators]),
+                AtMost(*left + [1])
+            ), f"at most one left operand for operator on node {i}"
         )
-
         self.solver.assert_and_track(
-            And(*[
-                Implies(
-                    Or(*[self.x[(i, op)] for op in self.operators]),
-                    AtLeast(*[self.l[t] for t in self.l if t[0] == i] + [1])
-                )
-                for i in range(1, length)
-            ]), "at least one left operand per operator"
+            Implies(
+                Or(*[self.x[(i, op)] for op in self.operators]),
+                AtLeast(*left + [1])
+            ), f"at least one left operand for operator on node {i}"
         )
 
-    def _get_right(self, length: int) -> And:
+    def _get_right(self, i: int) -> None:
         '''
-        Builds the "right children" constraints for the given length.
+        Builds the "right children" constraints for node i.
         '''
         unaries = [o for o in self.operators if o in operators['unary']]
         binaries = [o for o in self.operators if o in operators['binary']]
+        right = [self.r[(i, j)] for j in range(i)]
         self.solver.assert_and_track(
-            And(*[
-                Implies(
-                    Or(*[self.x[(i, op)] for op in binaries]),
-                    AtMost(*[self.r[t] for t in self.r if t[0] == i] + [1])
-                )
-                for i in range(1, length)
-            ]), "at most one right operand per binary operator"
+            Implies(
+                Or(*[self.x[(i, op)] for op in binaries]),
+                AtMost(*right + [1])
+            ), f"at most one right operand for binary operator on node {i}"
         )
         self.solver.assert_and_track(
-            And(*[
-                Implies(
-                    Or(*[self.x[(i, op)] for op in binaries]),
-                    AtLeast(*[self.r[t] for t in self.r if t[0] == i] + [1])
-                )
-                for i in range(1, length)
-            ]), "at least one right operand per binary operator"
+            Implies(
+                Or(*[self.x[(i, op)] for op in binaries]),
+                AtLeast(*right + [1])
+            ), f"at least one right operand for binary operator on node {i}"
         )
         self.solver.assert_and_track(
-            And(*[
-                Implies(
-                    Or(*[self.x[(i, op)] for op in unaries]),
-                    Not(
-                        Or(*[self.r[t] for t in self.r if t[0] == i])
-                    )
-                )
-                for i in range(1, length)
-            ]), 'unary operators cannot have a right operand'
+            Implies(
+                Or(*[self.x[(i, op)] for op in unaries]),
+                Not(Or(*right))
+            ), f'unary operator on node {i} cannot have a right operand'
         )
 
-    def add_consistency_with(self, sample: Sample, positive = True) -> None:
+    def add_consistency_with(self, i: int, sample: Sample, positive = True) -> None:
         '''
-        Computes the formulas in order to add consistency for the given sample.
-        If positive is set to False, then makes sure the given formula does not satisfy the sample
-        by AND-ing it with the negation of y^{u,v}_{n,1}, as stated in the article.
+        Computes the formulas in order to add consistency of node i with the given sample.
+        The negation of y^{u,v}_{n,1} for negative words, as stated in the article,
+        is added along with the root constraints.
+        Constraints are added one family (atoms, then each operator) at a time, so that each family can be timed.
         '''
         symbol = 'p' if positive else 'n'
-        for i in range(self.current_length):
-            for j, word in enumerate(sample):
-                self.add_ap_constraints(i, word, j, symbol)
-                if '!' in self.operators:
-                    self.add_not_constraints(i, word, j, symbol)
-                if 'X' in self.operators:
-                    self.add_x_constraints(i, word, j, symbol)
-                if 'G' in self.operators:
-                    self.add_g_constraints(i, word, j, symbol)
-                if 'F' in self.operators:
-                    self.add_f_constraints(i, word, j, symbol)
-                if '|' in self.operators:
-                    self.add_or_constraints(i, word, j, symbol)
-                if '&' in self.operators:
-                    self.add_and_constraints(i, word, j, symbol)
-                if 'U' in self.operators:
-                    self.add_u_constraints(i, word, j, symbol)
-                if '>' in self.operators:
-                    self.add_implication_constraints(i, word, j, symbol)
-    
+        families = [('ap', self.add_ap_constraints)]
+        if i > 0:
+            # The first node is an atom
+            families.extend(self.semantic_families())
+        for family, add in families:
+            with self.timed(family):
+                for j, word in enumerate(sample):
+                    add(i, word, j, symbol)
+
+    def semantic_families(self) -> list:
+        '''
+        The (family, method) pairs encoding the semantics of the operators of an inner node.
+        '''
+        fixpoint = self.temporal_encoding == 'fixpoint'
+        families = []
+        if self.child_values:
+            families.append(('child_values', self.add_child_value_constraints))
+        candidates = [
+            ('!', self.add_not_constraints),
+            ('X', self.add_x_constraints),
+            ('G', self.add_g_fixpoint_constraints if fixpoint else self.add_g_constraints),
+            ('F', self.add_f_fixpoint_constraints if fixpoint else self.add_f_constraints),
+            ('|', self.add_or_constraints),
+            ('&', self.add_and_constraints),
+            ('U', self.add_u_fixpoint_constraints if fixpoint else self.add_u_constraints),
+            ('>', self.add_implication_constraints),
+        ]
+        families.extend((op, add) for op, add in candidates if op in self.operators)
+        return families
+
+    def block(self, model: ModelRef, length: int) -> Bool:
+        '''
+        Forbids the formula of the DAG of the given length described by the model, so that the next check gives
+        another formula. Every DAG whose root unfolds to the same formula is blocked, whatever the numbering
+        of its nodes: node i represents node k of the model when it has the same label and its children
+        represent the children of k, and the root may not represent the root of the model.
+        DAGs differing from it only on the values of their nodes (y, z, lv and rv) are blocked too.
+        In incremental mode, the clause only holds under the selector of that length.
+        :return: The blocking clause.
+        '''
+        def chosen(variables: dict, k: int) -> int:
+            return next((j for j in range(k) if is_true(model.eval(variables[(k, j)], model_completion = True))), None)
+
+        labels = [
+            next(symb for symb in self.symbols if is_true(model.eval(self.x[(k, symb)], model_completion = True)))
+            for k in range(length)
+        ]
+        children = [(chosen(self.l, k), chosen(self.r, k)) for k in range(length)]
+        # (k, i) -> whether node i represents node k of the model, shared between the nodes above them
+        represents = {}
+
+        def matches(k: int, i: int) -> Bool:
+            if (k, i) not in represents:
+                conditions = [self.x[(i, labels[k])]]
+                for variables, child in zip((self.l, self.r), children[k]):
+                    if child is not None:
+                        conditions.append(Or(*[And(variables[(i, j)], matches(child, j)) for j in range(i)]))
+                represents[(k, i)] = And(*conditions)
+            return represents[(k, i)]
+
+        clause = Not(matches(length - 1, length - 1))
+        if length in self.selectors:
+            clause = Implies(self.selectors[length], clause)
+        self.solver.add(clause)
+        return clause
+
+    def timed(self, family: str):
+        '''
+        Accounts the time spent in the block to the given family of constraints, if metrics are collected.
+        '''
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.constraint(family)
+
+    def variable_count(self) -> int:
+        return sum(len(v) for v in (self.x, self.l, self.r, self.y, self.z, self.lv, self.rv))
+
     def add_ap_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
         for a in self.variables:
             self.solver.assert_and_track(
                     Implies(
                         self.x[(i, a)],
                         And(*[
-                            self.y[(i, symbol, word_idx, t)] if a in word[t] else Not(self.y[(i, symbol, word_idx, t)])
+                            self.y[(i, symbol, word_idx, t)] if word.holds(a, t) else Not(self.y[(i, symbol, word_idx, t)])
                             for t in range(len(word))
                         ])
                     ),
                 f"atom {a} semantics for node {i} on {symbol} word number {word_idx}"
             )
 
-    def add_not_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+    def add_child_value_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        '''
+        Ties the left (and right) value variables of node i to the truth values of the selected child,
+        once for all operators.
+        '''
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, '!')],
+            And(*[
+                Implies(
+                    self.l[(i, j)],
+                    And(*[
+                        self.lv[(i, symbol, word_idx, t)] == self.y[(j, symbol, word_idx, t)]
+                        for t in range(len(word))
+                    ])
+                )
+                for j in range(i)
+            ]),
+            f"left value of node {i} on {symbol} word number {word_idx}"
+        )
+        if not any(o in operators['binary'] for o in self.operators):
+            return
+        self.solver.assert_and_track(
+            And(*[
+                Implies(
+                    self.r[(i, j)],
+                    And(*[
+                        self.rv[(i, symbol, word_idx, t)] == self.y[(j, symbol, word_idx, t)]
+                        for t in range(len(word))
+                    ])
+                )
+                for j in range(i)
+            ]),
+            f"right value of node {i} on {symbol} word number {word_idx}"
+        )
+
+    def _children_semantics(self, i: int, label: str, word_idx: int, symbol: str, semantics, binary = False) -> Implies:
+        '''
+        Builds the semantics of the operator labelling node i on the given word.
+        semantics is given callables returning the truth values of the operands on a position,
+        and returns the constraints binding them to the truth values of node i.
+        Without child values, those constraints are repeated for every possible child (or pair of children).
+        '''
+        value = lambda node: lambda t: self.y[(node, symbol, word_idx, t)]
+        if self.child_values:
+            left = lambda t: self.lv[(i, symbol, word_idx, t)]
+            right = lambda t: self.rv[(i, symbol, word_idx, t)]
+            return Implies(self.x[(i, label)], semantics(left, right) if binary else semantics(left))
+        if binary:
+            return Implies(
+                self.x[(i, label)],
                 And(*[
                     Implies(
-                        And(self.x[(i, '!')], self.l[(i, j)]),
-                        And(*[
-                            self.y[(i, symbol, word_idx, t)] == Not(
-                                self.y[(j, symbol, word_idx, t)]
-                            )
-                            for t in range(len(word))
-                        ])
+                        And(self.x[(i, label)], self.l[(i, j)], self.r[(i, jp)]),
+                        semantics(value(j), value(jp))
                     )
-                    for j in range(i)
+                    for j in range(i) for jp in range(i)
                 ])
-            ),
+            )
+        return Implies(
+            self.x[(i, label)],
+            And(*[
+                Implies(
+                    And(self.x[(i, label)], self.l[(i, j)]),
+                    semantics(value(j))
+                )
+                for j in range(i)
+            ])
+        )
+
+    def add_not_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
+        self.solver.assert_and_track(
+            self._children_semantics(i, '!', word_idx, symbol, lambda left: And(*[
+                y(t) == Not(left(t))
+                for t in range(len(word))
+            ])),
             f"not semantics for node {i} on {symbol} word number {word_idx}"
         )
 
     def add_x_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, 'X')],
-                And(*[
-                    Implies(
-                        And(self.x[(i, 'X')], self.l[(i, j)]),
-                        And(*[
-                            self.y[(i, symbol, word_idx, t)] == self.y[(j, symbol, word_idx, word.next_index(t))]
-                            for t in range(len(word))
-                        ])
-                    )
-                    for j in range(i)
-                ])
-            ),
+            self._children_semantics(i, 'X', word_idx, symbol, lambda left: And(*[
+                y(t) == left(word.successors[t])
+                for t in range(len(word))
+            ])),
             f"next semantics for node {i} on {symbol} word number {word_idx}"
         )
     
     def add_g_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, 'G')],
-                And(*[
-                    Implies(
-                        And(self.x[(i, 'G')], self.l[(i, j)]),
-                        And(*[
-                            self.y[(i, symbol, word_idx, t)] == And(*[
-                                self.y[(j, symbol, word_idx, tp)]
-                                for tp in word.generate_aux_set(t)
-                            ])
-                            for t in range(len(word))
-                        ])
-                    )
-                    for j in range(i)
-                ])
-            ),
+            self._children_semantics(i, 'G', word_idx, symbol, lambda left: And(*[
+                y(t) == And(*[left(tp) for tp in word.reachable[t]])
+                for t in range(len(word))
+            ])),
             f'semantics of the globally operator on {symbol} word {word_idx} for node {i}'
         )
 
     def add_f_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, 'F')],
-                And(*[
-                    Implies(
-                        And(self.x[(i, 'F')], self.l[(i, j)]),
-                        And(*[
-                            self.y[(i, symbol, word_idx, t)] == Or(*[
-                                self.y[(j, symbol, word_idx, tp)]
-                                for tp in word.generate_aux_set(t)
-                            ])
-                            for t in range(len(word))
-                        ])
-                    )
-                    for j in range(i)
-                ])
-            ),
+            self._children_semantics(i, 'F', word_idx, symbol, lambda left: And(*[
+                y(t) == Or(*[left(tp) for tp in word.reachable[t]])
+                for t in range(len(word))
+            ])),
             f'semantics of the finally operator on {symbol} word {word_idx} for node {i}'
         )
     
     def add_or_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, '|')],
-                And(*[
-                    Implies(
-                        And(self.x[(i, '|')], self.l[(i, j)], self.r[(i, jp)]),
-                        And(*[
-                            self.y[(i, symbol, word_idx, t)] == Or(*[
-                                self.y[(j, symbol, word_idx, t)],
-                                self.y[(jp, symbol, word_idx, t)]
-                            ])
-                            for t in range(len(word))
-                        ])
-                    )
-                    for j in range(i) for jp in range(i)
-                ])
-            ),
+            self._children_semantics(i, '|', word_idx, symbol, lambda left, right: And(*[
+                y(t) == Or(left(t), right(t))
+                for t in range(len(word))
+            ]), binary = True),
             f"or semantics for node {i} on {symbol} word number {word_idx}"
         )
     
     def add_and_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, '&')],
-                And(*[
-                    Implies(
-                        And(self.x[(i, '&')], self.l[(i, j)], self.r[(i, jp)]),
-                        And(*[
-                            self.y[(i, symbol, word_idx, t)] == And(*[
-                                self.y[(j, symbol, word_idx, t)],
-                                self.y[(jp, symbol, word_idx, t)]
-                            ])
-                            for t in range(len(word))
-                        ])
-                    )
-                    for j in range(i) for jp in range(i)
-                ])
-            ),
+            self._children_semantics(i, '&', word_idx, symbol, lambda left, right: And(*[
+                y(t) == And(left(t), right(t))
+                for t in range(len(word))
+            ]), binary = True),
             f"and semantics for node {i} on {symbol} word number {word_idx}"
         )
     
     def add_implication_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, '>')],
-                And([
-                    Implies(
-                        And(self.x[(i, '>')], self.l[(i, j)], self.r[(i, jp)]),
-                        And([
-                            self.y[(i, symbol, word_idx, t)] == Implies(
-                                self.y[(j, symbol, word_idx, t)],
-                                self.y[(jp, symbol, word_idx, t)]
-                            )
-                            for t in range(len(word))
-                        ])
-                    )
-                    for j in range(i) for jp in range(i)
-                ])
-            ),
+            self._children_semantics(i, '>', word_idx, symbol, lambda left, right: And(*[
+                y(t) == Implies(left(t), right(t))
+                for t in range(len(word))
+            ]), binary = True),
             f'implies semantics for node {i} on {symbol} word {word_idx}'
         )
 
     def add_u_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
+
+        def semantics(left, right):
+            constraints = []
+            for t in range(len(word)):
+                reachable = word.reachable[t]
+                constraints.append(y(t) == Or(*[
+                    And([left(tp) for tp in reachable[0:tpp]] + [right(reachable[tpp])])
+                    for tpp in range(len(reachable))
+                ]))
+            return And(*constraints)
+
         self.solver.assert_and_track(
-            Implies(
-                self.x[(i, 'U')],
-                And(*[
-                    Implies(
-                        And(self.x[(i, 'U')], self.l[(i, j)], self.r[(i, jp)]),
-                        And(*[
-                            self.y[(i, symbol, word_idx, t)] == Or(*[
-                                And(
-                                    [self.y[(j, symbol, word_idx, tp)] for tp in word.generate_aux_set(t)[0:tpp]] +
-                                    [self.y[(jp, symbol, word_idx, word.generate_aux_set(t)[tpp])]]
-                                )
-                                for tpp in range(len(word.generate_aux_set(t)))
-                            ])
-                            for t in range(len(word))
-                        ])
-                    )
-                    for j in range(i) for jp in range(i)
-                ])
-            ),
+            self._children_semantics(i, 'U', word_idx, symbol, semantics, binary = True),
             f"until semantics for node {i} on {symbol} word number {word_idx}"
         )
 
+    def _unroll(self, i: int, word: Trace, word_idx: int, symbol: str, op, left) -> And:
+        '''
+        Fixpoint semantics of F (op being Or) or G (op being And) for node i.
+        All positions of the loop see the same positions, hence share a single value computed once,
+        while each position of the prefix only depends on its own value and on the next position.
+        '''
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
+        loop = range(word.loop_start, len(word))
+        return And(
+            [y(word.loop_start) == op(*[left(t) for t in loop])] +
+            [y(t) == y(t + 1) for t in loop[:-1]] +
+            [y(t) == op(left(t), y(t + 1)) for t in range(word.loop_start)]
+        )
+
+    def add_g_fixpoint_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        self.solver.assert_and_track(
+            self._children_semantics(
+                i, 'G', word_idx, symbol,
+                lambda left: self._unroll(i, word, word_idx, symbol, And, left)
+            ),
+            f'fixpoint semantics of the globally operator on {symbol} word {word_idx} for node {i}'
+        )
+
+    def add_f_fixpoint_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        self.solver.assert_and_track(
+            self._children_semantics(
+                i, 'F', word_idx, symbol,
+                lambda left: self._unroll(i, word, word_idx, symbol, Or, left)
+            ),
+            f'fixpoint semantics of the finally operator on {symbol} word {word_idx} for node {i}'
+        )
+
+    def add_u_fixpoint_constraints(self, i: int, word: Trace, word_idx: int, symbol: str) -> None:
+        '''
+        Until is the least fixpoint of y_t = right_t | (left_t & y_{next(t)}).
+        Going once around the loop is enough to find the right operand, so the positions up to the end
+        of the word are chained to a second unrolling of the loop (the z variables) which ends on false
+        instead of wrapping around, making the constraints linear in the length of the word.
+        '''
+        y = lambda t: self.y[(i, symbol, word_idx, t)]
+        z = lambda t: self.z[(i, symbol, word_idx, t)]
+        last = len(word) - 1
+        self.solver.assert_and_track(
+            self._children_semantics(i, 'U', word_idx, symbol, lambda left, right: And(
+                [y(t) == Or(right(t), And(left(t), y(t + 1))) for t in range(last)] +
+                [y(last) == Or(right(last), And(left(last), z(word.loop_start)))] +
+                [z(t) == Or(right(t), And(left(t), z(t + 1))) for t in range(word.loop_start, last)] +
+                [z(last) == right(last)]
+            ), binary = True),
+            f"fixpoint until semantics for node {i} on {symbol} word number {word_idx}"
+        )
+
     def add_node_1_constraints(self) -> None:
         '''
         Adds the formula encoding the node at index 1 of the DAG.
@@ -0,0 +1,340 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from ltl_learner import archive, batch
+from ltl_learner.batch import WorkerPool, columns, learn, make_row, write
+
+logger = logging.getLogger(__name__)
+
+# Batch runs spread over several hosts sharing a filesystem, without a coordinator.
+# The samples of the batch are the tasks of a queue, a SQLite database on the shared filesystem,
+# which workers on every host claim for a limited time (a lease) and renew while they learn.
+# A task whose lease expires (its worker crashed, or its host went down) is claimed again by another worker,
+# up to max_attempts times. Results are stored in the queue too, and merged into a batch output file at the end.
+# SQLite relies on the locks of the filesystem: they must work across hosts (as on NFS with a lock manager),
+# and the clocks of the hosts must agree to well within a lease.
+
+schema = '''
+CREATE TABLE IF NOT EXISTS settings (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    sample TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    row TEXT
+);
+'''
+
+
+class WorkQueue:
+    '''
+    The tasks of a distributed batch run, in a SQLite database. A task is "pending", "leased" by a worker
+    until its lease_until time, or "done", its row being the output row of its sample.
+    '''
+    def __init__(self, path: Path, timeout: float = 60) -> None:
+        '''
+        :@param timeout: How long to wait for other workers to release the database, in seconds.
+        '''
+        self.path = Path(path)
+        self.connection = sqlite3.connect(str(self.path), timeout = timeout, isolation_level = None)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    @contextmanager
+    def transaction(self):
+        '''
+        Holds the write lock of the database from the start, so that two workers never claim the same task.
+        '''
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+    def create(self, files: list, timeout: float = 300, k: int = 10, max_attempts: int = 3, **options) -> int:
+        '''
+        Adds a task per sample file (files already in the queue are kept as they are).
+        The first call, creating the queue, sets the arguments every worker learns with; later calls keep them.
+        :@param timeout: The time budget of each learner, in seconds, as in BatchRunner.
+        :@param max_attempts: The number of leases a task may be given before it is reported as lost.
+        :@param options: Any other argument of Learner.
+        :return: The number of tasks added.
+        '''
+        self.connection.executescript(schema)
+        settings = {
+            'started': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'timeout': timeout,
+            'k': k,
+            'max_attempts': max_attempts,
+            'options': options,
+        }
+        with self.transaction() as connection:
+            connection.execute('INSERT OR IGNORE INTO settings (id, value) VALUES (0, ?)', (json.dumps(settings),))
+            before = connection.total_changes
+            connection.executemany(
+                'INSERT OR IGNORE INTO tasks (sample) VALUES (?)', [(str(Path(f).resolve()),) for f in files]
+            )
+            return connection.total_changes - before
+
+    def settings(self) -> dict:
+        return json.loads(self.connection.execute('SELECT value FROM settings').fetchone()[0])
+
+    def pool_timeout(self, settings: dict) -> float:
+        return None if settings['timeout'] is None else settings['timeout'] + batch.grace
+
+    def claim(self, worker: str, lease: float) -> str:
+        '''
+        Leases the first task which is pending, or whose lease expired, to worker for lease seconds.
+        Tasks whose lease expired max_attempts times are reported as lost instead.
+        :return: The path of the sample of the task, or None if no task is left to claim.
+        '''
+        settings = self.settings()
+        with self.transaction() as connection:
+            now = time.time()
+            lost = connection.execute(
+                "SELECT sample, attempts FROM tasks WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, settings['max_attempts'])
+            ).fetchall()
+            for sample, attempts in lost:
+                logger.warning(f'{sample} lost: its lease expired {attempts} times')
+                row = make_row(
+                    Path(sample).name, 'lost', f'its lease expired {attempts} times', None,
+                    settings['started'], settings['k'], self.pool_timeout(settings)
+                )
+                connection.execute(
+                    "UPDATE tasks SET state = 'done', row = ? WHERE sample = ?", (json.dumps(row), sample)
+                )
+            task = connection.execute(
+                "SELECT sample FROM tasks WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) "
+                "ORDER BY rowid LIMIT 1",
+                (now,)
+            ).fetchone()
+            if task is None:
+                return None
+            connection.execute(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE sample = ?",
+                (worker, now + lease, task[0])
+            )
+            return task[0]
+
+    def renew(self, worker: str, lease: float) -> int:
+        '''
+        Extends every lease worker still holds by lease seconds from now.
+        :return: The number of leases renewed.
+        '''
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE tasks SET lease_until = ? WHERE worker = ? AND state = 'leased'",
+                (time.time() + lease, worker)
+            ).rowcount
+
+    def complete(self, sample: str, worker: str, row: dict) -> bool:
+        '''
+        Stores the result of a task, unless another worker (which claimed it after its lease expired) did first.
+        :return: Whether the result was stored.
+        '''
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE tasks SET state = 'done', worker = ?, row = ? WHERE sample = ? AND state != 'done'",
+                (worker, json.dumps(row), sample)
+            ).rowcount == 1
+
+    def release(self, worker: str) -> int:
+        '''
+        Gives the tasks worker still holds back to the queue, for a worker stopping before finishing them.
+        Their leases do not count as attempts.
+        '''
+        with self.transaction() as connection:
+            return connection.execute(
+                "UPDATE tasks SET state = 'pending', worker = NULL, lease_until = NULL, attempts = attempts - 1 "
+                "WHERE worker = ? AND state = 'leased'",
+                (worker,)
+            ).rowcount
+
+    def counts(self) -> dict:
+        '''
+        :return: The number of tasks in each state.
+        '''
+        counts = {'pending': 0, 'leased': 0, 'done': 0}
+        counts.update(self.connection.execute('SELECT state, COUNT(*) FROM tasks GROUP BY state').fetchall())
+        return counts
+
+    def remaining(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM tasks WHERE state != 'done'").fetchone()[0]
+
+    def rows(self) -> list:
+        '''
+        :return: The rows of the tasks done, in the order the samples were added.
+        '''
+        return [
+            json.loads(row)
+            for row, in self.connection.execute("SELECT row FROM tasks WHERE state = 'done' ORDER BY rowid")
+        ]
+
+    def merge(self, output: Path) -> int:
+        '''
+        Writes the rows of the tasks done to a CSV (or, if it ends in .jsonl, JSON lines) file, as BatchRunner does.
+        :return: The number of rows written.
+        '''
+        output = Path(output)
+        output.parent.mkdir(parents = True, exist_ok = True)
+        jsonl = output.suffix == '.jsonl'
+        rows = self.rows()
+        with open(output, 'w', newline = '') as f:
+            if not jsonl:
+                csv.DictWriter(f, fieldnames = columns).writeheader()
+            for row in rows:
+                write(row, f, jsonl)
+        return len(rows)
+
+
+def work(path: Path, processes: int = None, lease: float = 60, worker: str = None, wait: float = 5) -> int:
+    '''
+    Runs a worker: claims tasks of the queue for a pool of processes, renews their leases every third of a lease
+    while they run, and stores their results, until no task is left. Tasks leased by other workers are waited for,
+    as they are claimed again if their lease expires.
+    :@param lease: The time (in seconds) a task is leased for, and may be left without a renewal.
+    :@param worker: The name of the worker in the queue, host name and process id by default.
+    :@param wait: The time (in seconds) between two looks at the queue when it has nothing to claim.
+    :return: The number of results stored by this worker.
+    '''
+    queue = WorkQueue(path)
+    settings = queue.settings()
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    pool_timeout = queue.pool_timeout(settings)
+    stored = 0
+    try:
+        with WorkerPool(learn, processes = processes, timeout = pool_timeout) as pool:
+            renewed = time.time()
+            while True:
+                while len(pool) < pool.processes:
+                    sample = queue.claim(worker, lease)
+                    if sample is None:
+                        break
+                    logger.info(f'{worker} claimed {sample}')
+                    payload = dict(sample = Path(sample), k = settings['k'], timeout = settings['timeout'])
+                    payload.update(settings['options'])
+                    pool.submit(sample, payload)
+                if not len(pool):
+                    if not queue.remaining():
+                        break
+                    time.sleep(wait)
+                    continue
+                for sample, status, result, elapsed in pool.poll(timeout = min(wait, lease / 3)):
+                    row = make_row(
+                        Path(sample).name, status, result, elapsed, settings['started'], settings['k'], pool_timeout
+                    )
+                    if queue.complete(sample, worker, row):
+                        stored += 1
+                        logger.info(f'{Path(sample).name}: {row["learned_formula"] or row["comment"]}')
+                    else:
+                        logger.warning(f'{sample} was done by another worker after the lease of {worker} expired')
+                if time.time() - renewed >= lease / 3:
+                    queue.renew(worker, lease)
+                    renewed = time.time()
+    finally:
+        queue.release(worker)
+        queue.close()
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog = 'ltl_learner.distributed',
+        description = '''
+        Batch runs over several hosts sharing a filesystem: "init" puts the samples of a folder in a queue
+        (a SQLite file), "work" runs a worker on the current host (as many as wanted, on as many hosts),
+        "status" shows the progress of the run, and "merge" writes the results to a batch output file.
+        '''
+    )
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    init = commands.add_parser('init', help = 'Creates the queue, or adds samples to it.')
+    init.add_argument('queue', type = Path, help = 'The path of the queue.')
+    init.add_argument('-d', '--dataset',
+        type = Path,
+        default = Path(Path(__file__) / '..' / '..' / 'dataset' / 'json').resolve(),
+        help = 'The folder containing the samples (as JSON files), or an archive of samples (see ltl_learner.archive).'
+    )
+    init.add_argument('-t', '--timeout',
+        type = float,
+        default = 300,
+        help = 'The time (in seconds) given to learning each sample. Defaults to 300.'
+    )
+    init.add_argument('-k', '--cutoff',
+        type = int,
+        default = 10,
+        help = 'The cutoff value for the length of the DAG. Defaults to 10.'
+    )
+    init.add_argument('--max-attempts',
+        type = int,
+        default = 3,
+        help = 'The number of times a sample may be claimed before it is reported as lost. Defaults to 3.'
+    )
+    init.add_argument('--options',
+        type = json.loads,
+        default = {},
+        help = 'Other arguments of Learner, as a JSON object (e.g. \'{"symmetry_breaking": true}\').'
+    )
+    work_parser = commands.add_parser('work', help = 'Runs a worker until every sample is done.')
+    work_parser.add_argument('queue', type = Path, help = 'The path of the queue.')
+    work_parser.add_argument('-j', '--workers',
+        type = int,
+        default = os.cpu_count(),
+        help = 'The number of samples to learn from at the same time. Defaults to the number of cores.'
+    )
+    work_parser.add_argument('--lease',
+        type = float,
+        default = 60,
+        help = '''
+        The time (in seconds) after which the samples of a worker which stopped renewing its leases
+        may be claimed by other workers. Defaults to 60.
+        '''
+    )
+    status = commands.add_parser('status', help = 'Shows the number of samples pending, leased and done.')
+    status.add_argument('queue', type = Path, help = 'The path of the queue.')
+    merge = commands.add_parser('merge', help = 'Writes the results of the samples done to a file.')
+    merge.add_argument('queue', type = Path, help = 'The path of the queue.')
+    merge.add_argument('-o', '--output',
+        type = Path,
+        required = True,
+        help = 'The CSV (or, ending in .jsonl, JSON lines) file to write results to.'
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level = logging.INFO, stream = sys.stdout)
+    if args.command == 'init':
+        if args.dataset.is_file():
+            files = archive.members(args.dataset)
+        else:
+            files = sorted(args.dataset.glob('*.json'))
+        added = WorkQueue(args.queue).create(
+            files, timeout = args.timeout, k = args.cutoff, max_attempts = args.max_attempts, **args.options
+        )
+        print(f'{added} samples added to {args.queue}.')
+    elif args.command == 'work':
+        print(f'{work(args.queue, processes = args.workers, lease = args.lease)} samples done by this worker.')
+    elif args.command == 'status':
+        print(json.dumps(WorkQueue(args.queue).counts()))
+    else:
+        print(f'{WorkQueue(args.queue).merge(args.output)} rows written to {args.output}.')
+
+
+if __name__ == '__main__':
+    main()
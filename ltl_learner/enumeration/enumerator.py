@@ -0,0 +1,87 @@
+import logging
+from typing import Any, Union
+
+from ltl_learner.constants import operators
+from ltl_learner.ltl.evaluator import Evaluator
+from ltl_learner.traces import Sample
+
+logger = logging.getLogger(__name__)
+
+_commutative = {'|', '&'}
+
+
+class Enumerator:
+    '''
+    Bottom-up enumeration of LTL formulas by increasing size, as an alternative to the SAT encoding.
+    Each formula is represented by its characteristic vector, i.e. its truth values on every position
+    of every word of the sample, as computed by the Evaluator. Formulas whose vector was already
+    reached by a smaller (or earlier) formula are equivalent on the sample and dropped.
+    Sizes are syntax tree sizes, hence upper bounds of the size of the matching DAG.
+    '''
+    def __init__(self, variables: list[Any] = None, ops: Union[None, list, set, tuple] = None) -> None:
+        self.variables = variables
+        if not ops:
+            ops = operators['all']
+        self.operators = [o for o in ops if o in operators['all']]
+        self.unaries = [o for o in self.operators if o in operators['unary']]
+        self.binaries = [o for o in self.operators if o in operators['binary']]
+        self.formulas = {}
+        self.seen = set()
+
+    def search(self, positives: Sample, negatives: Sample, max_size: int = 10) -> tuple:
+        '''
+        Enumerates formulas until one separates the sample.
+        :@param positives: The positive words to learn from
+        :@param negatives: The negative words to learn from
+        :@param max_size: The maximal size of the formulas to enumerate
+        :return: a (formula, size) tuple, or (None, None) if no formula of size at most max_size separates the sample.
+        '''
+        evaluator = Evaluator(list(positives) + list(negatives))
+        accepting = evaluator.mask(evaluator.offsets[:len(positives)])
+        rejecting = evaluator.mask(evaluator.offsets[len(positives):])
+        for formula, size, values in self.enumerate(evaluator, max_size):
+            if values & accepting == accepting and not values & rejecting:
+                logger.info(f'Found separating formula {formula} of size {size}')
+                return formula, size
+        return None, None
+
+    def enumerate(self, evaluator: Evaluator, max_size: int):
+        '''
+        Yields (formula, size, characteristic vector) triples for every formula of size at most max_size
+        not equivalent on the words of the evaluator to a previous one, by increasing size.
+        '''
+        self.formulas = {}
+        self.seen = set()
+        for size in range(1, max_size + 1):
+            logger.info(f'Enumerating formulas of size {size}')
+            self.formulas[size] = []
+            for formula, values in self.candidates(evaluator, size):
+                if values in self.seen:
+                    continue
+                self.seen.add(values)
+                self.formulas[size].append((formula, values))
+                yield formula, size, values
+            logger.info(f'  {len(self.formulas[size])} new formulas of size {size}')
+
+    def candidates(self, evaluator: Evaluator, size: int):
+        '''
+        Yields (formula, characteristic vector) pairs of the given size, built from smaller kept formulas.
+        '''
+        if size == 1:
+            for a in self.variables:
+                yield a, evaluator.apply(a)
+            return
+        for op in self.unaries:
+            for formula, values in self.formulas[size - 1]:
+                yield f'{op}({formula})', evaluator.apply(op, values)
+        for op in self.binaries:
+            for left_size in range(1, size - 1):
+                right_size = size - 1 - left_size
+                if op in _commutative and left_size > right_size:
+                    continue
+                for i, (left, left_values) in enumerate(self.formulas[left_size]):
+                    rights = self.formulas[right_size]
+                    if op in _commutative and left_size == right_size:
+                        rights = rights[i + 1:]
+                    for right, right_values in rights:
+                        yield f'{op}({left},{right})', evaluator.apply(op, left_values, right_values)
@@ -0,0 +1,180 @@
+import logging
+import math
+from typing import Any, Union
+
+from ltl_learner.enumeration.enumerator import Enumerator
+from ltl_learner.ltl.converter import parse
+from ltl_learner.ltl.evaluator import Evaluator
+from ltl_learner.traces import Sample
+
+logger = logging.getLogger(__name__)
+
+
+def dag_size(formula: str) -> int:
+    '''
+    The size of the smallest DAG of a formula, i.e. its number of distinct subformulas.
+    '''
+    subformulas = set()
+    nodes = [parse(formula)]
+    while nodes:
+        node = nodes.pop()
+        subformulas.add(str(node))
+        nodes.extend(child for child in (node.left, node.right) if child is not None)
+    return len(subformulas)
+
+
+def conjunction(formulas: list) -> str:
+    result = formulas[0]
+    for formula in formulas[1:]:
+        result = f'&({result},{formula})'
+    return result
+
+
+def disjunction(formulas: list) -> str:
+    result = formulas[0]
+    for formula in formulas[1:]:
+        result = f'|({result},{formula})'
+    return result
+
+
+class GreedyCombiner:
+    '''
+    Approximate learning for samples too large for the exact search: small formulas are mined with the Enumerator,
+    then combined into a disjunction of conjunctions separating the sample, built greedily as a set cover.
+    Each conjunction is grown one formula at a time, picking the formula with the best FOIL gain (positive words
+    not covered yet that it keeps, against negative words it rules out) until it accepts no negative word;
+    conjunctions are added until every positive word is accepted by one of them.
+    Formulas are only compared on whether they accept each word, so this scales with the number of words,
+    but the result is not minimal. Conjunctions and disjunctions are used whatever the operators given.
+    '''
+    def __init__(self, variables: list[Any] = None, ops: Union[None, list, set, tuple] = None) -> None:
+        self.enumerator = Enumerator(variables = variables, ops = ops)
+        self.negation = '!' in self.enumerator.unaries
+
+    def search(self, positives: Sample, negatives: Sample, mining_size: int = 3, max_mining_size: int = 4) -> tuple:
+        '''
+        Combines the formulas up to mining_size, then mines one size more at a time up to max_mining_size,
+        combining again after each size: larger formulas often make for much smaller combinations.
+        :return: a (formula, size) tuple for the smallest combination found, size being the size of its DAG,
+                 or (None, None) if no combination of the mined formulas separates the sample.
+        '''
+        evaluator = Evaluator(list(positives) + list(negatives))
+        self.accepting = evaluator.mask(evaluator.offsets[:len(positives)])
+        self.rejecting = evaluator.mask(evaluator.offsets[len(positives):])
+        # Word k accepts a formula when bit offsets[k] of its values is set: only those bits are kept
+        words = self.accepting | self.rejecting
+        self.literals = {}
+        best = None, None
+        mined = 0
+        for formula, size, values in self.enumerator.enumerate(evaluator, max_mining_size):
+            if size > mined >= mining_size:
+                best = self.smallest(best, mined)
+            mined = size
+            self.add(formula, size, values & words)
+            if self.negation:
+                self.add(f'!({formula})', size + 1, ~values & words)
+        # Also combines what was mined when the enumeration ran out before mining_size (e.g. without variables)
+        best = self.smallest(best, mined)
+        if best[0] is None:
+            logger.info(f'No combination of formulas up to size {max_mining_size} separates the sample.')
+        else:
+            logger.info(f'Found separating formula {best[0]} of size {best[1]}')
+        return best
+
+    def smallest(self, best: tuple, mined: int) -> tuple:
+        '''
+        :return: The smaller of best and the combination of the formulas mined so far, as (formula, size).
+        '''
+        terms = self.cover()
+        if terms is None:
+            return best
+        formula = self.combine(terms)
+        size = dag_size(formula)
+        logger.info(f'  {formula} of size {size} combines formulas up to size {mined}')
+        if best[1] is None or size < best[1]:
+            return formula, size
+        return best
+
+    def combine(self, terms: list) -> str:
+        '''
+        :return: The disjunction of the conjunctions of terms (see cover), an empty conjunction (when there is
+                 no negative word) being true, and an empty disjunction (when there is no positive word) false.
+                 Those are written over the first variable, or as the constants true and false if there is none.
+        '''
+        if self.enumerator.variables:
+            variable = self.enumerator.variables[0]
+            true, false = f'|({variable},!({variable}))', f'&({variable},!({variable}))'
+        else:
+            true, false = 'true', 'false'
+        if not terms:
+            return false
+        return disjunction([conjunction(term) if term else true for term in terms])
+
+    def add(self, formula: str, size: int, accepted: int) -> None:
+        '''
+        Keeps the smallest formula among those accepting the same words.
+        '''
+        if accepted not in self.literals or self.literals[accepted][1] > size:
+            self.literals[accepted] = (formula, size)
+
+    def cover(self) -> list:
+        '''
+        :return: The conjunctions (as lists of formulas) of a separating disjunction, or None.
+        '''
+        logger.info(f'Combining {len(self.literals)} formulas accepting different words')
+        uncovered = self.accepting
+        terms = []
+        while uncovered:
+            term = self.conjunction(uncovered)
+            if term is None:
+                return None
+            formulas, accepted = term
+            terms.append((formulas, accepted))
+            uncovered &= ~accepted
+        # Conjunctions found later may cover all the positive words of earlier ones
+        for k in range(len(terms) - 1, -1, -1):
+            others = 0
+            for j, (_, accepted) in enumerate(terms):
+                if j != k:
+                    others |= accepted
+            if others & self.accepting == self.accepting:
+                terms.pop(k)
+        return [formulas for formulas, _ in terms]
+
+    def conjunction(self, uncovered: int) -> tuple:
+        '''
+        Grows a conjunction accepting some of the uncovered positive words and no negative word.
+        :return: Its formulas and the words it accepts, or None if no formula rules out a remaining negative word
+                 while keeping an uncovered positive one.
+        '''
+        formulas = []
+        accepted = self.accepting | self.rejecting
+        while accepted & self.rejecting:
+            positives = (accepted & uncovered).bit_count()
+            negatives = (accepted & self.rejecting).bit_count()
+            before = math.log(positives / (positives + negatives))
+            best = None
+            for words, (formula, size) in self.literals.items():
+                kept = accepted & words
+                p = (kept & uncovered).bit_count()
+                n = (kept & self.rejecting).bit_count()
+                if not p or n == negatives:
+                    continue
+                gain = p * (math.log(p / (p + n)) - before)
+                # Smaller formulas first among equally good ones
+                if best is None or (gain, -size) > best[0]:
+                    best = ((gain, -size), formula, words)
+            if best is None:
+                return None
+            formulas.append((best[1], best[2]))
+            accepted &= best[2]
+        # Formulas picked early may be made useless by later ones
+        for k in range(len(formulas) - 1, -1, -1):
+            others = self.accepting | self.rejecting
+            for j, (_, words) in enumerate(formulas):
+                if j != k:
+                    others &= words
+            if not others & self.rejecting:
+                formulas.pop(k)
+                accepted = others
+        return [formula for formula, _ in formulas], accepted
@@ -0,0 +1,106 @@
+import itertools
+import logging
+from typing import Any, Union
+
+from ltl_learner.constants import operators
+from ltl_learner.enumeration.greedy import GreedyCombiner, dag_size
+from ltl_learner.ltl.converter import parse
+from ltl_learner.ltl.evaluator import Evaluator
+from ltl_learner.traces import Sample
+
+logger = logging.getLogger(__name__)
+
+# Declare-style patterns, as formulas over the variables {0} (the activation) and {1} (the target),
+# written in the format of LTLConverter. Words are infinite, so that "never" and "eventually" range over
+# the whole word rather than up to its end.
+templates = {
+    'init': '{0}',
+    'existence': 'F({0})',
+    'absence': 'G(!({0}))',
+    'choice': '|(F({0}),F({1}))',
+    'exclusive_choice': '&(|(F({0}),F({1})),>(F({0}),G(!({1}))))',
+    'responded_existence': '>(F({0}),F({1}))',
+    'co_existence': '&(>(F({0}),F({1})),>(F({1}),F({0})))',
+    'not_co_existence': '>(F({0}),G(!({1})))',
+    'response': 'G(>({0},F({1})))',
+    'precedence': '|(U(!({1}),{0}),G(!({1})))',
+    'succession': '&(G(>({0},F({1}))),|(U(!({1}),{0}),G(!({1}))))',
+    'chain_response': 'G(>({0},X({1})))',
+    'chain_precedence': 'G(>(X({1}),{0}))',
+    'not_succession': 'G(>({0},G(!({1}))))',
+}
+
+
+def arity(template: str) -> int:
+    return 2 if '{1}' in template else 1
+
+
+def labels(formula: str) -> set:
+    '''
+    The operators a formula uses.
+    '''
+    used = set()
+    nodes = [parse(formula)]
+    while nodes:
+        node = nodes.pop()
+        if node.label in operators['all']:
+            used.add(node.label)
+        nodes.extend(child for child in (node.left, node.right) if child is not None)
+    return used
+
+
+class TemplateMatcher(GreedyCombiner):
+    '''
+    Learning restricted to a catalog of patterns (see templates): every pattern is instantiated over
+    every tuple of distinct variables and checked against the whole sample at once by the Evaluator,
+    whose per-variable masks of positions and cache of subformulas (F(a) being shared by many patterns)
+    make this a matter of milliseconds.
+    The instances are then combined as in GreedyCombiner: a single instance if one separates the sample,
+    otherwise a conjunction of instances holding on every positive word (as Declare models are),
+    or a disjunction of such conjunctions.
+    Patterns using operators which are not allowed are left out; & and | are used to combine them regardless.
+    '''
+    def __init__(
+        self, variables: list[Any] = None, ops: Union[None, list, set, tuple] = None, catalog: list = None
+    ) -> None:
+        '''
+        :@param catalog: The names of the patterns to use, all of them if None.
+        '''
+        super().__init__(variables = variables, ops = ops)
+        unknown = set(catalog or []) - set(templates)
+        if unknown:
+            raise ValueError(f'Unknown templates {sorted(unknown)}, expected some of {list(templates)}')
+        allowed = set(self.enumerator.operators)
+        self.catalog = {
+            name: templates[name] for name in (catalog or templates)
+            if labels(templates[name].format('a', 'b')) <= allowed
+        }
+
+    def instances(self):
+        '''
+        Yields every pattern of the catalog instantiated over every tuple of distinct variables.
+        '''
+        for template in self.catalog.values():
+            for variables in itertools.permutations(self.enumerator.variables, arity(template)):
+                yield template.format(*variables)
+
+    def search(self, positives: Sample, negatives: Sample) -> tuple:
+        '''
+        :return: a (formula, size) tuple, size being the size of the DAG of formula,
+                 or (None, None) if no combination of instances separates the sample.
+        '''
+        evaluator = Evaluator(list(positives) + list(negatives))
+        self.accepting = evaluator.mask(evaluator.offsets[:len(positives)])
+        self.rejecting = evaluator.mask(evaluator.offsets[len(positives):])
+        words = self.accepting | self.rejecting
+        self.literals = {}
+        for formula in self.instances():
+            self.add(formula, dag_size(formula), evaluator.evaluate(formula) & words)
+        terms = self.cover()
+        if terms is None:
+            logger.info(f'No combination of {", ".join(self.catalog)} separates the sample.')
+            return None, None
+        formula = self.combine(terms)
+        size = dag_size(formula)
+        logger.info(f'Found separating formula {formula} of size {size}')
+        return formula, size
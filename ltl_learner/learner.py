@@ -1,44 +1,242 @@
 import json
 import logging
+import time
+from collections import Counter
 from copy import deepcopy
 from datetime import datetime
 from pathlib import Path
 
-from z3 import Solver
+from z3 import Z3Exception, sat, unknown, unsat
 
+from ltl_learner import archive, raw
+from ltl_learner.cache import DEFAULT_SIZE, ResultCache, fingerprint
+from ltl_learner.backends.backend import make_backend
 from ltl_learner.constants import operators
 from ltl_learner.dag.builder import DAGBuilder
+from ltl_learner.enumeration.enumerator import Enumerator
+from ltl_learner.enumeration.greedy import GreedyCombiner
+from ltl_learner.enumeration.templates import TemplateMatcher
 from ltl_learner.ltl.converter import LTLConverter
+from ltl_learner.ltl.evaluator import Evaluator
+from ltl_learner.metrics import Metrics, statistics
 from ltl_learner.traces import Sample
 
 logger = logging.getLogger(__name__)
 
+engines = ('sat', 'enumerative', 'greedy', 'templates')
+
+
+def weights(sample: Sample) -> list:
+    '''
+    :return: The number of words of the original sample each word of sample stands for.
+    '''
+    counts = Counter(sample.origin)
+    return [counts[k] for k in range(len(sample))]
+
+
+class PartialResult:
+    '''
+    What is known about a sample when a budget ran out before its minimal formula was found:
+    the lengths proven to have no separating DAG, the lengths left undecided (with the reason the solver gave),
+    and the smallest separating formula found on a larger length, if any.
+    With an error rate, it is also what is known when no formula within the rate was found up to the cutoff:
+    formula is then the one misclassifying the fewest words so far, errors being their total weight.
+    '''
+    def __init__(
+        self, unsat: list, unknown: dict, formula: str = None, size: int = None, expected: str = None,
+        errors: int = None
+    ) -> None:
+        self.unsat = unsat
+        self.unknown = unknown
+        self.formula = formula
+        self.size = size
+        self.expected = expected
+        self.errors = errors
+
+    @property
+    def timed_out(self) -> int:
+        '''
+        The first length left undecided, if any.
+        '''
+        return min(self.unknown) if self.unknown else None
+
+    @property
+    def lower_bound(self) -> int:
+        '''
+        The smallest length not proven unsatisfiable, which the minimal formula has at least.
+        '''
+        n = 1
+        while n in self.unsat:
+            n += 1
+        return n
+
+    def as_dict(self) -> dict:
+        return {
+            'unsat': self.unsat,
+            'unknown': self.unknown,
+            'timed_out': self.timed_out,
+            'lower_bound': self.lower_bound,
+            'formula': self.formula,
+            'size': self.size,
+            'errors': self.errors,
+        }
+
+    def __repr__(self) -> str:
+        return f'PartialResult({self.as_dict()})'
+
 
 class Learner:
-    def __init__(self, k: int = 10, sample: Path = None, syntax = None):
+    def __init__(
+        self,
+        k: int = 10,
+        sample: Path = None,
+        syntax = None,
+        incremental: bool = True,
+        temporal_encoding: str = 'expanded',
+        child_values: bool = False,
+        symmetry_breaking: bool = False,
+        engine: str = 'sat',
+        canonicalize: bool = True,
+        backend: str = 'z3',
+        cores: bool = False,
+        sat_command: str = None,
+        cnf_directory: Path = None,
+        metrics_file: Path = None,
+        cegis: bool = False,
+        cegis_initial: int = 4,
+        cegis_step: int = 8,
+        check_timeout: float = None,
+        timeout: float = None,
+        max_memory: int = None,
+        mining_size: int = 3,
+        minimize: bool = False,
+        error_rate: float = None,
+        templates: list = None,
+        cache: Path = None,
+        cache_size: int = DEFAULT_SIZE,
+        dump_model: bool = True,
+        model_directory: Path = None
+    ):
+        '''
+        :@param check_timeout: Seconds given to the solver for each length.
+        :@param timeout: Seconds given to the whole run, loading the sample included.
+        :@param max_memory: Megabytes the solver may use.
+        When a budget runs out, lengths left undecided are skipped and main returns a PartialResult.
+        :@param mining_size: With the greedy engine, the size of the formulas combined (more are mined if needed).
+        :@param minimize: With the greedy engine, looks for a smaller formula with the SAT encoding afterwards.
+        :@param error_rate: For noisy samples, the fraction of the words (duplicates included) the formula may
+                            misclassify with the SAT engine. See solve.
+        :@param templates: With the templates engine, the names of the patterns to use (see
+                           ltl_learner.enumeration.templates), all of them if None.
+        :@param cache: A directory caching results (see ltl_learner.cache), where main looks for the answer first.
+        :@param cache_size: The size (in bytes) above which the least recently used entries of the cache are evicted.
+        :@param dump_model: Whether to write the solver assertions to an SMT-LIB file when a formula is found.
+        :@param model_directory: The directory of that file, ltl_learner/results if None.
+        '''
+        self.started = time.perf_counter()
+        self.check_timeout = check_timeout
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.mining_size = mining_size
+        self.minimize = minimize
         self.root_folder = Path(Path(__file__) / '..').resolve()
         self.file_name = f'run_{datetime.now().strftime("%Y%m%d_%H%M%S")}.smtlib2'
         self.cutoff = k
-        self.variables, self.positive, self.negative, self.expected_formula = self.read_sample(sample)
+        self.incremental = incremental
+        self.cegis = cegis
+        self.cegis_initial = cegis_initial
+        self.cegis_step = cegis_step
+        self.active = None
+        if error_rate is not None and not 0 <= error_rate <= 1:
+            raise ValueError(f'The error rate must be between 0 and 1, got {error_rate}')
+        if error_rate is not None and cegis:
+            raise ValueError('The counterexample guided mode needs every encoded word to be classified correctly')
+        self.error_rate = error_rate
+        if engine not in engines:
+            raise ValueError(f'Unknown engine {engine}, expected one of {engines}')
+        self.engine = engine
+        self.metrics = Metrics()
+        self.metrics_file = metrics_file
+        with self.metrics.phase('load'):
+            self.variables, self.positive, self.negative, self.expected_formula = self.read_sample(sample)
+        if canonicalize:
+            with self.metrics.phase('canonicalize'):
+                self.canonicalize()
         ops = {}
         if syntax:
             ops = syntax
-        self.solver = Solver()
-        self.builder = DAGBuilder(solver=self.solver, variables=deepcopy(self.variables), ops=ops)
+        self.weights = None
+        self.error_budget = None
+        if error_rate is not None:
+            # Words merged by canonicalization weigh as much as the words they stand for
+            self.weights = (weights(self.positive), weights(self.negative))
+            self.error_budget = int(error_rate * (len(self.positive.origin) + len(self.negative.origin)))
+        self.solver = make_backend(backend, cores = cores, command = sat_command, directory = cnf_directory)
+        self.builder = DAGBuilder(
+            solver=self.solver,
+            variables=deepcopy(self.variables),
+            ops=ops,
+            temporal_encoding=temporal_encoding,
+            child_values=child_values,
+            symmetry_breaking=symmetry_breaking,
+            weights=self.weights,
+            metrics=self.metrics
+        )
         self.converter = LTLConverter(self.solver)
-        self.output_file = str(Path(self.root_folder / 'results' / self.file_name))
+        self.enumerator = Enumerator(variables=deepcopy(self.variables), ops=ops)
+        self.combiner = GreedyCombiner(variables=deepcopy(self.variables), ops=ops)
+        self.matcher = TemplateMatcher(variables=deepcopy(self.variables), ops=ops, catalog=templates)
+        self.dump_model = dump_model
+        self.output_file = str(Path(model_directory or self.root_folder / 'results') / self.file_name)
         self.sat = None
+        self.reason = None
+        # Blocking clauses of the formulas enumerated so far, by length (see formulas)
+        self.blocked = {}
+        self.size = None
+        # With an error rate, the total weight of the words the learned formula misclassifies
+        self.errors = None
+        self.cache = ResultCache(cache, max_size = cache_size) if cache else None
+        # The lengths 1 to proven are known to have no separating DAG (from the cache), and are not checked
+        self.proven = 0
 
     def read_sample(self, sample):
-        with open(sample, 'r') as f:
-            spec = json.load(f)
+        '''
+        Reads a JSON sample file, a raw sample file (.trace, see ltl_learner.raw),
+        or a sample of an archive (see ltl_learner.archive). A sample already parsed from JSON is accepted too.
+        '''
+        if isinstance(sample, dict):
+            spec = sample
+        elif archive.is_member(sample):
+            return archive.load(sample)
+        elif Path(sample).suffix == '.trace':
+            return raw.load(sample)
+        else:
+            with open(sample, 'r') as f:
+                spec = json.load(f)
         return (
             spec['variables'],
-            Sample(spec['positives']),
-            Sample(spec['negatives']),
+            Sample(spec['positives'], spec['variables']),
+            Sample(spec['negatives'], spec['variables']),
             spec.get('expected', '')
         )
 
+    def canonicalize(self):
+        '''
+        Replaces every word of the sample by its shortest lasso and removes duplicate words,
+        which does not change which formulas separate the sample, but shrinks its encoding.
+        The original samples remain available as self.positive.original and self.negative.original.
+        '''
+        self.positive = self.positive.canonical()
+        self.negative = self.negative.canonical()
+        logger.info(
+            f'Canonical sample: {len(self.positive)}/{len(self.positive.original)} positive words, '
+            f'{len(self.negative)}/{len(self.negative.original)} negative words, '
+            f'{sum(len(t) for t in self.positive) + sum(len(t) for t in self.negative)}/'
+            f'{sum(len(t) for t in self.positive.original) + sum(len(t) for t in self.negative.original)} positions.'
+        )
+        if self.positive.keys() & self.negative.keys() and self.error_rate is None:
+            logger.warning('Some words are both positive and negative: no formula can separate this sample.')
+
     def is_sat(self):
         self.solver.check()
         return self.solver.model()
@@ -54,23 +252,376 @@ class Learner:
             f.write(f';;    operators: {", ".join(operators["all"])}\n')
             f.write(self.solver.sexpr())
 
-    def main(self):
+    def remaining(self) -> float:
+        '''
+        :return: The seconds the next check may take, or None if there is no time budget.
+        '''
+        budgets = []
+        if self.check_timeout is not None:
+            budgets.append(self.check_timeout)
+        if self.timeout is not None:
+            budgets.append(self.started + self.timeout - time.perf_counter())
+        return min(budgets) if budgets else None
+
+    def limit(self) -> bool:
+        '''
+        Passes the budgets to the solver before a check.
+        :return: Whether any time is left for the check.
+        '''
+        remaining = self.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                return False
+            self.solver.set(timeout = max(1, int(remaining * 1000)))
+        if self.max_memory is not None:
+            self.solver.set(max_memory = self.max_memory)
+        return True
+
+    def check_length(self, n: int, bound: int = None):
+        '''
+        Checks whether a DAG of length n separates the sample.
+        In incremental mode, only node n is encoded on top of the n - 1 nodes already on the solver,
+        and the root is picked through an assumption, so that clauses learned on smaller lengths are kept.
+        Otherwise, the solver is reset and the whole DAG is encoded from scratch.
+        :@param bound: With an error rate, the total weight of the words the DAG may misclassify (any if None).
+        :return: sat, unsat, or unknown when a budget ran out (self.reason telling which).
+        '''
+        positives, negatives = self.active if self.cegis else (self.positive, self.negative)
+        encoding = time.perf_counter()
+        with self.metrics.phase('encode'):
+            if self.incremental:
+                while self.builder.current_length < n:
+                    self.builder.extend(positives, negatives)
+                assumptions = [self.builder.selectors[n]]
+            else:
+                self.solver.reset()
+                self.builder.build(n, positives, negatives)
+                self.solver.add(*self.blocked.get(n, []))
+                assumptions = []
+            if self.error_rate is not None and bound is not None:
+                assumptions.append(self.builder.error_bound(n, bound))
+        solving = time.perf_counter()
+        self.reason = None
+        with self.metrics.phase('solve'):
+            if not self.limit():
+                result, self.reason = unknown, 'timeout'
+            else:
+                try:
+                    result = self.solver.check(*assumptions)
+                except Z3Exception as e:
+                    # Z3 raises rather than answering unknown when running out of memory in some of its phases
+                    if self.max_memory is None or b'memory' not in e.value:
+                        raise
+                    result, self.reason = unknown, e.value.decode()
+                if result == unknown and self.reason is None:
+                    self.reason = self.solver.reason_unknown()
+        self.metrics.add_size(
+            n,
+            result = str(result),
+            **({'reason': self.reason} if result == unknown else {}),
+            **({'bound': bound} if self.error_rate is not None else {}),
+            words = len(positives) + len(negatives),
+            variables = self.builder.variable_count(),
+            assertions = len(self.solver.assertions()),
+            encode_time = solving - encoding,
+            solve_time = time.perf_counter() - solving,
+            statistics = statistics(self.solver)
+        )
+        return result
+
+    def misclassified(self, formula: str) -> int:
+        '''
+        :return: The total weight of the words formula misclassifies.
+        '''
+        with self.metrics.phase('evaluate'):
+            accepted = self.evaluators[0].accepted(formula), self.evaluators[1].accepted(formula)
+        return (
+            sum(weight for weight, ok in zip(self.weights[0], accepted[0]) if not ok) +
+            sum(weight for weight, ok in zip(self.weights[1], accepted[1]) if ok)
+        )
+
+    def start_cegis(self) -> None:
+        '''
+        Counterexample guided mode: only a few words of each sample are encoded at first (self.active),
+        misclassified words of the full sample being added as candidate formulas are found (see grow).
+        '''
+        self.active = (list(self.positive[:self.cegis_initial]), list(self.negative[:self.cegis_initial]))
+        self.active_indices = (set(range(len(self.active[0]))), set(range(len(self.active[1]))))
+        self.evaluators = (Evaluator(self.positive), Evaluator(self.negative))
+
+    def grow(self, n: int) -> bool:
+        '''
+        Checks the formula modelled by the solver against the full sample, and adds (at most cegis_step of)
+        the words it misclassifies, of each sample, to the encoded ones.
+        :return: Whether words were added, i.e. whether the formula does not separate the full sample.
+        '''
+        with self.metrics.phase('decode'):
+            formula = self.converter.build(length = n)
+        with self.metrics.phase('cegis'):
+            misclassified = (
+                [k for k, ok in enumerate(self.evaluators[0].accepted(formula)) if not ok],
+                [k for k, ok in enumerate(self.evaluators[1].accepted(formula)) if ok],
+            )
+        if not misclassified[0] and not misclassified[1]:
+            return False
+        logger.info(
+            f'{formula} misclassifies {len(misclassified[0])} positive and {len(misclassified[1])} negative words.'
+        )
+        added = 0
+        with self.metrics.phase('encode'):
+            for positive, words in zip((True, False), misclassified):
+                sample = self.positive if positive else self.negative
+                active, indices = self.active[not positive], self.active_indices[not positive]
+                for k in [k for k in words if k not in indices][:self.cegis_step]:
+                    if self.incremental:
+                        self.builder.add_word(sample[k], len(active), positive = positive)
+                    active.append(sample[k])
+                    indices.add(k)
+                    added += 1
+        if not added:
+            # The solver is bound to separate the encoded words, so this is an encoding (or evaluator) error
+            raise RuntimeError(f'{formula} misclassifies words it was learned from')
+        return True
+
+    def formulas(self, limit: int = None):
+        '''
+        Yields the minimal separating formulas one after the other, the first one being the formula main returns.
+        After each formula, every DAG of that formula (whatever the numbering of its nodes) is blocked on the live
+        solver and the same length is checked again, so that the solver keeps what it learned and each check
+        gives a new formula.
+        Stops after limit formulas, once every DAG of the minimal length is blocked, or when a budget runs out.
+        With an error rate, the formulas are those of that length within the rate.
+        '''
+        if self.engine != 'sat':
+            raise ValueError('Only the sat engine can enumerate formulas')
+        result = self.main(lookup = False)
+        if not isinstance(result, tuple):
+            return
+        n = self.size
+        found = 0
+        while limit is None or found < limit:
+            with self.metrics.phase('decode'):
+                formula = self.converter.build(length = n)
+            found += 1
+            yield formula
+            with self.metrics.phase('encode'):
+                self.blocked.setdefault(n, []).append(self.builder.block(self.solver.model(), n))
+            while True:
+                result = self.check_length(n, self.error_budget)
+                if result != sat or not self.cegis or not self.grow(n):
+                    break
+            if result != sat:
+                if result == unknown:
+                    logger.info(f'Stopped enumerating formulas of length {n}: {self.reason}.')
+                return
+
+    def enumerate(self):
+        '''
+        Searches for a separating formula with the enumerative engine instead of the SAT encoding.
+        '''
+        formula, self.size = self.enumerator.search(self.positive, self.negative, max_size = self.cutoff)
+        if formula is None:
+            logger.info("Unable to determine a formula within the given constraint.")
+            return None
+        logger.info('LTL Formula:')
+        logger.info(f'  {formula}')
+        return formula, self.expected_formula
+
+    def combine(self):
+        '''
+        Searches for a separating formula with the greedy engine: small formulas combined with & and |,
+        in seconds on large samples, but not minimal. With minimize, smaller formulas are then looked for
+        with the SAT encoding (which --cegis and budgets keep affordable on large samples).
+        '''
+        with self.metrics.phase('search'):
+            formula, self.size = self.combiner.search(
+                self.positive, self.negative, mining_size = self.mining_size, max_mining_size = self.mining_size + 1
+            )
+        if formula is None:
+            logger.info("Unable to determine a formula within the given constraint.")
+            return None
+        logger.info('LTL Formula:')
+        logger.info(f'  {formula}')
+        if not self.minimize or self.size == 1:
+            return formula, self.expected_formula
+        size, cutoff = self.size, self.cutoff
+        self.cutoff = min(cutoff, size - 1)
+        try:
+            result = self.solve()
+        finally:
+            self.cutoff = cutoff
+        if isinstance(result, tuple):
+            return result
+        # Nothing smaller was found (or proven not to exist, if result is not partial)
+        self.size = size
+        return formula, self.expected_formula
+
+    def match(self):
+        '''
+        Searches for a separating formula with the templates engine: combinations of Declare-style patterns only.
+        '''
+        with self.metrics.phase('search'):
+            formula, self.size = self.matcher.search(self.positive, self.negative)
+        if formula is None:
+            logger.info("Unable to determine a formula within the given constraint.")
+            return None
+        logger.info('LTL Formula:')
+        logger.info(f'  {formula}')
+        return formula, self.expected_formula
+
+    def main(self, lookup: bool = True):
+        '''
+        :@param lookup: Whether to give the answer of the cache, if any, when it has one. Results are cached anyway,
+                        and lengths the cache knows to be unsatisfiable are not checked again.
+        :return: The learned formula and the expected one, or None (the solver with the SAT engine) if none was found,
+                 or a PartialResult if a budget ran out.
+                 Measurements of the run are left in self.metrics, and written to the metrics file if any.
+        '''
+        result = self.cached(lookup)
+        if result is None:
+            result = self.search()
+            self.store(result)
+        if self.metrics_file:
+            self.metrics.write(self.metrics_file)
+        return result
+
+    def cache_key(self) -> str:
+        options = {'engine': self.engine, 'operators': sorted(self.builder.operators), 'error_rate': self.error_rate}
+        if self.engine == 'greedy':
+            options.update(mining_size = self.mining_size, minimize = self.minimize)
+        if self.engine == 'templates':
+            options['templates'] = sorted(self.matcher.catalog)
+        return fingerprint(self.variables, self.positive, self.negative, options, weighted = self.error_rate is not None)
+
+    def cached(self, lookup: bool = True):
+        '''
+        :return: The answer of the cache as main returns it, or None if it does not know it
+                 (self.proven being set to the lengths it knows to be unsatisfiable).
+        '''
+        if self.cache is None:
+            return None
+        with self.metrics.phase('cache'):
+            entry = self.cache.get(self.cache_key())
+        if entry is None:
+            return None
+        size = entry.get('size')
+        # Only these engines are bound by the cutoff
+        bounded = self.engine in ('sat', 'enumerative')
+        if lookup and size is not None and (not bounded or size <= self.cutoff):
+            self.size, self.errors = size, entry.get('errors')
+            logger.info(f'Cached formula {entry["formula"]} of size {size}')
+            return entry['formula'], self.expected_formula
+        if self.engine != 'sat':
+            return None
+        if lookup and (size is not None or entry['unsat'] >= self.cutoff):
+            logger.info(f'Cached: no formula of length at most {self.cutoff}')
+            return self.solver
+        self.proven = min(entry['unsat'], self.cutoff)
+        logger.info(f'Cached: no formula of length at most {self.proven}')
+        return None
+
+    def store(self, result) -> None:
+        '''
+        Caches the formula found, if minimal, and the lengths proven unsatisfiable.
+        '''
+        if self.cache is None:
+            return
+        if isinstance(result, tuple):
+            entry = {'formula': result[0], 'size': self.size, 'errors': self.errors}
+            if self.engine == 'sat':
+                entry['unsat'] = self.size - 1
+        elif self.engine != 'sat':
+            return
+        elif isinstance(result, PartialResult):
+            entry = {'unsat': result.lower_bound - 1}
+        else:
+            entry = {'unsat': self.cutoff}
+        with self.metrics.phase('cache'):
+            self.cache.update(self.cache_key(), entry)
+
+    def search(self):
         logger.info('Starting to compute an LTL formula.')
-        n = 1
-        logger.info(f'Computing DAG of length {n}')
-        self.builder.build(n, self.positive, self.negative)
-        while True:
-            if self.is_sat() or n > self.cutoff:
+        if self.engine == 'enumerative':
+            with self.metrics.phase('search'):
+                return self.enumerate()
+        if self.engine == 'greedy':
+            return self.combine()
+        if self.engine == 'templates':
+            return self.match()
+        return self.solve()
+
+    def solve(self):
+        '''
+        Searches for a separating formula with the SAT encoding, trying lengths from 1 to the cutoff.
+        With an error rate, it searches for the smallest formula misclassifying words of total weight within
+        the rate instead, as a linear search on that weight: each formula found is the best one so far,
+        and only formulas misclassifying less are looked for afterwards, on the same length and on larger ones.
+        A formula is found on the first lengths in a few checks, so that when the cutoff or a budget is reached
+        before one within the rate, the best one so far is returned in a PartialResult.
+        '''
+        self.solver.reset()
+        self.builder._reset()
+        self.blocked = {}
+        if self.cegis:
+            self.start_cegis()
+        noisy = self.error_rate is not None
+        if noisy:
+            self.evaluators = (Evaluator(self.positive), Evaluator(self.negative))
+        # With an error rate, the weight the formulas looked for may misclassify, and the best formula so far
+        bound = None
+        best = None
+        proven = list(range(1, self.proven + 1))
+        undecided = {}
+        n = self.proven + 1
+        while n <= self.cutoff:
+            logger.info(f"Computing DAG of length {n}")
+            result = self.check_length(n, bound)
+            if result == sat:
+                if noisy:
+                    with self.metrics.phase('decode'):
+                        formula = self.converter.build(length = n)
+                    errors = self.misclassified(formula)
+                    best = (formula, n, errors)
+                    if errors > self.error_budget:
+                        logger.info(f'{formula} misclassifies words of weight {errors}.')
+                        bound = errors - 1
+                        continue
+                    self.errors = errors
+                elif self.cegis and self.grow(n):
+                    continue
                 break
-            self.solver.reset()
+            if result == unsat:
+                # Bounds never go below the error budget, so no formula of this length is within the rate either
+                proven.append(n)
+            else:
+                undecided[n] = self.reason
+                logger.info(f'Length {n} left undecided: {self.reason}.')
+                # Larger lengths need more memory, and nothing can be checked once the total budget is spent
+                if 'memory' in self.reason or self.timeout is not None and self.remaining() <= 0:
+                    n = self.cutoff + 1
+                    break
             n += 1
-            logger.info(f"Computing DAG of length {n}")
-            self.builder.build(n, self.positive, self.negative)
+        formula = None
         if n <= self.cutoff:
+            self.size = n
             logger.info("Found a valid truth assignation.")
-            self.write_model()
+            if self.dump_model:
+                with self.metrics.phase('write'):
+                    self.write_model()
             logger.info('Now computing the matching LTL formula.')
-            return self.converter.build(length = n), self.expected_formula
-        else:
-            logger.info("Unable to determine a formula within the given constraint.")
-            return self.solver
+            with self.metrics.phase('decode'):
+                formula = self.converter.build(length = n)
+            if not undecided:
+                return formula, self.expected_formula
+        elif best is not None:
+            formula, self.size, self.errors = best
+            logger.info(f'No formula within the error rate: {formula} misclassifies the fewest words so far.')
+        if undecided or formula is not None:
+            # Larger lengths are still tried after an undecided one, so formula may not be minimal
+            partial = PartialResult(
+                proven, undecided, formula, self.size if formula else None, self.expected_formula, self.errors
+            )
+            logger.info(f'Budget exhausted: {partial}')
+            return partial
+        logger.info("Unable to determine a formula within the given constraint.")
+        return self.solver
@@ -25,6 +25,45 @@ class Node:
             acc += ')'
         return acc
 
+def parse(formula: str) -> Node:
+    '''
+    Parses a formula written the way LTLConverter prints it, e.g. U(!(F(&(crit2,crit1))),|(crit2,crit1)).
+    "->" is accepted as an alias for ">" (implication), as used in the expected formulas of the dataset.
+    '''
+    formula = formula.replace(' ', '')
+    position = 0
+    ids = iter(range(len(formula) + 1))
+
+    def read():
+        nonlocal position
+        start = position
+        while position < len(formula) and formula[position] not in '(),':
+            position += 1
+        label = formula[start:position]
+        if label == '->':
+            label = '>'
+        if not label:
+            raise ValueError(f'Expected a label at position {start} of {formula}')
+        node = Node(next(ids), label)
+        if position < len(formula) and formula[position] == '(':
+            if label not in operators['all']:
+                raise ValueError(f'Unknown operator {label} in {formula}')
+            position += 1
+            node.left = read()
+            if formula[position:position + 1] == ',':
+                position += 1
+                node.right = read()
+            if formula[position:position + 1] != ')':
+                raise ValueError(f'Expected ")" at position {position} of {formula}')
+            position += 1
+        return node
+
+    root = read()
+    if position != len(formula):
+        raise ValueError(f'Unexpected trailing characters in {formula}')
+    return root
+
+
 class Tree:
     def __init__(self):
         self.root = None
@@ -39,6 +78,7 @@ class Tree:
 class LTLConverter:
     def __init__(self, solver: Solver):
         self.solver = solver
+        self.tree = None
 
     def build(self, length: int, true_nodes = None):
         if not true_nodes:
@@ -62,6 +102,7 @@ class LTLConverter:
                 right = int(right[0].split('_')[-1])
                 nodes[i].right = nodes[right]
         tree.root = nodes[length - 1]
+        self.tree = tree
         logger.info('Computed tree from SAT assignation.')
         logger.info(f'  {tree}')
         logger.info('LTL Formula:')
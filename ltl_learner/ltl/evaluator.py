@@ -0,0 +1,142 @@
+from typing import Iterable, Union
+
+from ltl_learner.ltl.converter import Node, Tree, parse
+
+# Truth values are computed for every position of every word of a sample at once.
+# Positions are laid out one word after the other, each position being one bit of a (big) integer:
+# bit offsets[k] + t holds the truth value on position t of word k.
+# Boolean operators are then bitwise operations, X is a shift (plus moving loop starts to the end of words),
+# and F, G and U are computed as the fixpoints of their one-step unrollings.
+# The constants true and false (which the greedy engine needs on samples without variables) are leaves too.
+
+
+class Evaluator:
+    '''
+    Evaluates LTL formulas on every position of a set of ultimately periodic words.
+    Values of subformulas are cached, so that evaluating many formulas sharing subformulas
+    against the same words is cheap.
+    '''
+    def __init__(self, traces: Iterable) -> None:
+        self.traces = list(traces)
+        self.offsets = []
+        first, last = [], []
+        # Positions of loop starts, grouped by the distance to the end of their word
+        loops = {}
+        atoms = {}
+        offset = 0
+        for trace in self.traces:
+            self.offsets.append(offset)
+            length = len(trace.masks)
+            first.append(offset)
+            last.append(offset + length - 1)
+            loops.setdefault(length - 1 - trace.loop_start, []).append(offset + trace.loop_start)
+            for t, mask in enumerate(trace.masks):
+                while mask:
+                    bit = mask & -mask
+                    atoms.setdefault(trace.variables[bit.bit_length() - 1], []).append(offset + t)
+                    mask ^= bit
+            offset += length
+        self.size = offset
+        self.full = (1 << offset) - 1
+        self.first = self.mask(first)
+        self.last = self.mask(last)
+        self.loops = {distance: self.mask(starts) for distance, starts in loops.items()}
+        self.atoms = {a: self.mask(bits) for a, bits in atoms.items()}
+        self.cache = {}
+
+    def mask(self, bits: Iterable[int]) -> int:
+        '''
+        Builds the integer with the given bits set.
+        Going through a byte array keeps this linear, where or-ing bits one at a time into a big integer is not.
+        '''
+        buffer = bytearray((self.size + 7) // 8)
+        for bit in bits:
+            buffer[bit >> 3] |= 1 << (bit & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def next(self, values: int) -> int:
+        '''
+        Truth values of X on every position, given the truth values of its operand.
+        '''
+        shifted = (values >> 1) & ~self.last
+        for distance, starts in self.loops.items():
+            shifted |= (values & starts) << distance
+        return shifted
+
+    def until(self, left: int, right: int) -> int:
+        values = right
+        while True:
+            updated = right | (left & self.next(values))
+            if updated == values:
+                return values
+            values = updated
+
+    def globally(self, values: int) -> int:
+        result = values
+        while True:
+            updated = values & self.next(result)
+            if updated == result:
+                return result
+            result = updated
+
+    def apply(self, label: str, left: int = None, right: int = None) -> int:
+        '''
+        Computes the truth values of a node labelled with label, given the truth values of its children.
+        '''
+        if label == '!':
+            return self.full & ~left
+        if label == 'X':
+            return self.next(left)
+        if label == 'F':
+            return self.full & ~self.globally(self.full & ~left)
+        if label == 'G':
+            return self.globally(left)
+        if label == '|':
+            return left | right
+        if label == '&':
+            return left & right
+        if label == '>':
+            return (self.full & ~left) | right
+        if label == 'U':
+            return self.until(left, right)
+        if label == 'true':
+            return self.full
+        return self.atoms.get(label, 0)
+
+    def evaluate(self, phi: Union[str, Node, Tree]) -> int:
+        '''
+        Computes the truth values of phi on every position.
+        phi can either be a formula as printed by LTLConverter, its parsed syntax tree or the tree built from a model.
+        :return: an integer whose bit offsets[k] + t is set iff phi holds on position t of word k.
+        '''
+        if isinstance(phi, Tree):
+            phi = phi.root
+        if isinstance(phi, str):
+            phi = parse(phi)
+        key = str(phi)
+        if key in self.cache:
+            return self.cache[key]
+        left = self.evaluate(phi.left) if phi.left else None
+        right = self.evaluate(phi.right) if phi.right else None
+        values = self.apply(phi.label, left, right)
+        self.cache[key] = values
+        return values
+
+    def evaluate_all(self, formulas: Iterable[Union[str, Node, Tree]]) -> list:
+        '''
+        Evaluates a batch of formulas, sharing the values of their common subformulas.
+        '''
+        return [self.evaluate(phi) for phi in formulas]
+
+    def accepted(self, phi: Union[str, Node, Tree]) -> list:
+        '''
+        :return: for each word, whether it satisfies phi (i.e. phi holds on its first position).
+        '''
+        values = self.evaluate(phi)
+        return [bool(values >> offset & 1) for offset in self.offsets]
+
+    def satisfied_by_all(self, phi: Union[str, Node, Tree]) -> bool:
+        return self.evaluate(phi) & self.first == self.first
+
+    def satisfied_by_none(self, phi: Union[str, Node, Tree]) -> bool:
+        return not self.evaluate(phi) & self.first
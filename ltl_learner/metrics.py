@@ -0,0 +1,80 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss() -> int:
+    '''
+    Peak resident set size of the current process in bytes, None where it cannot be measured.
+    This is a peak over the whole life of the process, not of a single run.
+    '''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def statistics(solver) -> dict:
+    '''
+    The statistics of the last check of the solver, as a dictionary.
+    '''
+    stats = solver.statistics()
+    if isinstance(stats, dict):
+        return stats
+    return {key: stats.get_key_value(key) for key in stats.keys()}
+
+
+class Metrics:
+    '''
+    Measurements of a learner run:
+        * phases: seconds spent loading the sample, encoding, solving and decoding;
+        * constraints: seconds spent encoding each family of constraints (ap, structure, root, one per operator, ...);
+        * sizes: one entry per checked DAG length, with the number of variables and assertions
+          of the encoding at that point, encoding and solving times, the answer and the solver statistics;
+        * peak_rss: the peak resident set size of the process, in bytes.
+    '''
+    def __init__(self) -> None:
+        self.phases = {}
+        self.constraints = {}
+        self.sizes = []
+        self.peak_rss = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    @contextmanager
+    def constraint(self, family: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.constraints[family] = self.constraints.get(family, 0) + time.perf_counter() - start
+
+    def add_size(self, size: int, **values) -> None:
+        self.sizes.append(dict(size = size, **values))
+
+    def as_dict(self) -> dict:
+        self.peak_rss = peak_rss()
+        return {
+            'phases': self.phases,
+            'constraints': self.constraints,
+            'sizes': self.sizes,
+            'peak_rss': self.peak_rss,
+        }
+
+    def write(self, path: Path) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent = 2)
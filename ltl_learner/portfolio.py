@@ -0,0 +1,138 @@
+import logging
+import multiprocessing as mp
+import os
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+
+from z3 import sat
+
+from ltl_learner.learner import Learner, PartialResult
+
+logger = logging.getLogger(__name__)
+
+
+def solve_length(n: int, config: dict, k: int, sample: Path, syntax, options: dict, connection: Connection):
+    '''
+    Worker process: checks whether a DAG of length n separates the sample, using the given Z3 parameters.
+    Sends back a (result, formula, expected formula) tuple, result being "sat", "unsat" or "unknown"
+    (when the parameters include a timeout, for instance), and formula None unless result is "sat".
+    '''
+    # Each worker checks a single length: the incremental encoding would not help
+    learner = Learner(k=k, sample=sample, syntax=syntax, **dict(options, incremental=False))
+    if config:
+        # Parameters are kept when check_length resets the solver
+        learner.solver.set(**config)
+    result = learner.check_length(n, learner.error_budget)
+    formula = learner.converter.build(length = n) if result == sat else None
+    connection.send((str(result), formula, learner.expected_formula))
+    connection.close()
+
+
+class Portfolio:
+    '''
+    Solves several DAG lengths, and optionally several Z3 configurations (parameters, random seeds, ...)
+    of each length, in separate processes.
+    The smallest satisfiable length is reported as soon as every smaller length is proven unsatisfiable,
+    at which point remaining workers are killed.
+    A length is left undecided when none of its configurations decides it (Z3 answering unknown, or its workers
+    crashing twice); a PartialResult is then returned, as Learner does when a budget runs out.
+    '''
+    def __init__(self, k: int = 10, sample: Path = None, syntax = None, processes: int = None, configs: list = None, **options):
+        '''
+        :@param processes: The number of workers to run at the same time, defaults to the number of cores.
+        :@param configs: A list of Z3 solver parameters (e.g. {'random_seed': 1}), each length being solved once per configuration.
+        :@param options: Any other argument of Learner (e.g. temporal_encoding, child_values, error_rate),
+                         except cegis, as every worker encodes the whole sample.
+        '''
+        if options.get('cegis'):
+            raise ValueError('The portfolio does not support the counterexample guided mode')
+        self.cutoff = k
+        self.sample = sample
+        self.syntax = syntax
+        self.processes = processes or os.cpu_count()
+        self.configs = configs or [{}]
+        self.options = options
+        self.size = None
+        self.expected_formula = ''
+
+    def main(self):
+        logger.info(f'Starting a portfolio of {self.processes} workers.')
+        pending = [(n, i) for n in range(1, self.cutoff + 1) for i in range(len(self.configs))]
+        # (n, config index) -> (process, connection)
+        running = {}
+        results = {}
+        formulas = {}
+        # Configurations of each length which finished without deciding it, and the reasons they gave
+        undecided = {}
+        crashed = set()
+        try:
+            while True:
+                # Lengths above a satisfiable one, or already decided, are not worth solving anymore
+                best = min([n for n, result in results.items() if result], default = self.cutoff + 1)
+                for task in [t for t in running if t[0] > best or t[0] in results]:
+                    self._kill(*running.pop(task))
+                pending = [t for t in pending if t[0] < best and t[0] not in results]
+                if best <= self.cutoff and all(results.get(n) is False for n in range(1, best)):
+                    self.size = best
+                    logger.info(f'Found a formula of length {best}: {formulas[best]}')
+                    return formulas[best], self.expected_formula
+                if not pending and not running:
+                    unknown = {
+                        n: ', '.join(reasons) for n, reasons in undecided.items()
+                        if n < best and n not in results
+                    }
+                    if unknown:
+                        proven = sorted(n for n, result in results.items() if result is False)
+                        formula = formulas.get(best)
+                        partial = PartialResult(
+                            proven, unknown, formula, best if formula else None, self.expected_formula
+                        )
+                        logger.info(f'Some lengths were left undecided: {partial}')
+                        return partial
+                    logger.info("Unable to determine a formula within the given constraint.")
+                    return None
+                while pending and len(running) < self.processes:
+                    n, i = task = pending.pop(0)
+                    logger.info(f'Solving length {n} with configuration {self.configs[i]}')
+                    reader, writer = mp.Pipe(duplex = False)
+                    process = mp.Process(
+                        target = solve_length,
+                        args = (n, self.configs[i], self.cutoff, self.sample, self.syntax, self.options, writer)
+                    )
+                    process.start()
+                    writer.close()
+                    running[task] = (process, reader)
+                ready = wait([reader for _, reader in running.values()])
+                for task in [t for t, (_, reader) in running.items() if reader in ready]:
+                    process, reader = running.pop(task)
+                    n, i = task
+                    try:
+                        result, formula, self.expected_formula = reader.recv()
+                    except EOFError:
+                        process.join()
+                        logger.warning(f'Worker for length {n} exited with code {process.exitcode}')
+                        if task not in crashed:
+                            # Tried once more, as the crash may come from the machine rather than the length
+                            crashed.add(task)
+                            pending.insert(0, task)
+                        else:
+                            undecided.setdefault(n, []).append(f'crashed with exit code {process.exitcode}')
+                        continue
+                    finally:
+                        reader.close()
+                    process.join()
+                    logger.info(f'Length {n} is {result} (configuration {self.configs[i]})')
+                    if result == 'unknown':
+                        undecided.setdefault(n, []).append(f'unknown with configuration {self.configs[i]}')
+                        continue
+                    results.setdefault(n, result == 'sat')
+                    if result == 'sat':
+                        formulas.setdefault(n, formula)
+        finally:
+            for process, reader in running.values():
+                self._kill(process, reader)
+
+    def _kill(self, process: mp.Process, reader: Connection) -> None:
+        process.terminate()
+        process.join()
+        reader.close()
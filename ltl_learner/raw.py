@@ -0,0 +1,101 @@
+from pathlib import Path
+
+from ltl_learner.traces import Sample
+
+# Raw samples (.trace files) are made of 5 sections, separated by lines holding "---":
+#   * positive words, one per line;
+#   * negative words, one per line;
+#   * operators;
+#   * the number of variables;
+#   * the expected formula.
+# A word is written as its letters, separated by ";", then "::" and the position its loop starts at.
+# A letter gives the value (0 or 1) of every variable, separated by ",": "1,0;0,1::1" is x0 (x1)^w.
+
+separator = '---'
+
+
+def sections(path: Path):
+    '''
+    Reads a raw sample line by line, yielding (section number, line) for every non empty line.
+    '''
+    section = 0
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line == separator:
+                section += 1
+            elif line:
+                yield section, line
+
+
+def parse_word(line: str) -> tuple:
+    '''
+    :return: The masks of the letters of a word (bit i being the value of variable i) and its loop start.
+    '''
+    word, repeat = line.split('::')
+    masks = [
+        sum(1 << i for i, value in enumerate(letter.split(',')) if value == '1')
+        for letter in word.split(';')
+    ]
+    return masks, int(repeat)
+
+
+def decode(masks: list, variables: list) -> list:
+    return [[a for i, a in enumerate(variables) if mask >> i & 1] for mask in masks]
+
+
+def read(path: Path) -> tuple:
+    '''
+    Parses a raw sample.
+    :return: The positive and negative words (as (masks, loop start) pairs), the operators,
+             the number of variables and the expected formula.
+    '''
+    words = ([], [])
+    other = {2: [], 3: [], 4: []}
+    for section, line in sections(path):
+        if section < 2:
+            words[section].append(parse_word(line))
+        elif section in other:
+            other[section].append(line)
+        else:
+            raise ValueError(f'{path} has more than 5 sections')
+    if not other[3]:
+        raise ValueError(f'{path} does not give its number of variables')
+    return words[0], words[1], ' '.join(other[2]), int(other[3][0]), '\n'.join(other[4])
+
+
+def variables(count: int) -> list:
+    return [f'x{i}' for i in range(count)]
+
+
+def to_spec(path: Path) -> dict:
+    '''
+    Converts a raw sample to the JSON format.
+    '''
+    positives, negatives, _, count, expected = read(path)
+    names = variables(count)
+    return {
+        'variables': names,
+        'positives': [{'traces': decode(masks, names), 'repeat': repeat} for masks, repeat in positives],
+        'negatives': [{'traces': decode(masks, names), 'repeat': repeat} for masks, repeat in negatives],
+        'expected': expected,
+    }
+
+
+def sample(words: list, names: list) -> Sample:
+    masks = []
+    offsets = []
+    for letters, repeat in words:
+        offsets.append((len(masks), len(letters), repeat))
+        masks.extend(letters)
+    return Sample.from_masks(names, masks, offsets)
+
+
+def load(path: Path) -> tuple:
+    '''
+    Reads a raw sample straight into samples, without going through the JSON format.
+    :return: The variables, positive sample, negative sample and expected formula, as Learner.read_sample does.
+    '''
+    positives, negatives, _, count, expected = read(path)
+    names = variables(count)
+    return names, sample(positives, names), sample(negatives, names), expected
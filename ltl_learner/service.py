@@ -0,0 +1,270 @@
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import socket
+import sys
+import threading
+from pathlib import Path
+
+from ltl_learner import batch
+from ltl_learner.batch import WorkerPool
+from ltl_learner.learner import Learner
+
+logger = logging.getLogger(__name__)
+
+# Jobs and results are JSON objects, one per line.
+# A job gives its id, the sample to learn from (a path, or the sample itself as in JSON sample files),
+# optionally its own time budget (timeout, in seconds) and any other argument of Learner:
+#   {"id": 1, "sample": "dataset/json/a.json", "timeout": 10, "symmetry_breaking": true}
+# Its result gives the same id, a status and, when the status is "ok", what batch runs write for a sample:
+#   {"id": 1, "status": "ok", "elapsed": 0.4, "result": {"learned_formula": "G(!(x0))", ...}}
+# Other statuses are "error" (with the message in "error"), "timeout" and "crashed".
+
+warm_sample = {
+    'variables': ['x0'],
+    'positives': [{'traces': [['x0']], 'repeat': 0}],
+    'negatives': [{'traces': [[]], 'repeat': 0}],
+}
+
+
+def context():
+    '''
+    Workers are forked from a server process which imported the learner (and Z3) once, rather than from
+    the service itself: the service reads jobs on threads, and forking a process running threads
+    may leave locks held in the child.
+    '''
+    forkserver = mp.get_context('forkserver')
+    forkserver.set_forkserver_preload(['ltl_learner.batch'])
+    return forkserver
+
+
+def warm() -> None:
+    '''
+    Run by every worker before its first job, so that jobs do not pay for loading Z3 and creating its context.
+    '''
+    Learner(k = 1, sample = warm_sample).check_length(1)
+
+
+class Service:
+    '''
+    A long-running learner: jobs are read from stdin (or clients of a Unix socket) and handed to a pool of
+    warm worker processes, and results are written back, in the order they finish, as soon as they are known.
+    '''
+    def __init__(self, processes: int = None, timeout: float = 300, k: int = 10, **options) -> None:
+        '''
+        :@param timeout: The time budget of jobs not giving theirs, in seconds. As with batch runs,
+                         workers still running batch.grace seconds after the budget of their job are killed.
+        :@param options: Default arguments of Learner, which jobs may override.
+        '''
+        self.processes = processes
+        self.timeout = timeout
+        self.cutoff = k
+        self.options = options
+        # (reply, job) pairs read but not submitted yet, reply writing a result line back to where the job came from
+        self.jobs = queue.Queue()
+        self.inputs = 0
+        self.closed = 0
+        self.stopped = threading.Event()
+        self.keys = itertools.count()
+
+    def read(self, lines, reply) -> None:
+        '''
+        Queues every job read from lines, answering lines which are not jobs right away.
+        '''
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                job = None
+                try:
+                    job = json.loads(line)
+                    if not isinstance(job, dict) or 'sample' not in job:
+                        raise ValueError('a job is a JSON object giving a sample')
+                except ValueError as e:
+                    id = job.get('id') if isinstance(job, dict) else None
+                    reply({'id': id, 'status': 'error', 'error': f'Invalid job: {e}'})
+                    continue
+                self.jobs.put((reply, job))
+        finally:
+            self.jobs.put((None, None))
+
+    def payload(self, job: dict) -> tuple:
+        options = dict(self.options, k = self.cutoff)
+        options.update({key: value for key, value in job.items() if key != 'id'})
+        options.setdefault('timeout', self.timeout)
+        timeout = options['timeout']
+        return options, None if timeout is None else timeout + batch.grace
+
+    def take(self, block: bool) -> list:
+        '''
+        :return: The queued (reply, job) pairs, waiting a little for one if block is set.
+        '''
+        taken = []
+        try:
+            taken.append(self.jobs.get(timeout = 0.1) if block else self.jobs.get_nowait())
+            while True:
+                taken.append(self.jobs.get_nowait())
+        except queue.Empty:
+            pass
+        return taken
+
+    def run(self) -> None:
+        '''
+        Dispatches queued jobs and replies with their results, until stopped or until every input
+        is closed and every job answered.
+        '''
+        waiting = {}
+        with WorkerPool(batch.learn, processes = self.processes, initializer = warm, context = context()) as pool:
+            while not self.stopped.is_set():
+                for reply, job in self.take(block = not len(pool)):
+                    if job is None:
+                        self.closed += 1
+                        continue
+                    key = next(self.keys)
+                    waiting[key] = (reply, job.get('id'))
+                    options, timeout = self.payload(job)
+                    pool.submit(key, options, timeout = timeout)
+                if not len(pool):
+                    if self.inputs and self.closed == self.inputs:
+                        break
+                    continue
+                for key, status, result, elapsed in pool.poll(timeout = 0.05):
+                    reply, id = waiting.pop(key)
+                    answer = {'id': id, 'status': status, 'elapsed': elapsed}
+                    if status == 'ok':
+                        answer['result'] = result
+                    elif result is not None:
+                        answer['error'] = result
+                    reply(answer)
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def serve_stdio(self, input = None, output = None) -> None:
+        '''
+        Reads jobs from input (stdin) and writes results to output (stdout), until input is closed
+        and every job is answered.
+        '''
+        input = input or sys.stdin
+        output = output or sys.stdout
+        lock = threading.Lock()
+
+        def reply(answer: dict) -> None:
+            with lock:
+                output.write(json.dumps(answer) + '\n')
+                output.flush()
+
+        self.inputs = 1
+        threading.Thread(target = self.read, args = (input, reply), daemon = True).start()
+        self.run()
+
+    def serve_socket(self, path: Path) -> None:
+        '''
+        Accepts clients on a Unix socket, each client getting the results of its own jobs on its connection,
+        until stopped.
+        '''
+        path = Path(path)
+        if path.exists():
+            path.unlink()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.listen()
+        server.settimeout(0.1)
+
+        def accept() -> None:
+            while not self.stopped.is_set():
+                try:
+                    client, _ = server.accept()
+                except socket.timeout:
+                    continue
+                lock = threading.Lock()
+
+                def reply(answer: dict, client = client, lock = lock) -> None:
+                    with lock:
+                        try:
+                            client.sendall((json.dumps(answer) + '\n').encode('utf-8'))
+                        except OSError:
+                            logger.warning(f'Client left before the result of job {answer["id"]}')
+
+                threading.Thread(
+                    target = self.read, args = (client.makefile('r', encoding = 'utf-8'), reply), daemon = True
+                ).start()
+
+        accepting = threading.Thread(target = accept, daemon = True)
+        accepting.start()
+        try:
+            self.run()
+        finally:
+            self.stop()
+            accepting.join()
+            server.close()
+            path.unlink(missing_ok = True)
+
+
+def request(path: Path, jobs: list):
+    '''
+    A client of a service listening on a Unix socket: sends the jobs, then yields their results as they arrive.
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(path))
+        client.sendall(''.join(json.dumps(job) + '\n' for job in jobs).encode('utf-8'))
+        with client.makefile('r', encoding = 'utf-8') as answers:
+            for _ in jobs:
+                line = answers.readline()
+                if not line:
+                    break
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog = 'ltl_learner.service',
+        description = '''
+        Learns formulas for the jobs it reads, as JSON lines, on a pool of warm worker processes,
+        writing each result as soon as it is known. Jobs are read from stdin (results being written to stdout)
+        until it is closed, or from clients of a Unix socket.
+        '''
+    )
+    parser.add_argument('--socket',
+        type = Path,
+        help = 'The path of the Unix socket to listen on, instead of reading stdin.'
+    )
+    parser.add_argument('-j', '--workers',
+        type = int,
+        default = os.cpu_count(),
+        help = 'The number of worker processes. Defaults to the number of cores.'
+    )
+    parser.add_argument('-t', '--timeout',
+        type = float,
+        default = 300,
+        help = 'The time budget (in seconds) of jobs not giving theirs. Defaults to 300.'
+    )
+    parser.add_argument('-k', '--cutoff',
+        type = int,
+        default = 10,
+        help = 'The cutoff value for the length of the DAG, unless given by a job. Defaults to 10.'
+    )
+    parser.add_argument('--options',
+        type = json.loads,
+        default = {},
+        help = 'Default arguments of Learner, as a JSON object (e.g. \'{"symmetry_breaking": true}\').'
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level = logging.WARNING, stream = sys.stderr)
+    service = Service(processes = args.workers, timeout = args.timeout, k = args.cutoff, **args.options)
+    try:
+        if args.socket:
+            service.serve_socket(args.socket)
+        else:
+            service.serve_stdio()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,74 +1,289 @@
-from collections import UserList
+from array import array
 
-class Trace(UserList):
+from ltl_learner.ltl.evaluator import Evaluator
+
+# Letters are stored as integer bitmasks: bit i of the mask of a position is set
+# iff the i-th variable of the sample holds on that position.
+# A sample stores the masks of all its words one after the other in a single array,
+# each trace being a view over its own part of that array.
+
+
+def variables_of(specs: list, variables: list = None) -> tuple:
+    '''
+    The variables of a sample: the given ones first, then those only found in the specs, in order of appearance.
+    '''
+    names = dict.fromkeys(variables or [])
+    for spec in specs:
+        for letter in spec['traces']:
+            names.update(dict.fromkeys(letter))
+    return tuple(names)
+
+
+def store(masks: list, variables: tuple):
+    '''
+    Packs masks in an unsigned 64 bits array when they fit, and in a plain list otherwise.
+    '''
+    if len(variables) <= 64:
+        return memoryview(array('Q', masks))
+    return masks
+
+
+class Trace:
     '''
     This class implements ultimately periodic words.
+    Each position of the word is a bitmask over the variables of the word (masks[t]),
+    and the shape of the lasso is indexed once and for all (on first use), so that encoding does not need to walk the word again:
+        * successors[t] is the position following position t;
+        * reachable[t] lists the positions reachable from position t, in the order they are visited;
+        * loop_start and loop_length describe the periodic part of the word.
     '''
-    def __init__(self, spec = None) -> None:
+    __slots__ = ('variables', 'index', 'masks', 'loop_start', '_successors', '_reachable')
+
+    def __init__(self, spec = None, variables: list = None) -> None:
         if not spec:
             spec = []
-        self.data = spec['traces']
-        self._path = [t for t in spec['traces']]
-        self._repeat = spec['repeat']
-        self._repeated_path = self._path[self._repeat::]
-        self.u = '-'.join([''.join(p) for p in self._path[:self._repeat]])
-        self.v = '-'.join([''.join(p) for p in self._repeated_path])
+        variables = variables_of([spec], variables)
+        index = {a: i for i, a in enumerate(variables)}
+        masks = [sum(1 << index[a] for a in set(letter)) for letter in spec['traces']]
+        self._view(variables, index, store(masks, variables), spec['repeat'])
+
+    @classmethod
+    def view(cls, variables: tuple, index: dict, masks, loop_start: int) -> 'Trace':
+        '''
+        Builds a trace over the given masks without copying them.
+        '''
+        trace = cls.__new__(cls)
+        trace._view(variables, index, masks, loop_start)
+        return trace
+
+    def _view(self, variables: tuple, index: dict, masks, loop_start: int) -> None:
+        self.variables = variables
+        self.index = index
+        self.masks = masks
+        self.loop_start = loop_start
+        self._successors = None
+        self._reachable = None
+
+    @property
+    def loop_length(self) -> int:
+        return len(self.masks) - self.loop_start
+
+    @property
+    def successors(self) -> tuple:
+        if self._successors is None:
+            self._successors = tuple(range(1, len(self.masks))) + (self.loop_start,)
+        return self._successors
+
+    @property
+    def reachable(self) -> tuple:
+        if self._reachable is None:
+            length = len(self.masks)
+            self._reachable = tuple(
+                tuple(range(t, length)) + (tuple(range(self.loop_start, t)) if t >= self.loop_start else ())
+                for t in range(length)
+            )
+        return self._reachable
+
+    def decode(self, mask: int) -> list:
+        return [a for i, a in enumerate(self.variables) if mask >> i & 1]
+
+    def holds(self, variable, t: int) -> bool:
+        '''
+        Whether the given variable holds on position t.
+        '''
+        return variable in self.index and bool(self.masks[t] >> self.index[variable] & 1)
+
+    @property
+    def letters(self) -> tuple:
+        return tuple(frozenset(self.decode(mask)) for mask in self.masks)
+
+    @property
+    def data(self) -> list:
+        return [self.decode(mask) for mask in self.masks]
+
+    @property
+    def _path(self) -> list:
+        return self.data
+
+    @property
+    def _repeat(self) -> int:
+        return self.loop_start
+
+    @property
+    def _repeated_path(self) -> list:
+        return self.data[self.loop_start:]
+
+    @property
+    def u(self) -> str:
+        return '-'.join([''.join(p) for p in self.data[:self.loop_start]])
+
+    @property
+    def v(self) -> str:
+        return '-'.join([''.join(p) for p in self._repeated_path])
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def __iter__(self):
+        return iter(self.data)
 
     def __getitem__(self, key):
-        if key < len(self._path):
-            return self._path[key]
-        else:
-            return self._repeated_path[(key - self._repeat) % len(self._repeated_path)]
+        if key >= len(self.masks):
+            key = self.loop_start + (key - self.loop_start) % self.loop_length
+        return self.decode(self.masks[key])
 
     def __eq__(self, value: object) -> bool:
-        if self._repeat != value._repeat:
+        if self.loop_start != value.loop_start or len(self) != len(value):
             return False
-        for i, e in enumerate(value._path):
-            if self._path[i] != e:
-                return False
-        return True
+        return self.letters == value.letters
+
+    def canonical(self) -> 'Trace':
+        '''
+        Computes the shortest lasso describing the same infinite word:
+        the loop is folded to its smallest period (e.g. abab becomes ab), then the end of the prefix
+        is merged into the loop as long as it matches the end of the loop (e.g. c(bc)^w becomes (cb)^w).
+        '''
+        masks = self.masks
+        prefix = list(range(self.loop_start))
+        loop = list(range(self.loop_start, len(masks)))
+        for period in range(1, len(loop) + 1):
+            if len(loop) % period == 0 and all(
+                masks[loop[t]] == masks[loop[t % period]] for t in range(len(loop))
+            ):
+                loop = loop[:period]
+                break
+        while prefix and masks[prefix[-1]] == masks[loop[-1]]:
+            loop = [prefix.pop()] + loop[:-1]
+        return Trace.view(
+            self.variables,
+            self.index,
+            store([masks[t] for t in prefix + loop], self.variables),
+            len(prefix)
+        )
+
+    def canonical_spec(self) -> dict:
+        '''
+        The spec of the shortest lasso describing the same infinite word (see canonical).
+        '''
+        trace = self.canonical()
+        return {'traces': trace.data, 'repeat': trace.loop_start}
+
+    def key(self) -> tuple:
+        '''
+        Identifies the infinite word described by this lasso: two traces have the same key
+        if and only if they describe the same word.
+        '''
+        trace = self.canonical()
+        return trace.loop_start, trace.letters
+
+    def satisfies(self, phi) -> bool:
+        '''
+        Checks whether this word satisfies the given formula.
+        '''
+        return Evaluator([self]).satisfied_by_all(phi)
 
     def next_index(self, index: int) -> int:
-        if index == len(self.data) - 1:
-            return self._repeat
-        return index + 1
+        return self.successors[index]
 
     def generate_aux_set(self, start: int) -> list:
-        aux_set = []
-        current = start
-        visited = []
-        while current not in visited:
-            aux_set.append(current)
-            visited.append(current)
-            current = self.next_index(current)
-        visited.append(current)
-        return visited
-
-
-class Sample(UserList):
+        '''
+        Positions reachable from start, followed by the position the word loops back to.
+        '''
+        reachable = self.reachable[start]
+        return list(reachable) + [self.successors[reachable[-1]]]
+
+
+class Sample:
     '''
     This is a container class for Traces (being ultimately periodic words).
+    The masks of all words are stored in a single array (masks), word k starting at offsets[k].
+    Traces are views over that array, built on first access.
+    A canonical sample keeps track of the sample it was computed from (original), and of the index
+    of the canonical word matching each word of the original sample (origin).
     '''
-    def __init__(self, specs = None) -> None:
+    __slots__ = ('variables', 'index', 'masks', 'offsets', 'words', '_views', 'original', 'origin')
+
+    def __init__(self, specs = None, variables: list = None) -> None:
         if not specs:
             specs = []
-        self.data = []
-        self._raw_traces = specs
-        self._traces = []
+        variables = variables_of(specs, variables)
+        index = {a: i for i, a in enumerate(variables)}
+        masks = []
+        words = []
         for spec in specs:
-            t = Trace(spec)
-            self._traces.append(t)
-            self.data.append(t)
-    
+            words.append((len(masks), len(spec['traces']), spec['repeat']))
+            masks.extend(sum(1 << index[a] for a in set(letter)) for letter in spec['traces'])
+        self._store(variables, index, masks, words)
+
+    @classmethod
+    def from_masks(cls, variables: tuple, masks: list, words: list) -> 'Sample':
+        '''
+        Builds a sample from already encoded words.
+        :@param masks: The masks of every position of every word, one word after the other.
+        :@param words: An (offset, length, loop start) tuple per word.
+        '''
+        sample = cls.__new__(cls)
+        sample._store(tuple(variables), {a: i for i, a in enumerate(variables)}, masks, words)
+        return sample
+
+    def _store(self, variables: tuple, index: dict, masks, words: list) -> None:
+        self.variables = variables
+        self.index = index
+        self.masks = store(masks, variables) if isinstance(masks, list) else masks
+        self.words = words
+        self.offsets = [offset for offset, _, _ in words]
+        self._views = None
+        self.original = self
+        self.origin = list(range(len(words)))
+
+    @property
+    def _traces(self) -> list:
+        if self._views is None:
+            self._views = [
+                Trace.view(self.variables, self.index, self.masks[offset:offset + length], loop_start)
+                for offset, length, loop_start in self.words
+            ]
+        return self._views
+
+    def canonical(self) -> 'Sample':
+        '''
+        Computes the sample made of the shortest lasso of each word of this sample, without duplicates.
+        Words keep the order of their first occurrence.
+        '''
+        masks = []
+        words = []
+        indices = {}
+        origin = []
+        for trace in self._traces:
+            canonical = trace.canonical()
+            key = (canonical.loop_start, tuple(canonical.masks))
+            if key not in indices:
+                indices[key] = len(words)
+                words.append((len(masks), len(canonical), canonical.loop_start))
+                masks.extend(canonical.masks)
+            origin.append(indices[key])
+        sample = Sample.from_masks(self.variables, masks, words)
+        sample.original = self
+        sample.origin = origin
+        return sample
+
+    def keys(self) -> set:
+        return {trace.key() for trace in self._traces}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self):
+        return iter(self._traces)
+
     def __getitem__(self, key):
         return self._traces[key]
 
+    def __eq__(self, value: object) -> bool:
+        return list(self) == list(value)
+
     def satisfies(self, phi):
         '''
-        Checks whether this sample instance satisfies the given formula.
+        Checks whether every word of this sample instance satisfies the given formula.
         '''
-        for trace in self._traces:
-            if not trace.satisfies(phi):
-                return False
-        return True
-
+        return Evaluator(self._traces).satisfied_by_all(phi)
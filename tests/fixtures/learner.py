@@ -18,4 +18,55 @@ def learner_with_ops(operators_ux_or_not):
     return Learner(
         sample=Path(Path(__file__) / '..' / 'mutex.json').resolve(),
         syntax=operators_ux_or_not
-    )
\ No newline at end of file
+    )
+
+@pytest.fixture
+def small_learner():
+    return Learner(sample=Path(Path(__file__) / '..' / 'globally_not_x0.json').resolve())
+
+
+@pytest.fixture
+def small_non_incremental_learner():
+    return Learner(
+        sample=Path(Path(__file__) / '..' / 'globally_not_x0.json').resolve(),
+        incremental=False
+    )
+
+
+@pytest.fixture
+def enumerative_learner():
+    return Learner(sample=Path(Path(__file__) / '..' / 'mutex.json').resolve(), engine='enumerative')
+
+
+@pytest.fixture
+def symmetry_breaking_learner():
+    return Learner(
+        sample=Path(Path(__file__) / '..' / 'globally_not_x0.json').resolve(),
+        symmetry_breaking=True
+    )
+
+
+@pytest.fixture
+def cegis_learner():
+    return Learner(
+        sample=Path(Path(__file__) / '..' / 'globally_not_x0.json').resolve(),
+        cegis=True,
+        cegis_initial=1,
+        cegis_step=1
+    )
+
+
+@pytest.fixture
+def non_incremental_cegis_learner():
+    return Learner(
+        sample=Path(Path(__file__) / '..' / 'globally_not_x0.json').resolve(),
+        incremental=False,
+        cegis=True,
+        cegis_initial=1,
+        cegis_step=1
+    )
+
+
+@pytest.fixture
+def greedy_learner():
+    return Learner(sample=Path(Path(__file__) / '..' / 'mutex.json').resolve(), engine='greedy')
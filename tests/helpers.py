@@ -1,3 +1,3 @@
 def test_trace(trace, expected):
     for i, t in enumerate(expected):
-        assert trace[i] == t
\ No newline at end of file
+        assert sorted(trace[i]) == sorted(t)
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from ltl_learner import archive
+from ltl_learner.learner import Learner
+from ltl_learner.traces import Sample
+
+fixtures = Path(Path(__file__) / '..' / 'fixtures').resolve()
+
+
+@pytest.fixture
+def packed(tmp_path):
+    path = tmp_path / 'samples.ltlpack'
+    archive.pack([fixtures / 'mutex.json', fixtures / 'globally_not_x0.json'], path)
+    return path
+
+
+def test_archive_should_load_same_samples_as_json(packed):
+    assert archive.open_archive(packed).names() == ['mutex.json', 'globally_not_x0.json']
+    for name in ('mutex.json', 'globally_not_x0.json'):
+        with open(fixtures / name) as f:
+            spec = json.load(f)
+        variables, positives, negatives, expected = archive.load(packed / name)
+        assert variables == spec['variables']
+        assert expected == spec.get('expected', '')
+        assert positives == Sample(spec['positives'], spec['variables'])
+        assert negatives == Sample(spec['negatives'], spec['variables'])
+        assert [t.data for t in negatives] == [t.data for t in Sample(spec['negatives'], spec['variables'])]
+
+
+def test_archive_samples_should_be_views(packed):
+    _, positives, negatives, _ = archive.load(packed / 'mutex.json')
+    assert isinstance(positives.masks, memoryview)
+    assert positives.masks.obj is negatives.masks.obj
+    assert positives[0].masks.obj is positives.masks.obj
+
+
+def test_learner_should_read_archive_members(packed):
+    assert archive.is_member(packed / 'globally_not_x0.json')
+    assert not archive.is_member(fixtures / 'globally_not_x0.json')
+    learner = Learner(sample = packed / 'globally_not_x0.json')
+    formula, expected = learner.main()
+    assert expected == 'G(!(x0))'
+    assert learner.size == 3
+
+
+def test_archive_should_reject_other_files(tmp_path):
+    path = tmp_path / 'other.ltlpack'
+    path.write_bytes(b'not an archive at all')
+    with pytest.raises(ValueError):
+        archive.Archive(path)
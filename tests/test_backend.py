@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+
+import pytest
+from z3 import Bool, Not, sat, unsat
+
+from ltl_learner.backends.backend import Z3Backend, make_backend
+from ltl_learner.backends.dimacs import DimacsBackend
+from ltl_learner.learner import Learner
+from ltl_learner.traces import Trace
+
+sample = Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve()
+
+
+def test_z3_backend_should_only_track_for_cores():
+    a = Bool('a')
+    solver = Z3Backend()
+    solver.assert_and_track(a, 'a holds')
+    assert solver.assertions()[0].eq(a)
+    solver = Z3Backend(cores = True)
+    solver.assert_and_track(a, 'a holds')
+    solver.assert_and_track(Not(a), 'a does not hold')
+    assert solver.check() == unsat
+    assert {str(c) for c in solver.unsat_core()} == {'a holds', 'a does not hold'}
+
+
+def test_unknown_backend_should_raise():
+    with pytest.raises(ValueError):
+        make_backend('minisat')
+    with pytest.raises(ValueError):
+        make_backend('dimacs', cores = True)
+    with pytest.raises(ValueError):
+        make_backend('cnf')
+
+
+def test_dimacs_backend_should_decode_model():
+    a, b = Bool('a'), Bool('b')
+    solver = DimacsBackend()
+    solver.add(a != b)
+    assert solver.check(b) == sat
+    model = solver.model()
+    assert not model.eval(a) and model.eval(b)
+    assert solver.check(a, b) == unsat
+
+
+def test_dimacs_backend_should_learn_minimal_formula():
+    learner = Learner(sample = sample, backend = 'dimacs')
+    formula, _ = learner.main()
+    assert learner.size == 3
+    assert learner.positive.satisfies(formula)
+    assert learner.negative.satisfies(f'!({formula})')
+
+
+def test_cnf_backend_should_write_one_file_per_length(tmp_path):
+    learner = Learner(k = 2, sample = sample, backend = 'cnf', cnf_directory = tmp_path)
+    learner.main()
+    assert learner.size is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['1.cnf', '2.cnf']
+    lines = (tmp_path / '2.cnf').read_text().splitlines()
+    assert lines[0].startswith('c 1 ')
+    assert any(line.startswith('p cnf ') for line in lines)
+
+
+def test_dimacs_backend_should_bound_weighted_errors():
+    with open(sample) as f:
+        noisy = json.load(f)
+    # Words given twice weigh 2 in the bound, which card2bv does not blast by default
+    noisy['positives'] += [noisy['negatives'][0]] * 2
+    learner = Learner(sample = noisy, k = 5, backend = 'dimacs', error_rate = 0.1)
+    formula, _ = learner.main()
+    assert learner.size == 3
+    assert learner.errors == 1
+    assert Trace(noisy['negatives'][0], noisy['variables']).satisfies(formula)
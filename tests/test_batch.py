@@ -0,0 +1,96 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from ltl_learner.batch import BatchRunner, WorkerPool, columns, learn, make_row
+
+fixtures = Path(Path(__file__) / '..' / 'fixtures').resolve()
+
+
+def sleep_then_double(payload):
+    time.sleep(payload['sleep'])
+    if payload['value'] < 0:
+        raise ValueError('negative value')
+    return payload['value'] * 2
+
+
+def test_worker_pool_should_stream_results_and_enforce_timeouts():
+    tasks = [
+        ('slow', {'sleep': 10, 'value': 1}),
+        ('fast', {'sleep': 0, 'value': 2}),
+        ('failing', {'sleep': 0, 'value': -1}),
+        ('after', {'sleep': 0, 'value': 3}),
+    ]
+    with WorkerPool(sleep_then_double, processes = 2, timeout = 1) as pool:
+        results = {key: (status, result) for key, status, result, _ in pool.run(tasks)}
+        assert len(pool.workers) == 2
+    assert results['slow'] == ('timeout', None)
+    assert results['fast'] == ('ok', 4)
+    assert results['failing'][0] == 'error'
+    assert results['after'] == ('ok', 6)
+
+
+def test_batch_runner_should_resume(tmp_path):
+    output = tmp_path / 'results.csv'
+    files = [fixtures / 'globally_not_x0.json']
+    rows = BatchRunner(files, output, processes = 1, timeout = 60, k = 4).main()
+    assert len(rows) == 1
+    assert rows[0]['expected_formula'] == 'G(!(x0))'
+    assert rows[0]['number_of_variables'] == 2
+    assert BatchRunner(files, output, processes = 1, timeout = 60, k = 4).main() == []
+    with open(output, newline = '') as f:
+        written = list(csv.DictReader(f))
+    assert [row['specs_file'] for row in written] == ['globally_not_x0.json']
+    assert written[0]['learned_formula']
+    assert written[0]['size'] == '3'
+    assert [size['size'] for size in json.loads(written[0]['metrics'])['sizes']] == [1, 2, 3]
+
+
+def test_batch_runner_should_retry_failed_rows(tmp_path):
+    output = tmp_path / 'results.csv'
+    files = [fixtures / 'globally_not_x0.json']
+    with open(output, 'w', newline = '') as f:
+        writer = csv.DictWriter(f, fieldnames = columns)
+        writer.writeheader()
+        writer.writerow(make_row('globally_not_x0.json', 'crashed', None, 1.0, '', 4, 70))
+    rows = BatchRunner(files, output, processes = 1, timeout = 60, k = 4).main()
+    assert len(rows) == 1
+    with open(output, newline = '') as f:
+        written = list(csv.DictReader(f))
+    assert len(written) == 1
+    assert written[0]['comment'] == ''
+    assert written[0]['size'] == '3'
+
+
+def test_batch_runner_should_write_jsonl(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    BatchRunner([fixtures / 'globally_not_x0.json'], output, processes = 1, k = 2).main()
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert rows[0]['learned_formula'] == ''
+    assert rows[0]['cutoff'] == 2
+
+
+def test_batch_runner_should_report_partial_results(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    rows = BatchRunner([fixtures / 'globally_not_x0.json'], output, processes = 1, timeout = 0, k = 4).main()
+    assert rows[0]['learned_formula'] == ''
+    assert rows[0]['lower_bound'] == 1
+    assert rows[0]['comment'].startswith('partial: ')
+    assert json.loads(rows[0]['comment'][len('partial: '):])['unknown'] == {'1': 'timeout'}
+
+
+def test_worker_pool_should_enforce_task_timeouts():
+    with WorkerPool(sleep_then_double, processes = 1, timeout = 60) as pool:
+        pool.submit('slow', {'sleep': 10, 'value': 1}, timeout = 0.5)
+        pool.submit('fast', {'sleep': 0, 'value': 2})
+        results = {}
+        while len(pool):
+            results.update({key: (status, result) for key, status, result, _ in pool.poll()})
+    assert results == {'slow': ('timeout', None), 'fast': ('ok', 4)}
+
+
+def test_learn_should_not_dump_models(tmp_path):
+    result = learn({'sample': fixtures / 'globally_not_x0.json', 'model_directory': tmp_path})
+    assert result['learned_formula']
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,37 @@
+from benchmarks import subset
+from benchmarks.compare import regressions
+
+
+def results(time, peak_rss = 100 << 20, status = 'ok'):
+    return {
+        'micro': {'builder.U': {'time': time / 100}},
+        'end_to_end': {'sample.json': {'status': status, 'time': time, 'peak_rss': peak_rss}},
+    }
+
+
+def test_regressions_should_respect_thresholds():
+    baseline = results(10)
+    assert regressions(results(10), baseline) == []
+    assert regressions(results(12), baseline) == []
+    assert len(regressions(results(13), baseline)) == 2
+    assert regressions(results(10, peak_rss = 200 << 20), baseline) == ['end_to_end sample.json: peak memory 200MB (was 100MB)']
+    assert regressions(results(10, status = 'timeout'), baseline) == ['end_to_end sample.json: timeout (was ok)']
+    assert regressions(results(20), results(10, status = 'timeout'))[0].startswith('micro')
+    assert len(regressions(results(20), results(10, status = 'timeout'))) == 1
+
+
+def test_subset_should_cover_every_stratum_once():
+    cases = subset.load()
+    strata = {
+        (
+            subset.stratum(case['variables'], subset.variable_bins),
+            subset.stratum(case['length'], subset.length_bins),
+            subset.stratum(case['size'], subset.size_bins),
+        )
+        for case in cases
+    }
+    assert len(strata) == len(cases)
+    for case in cases:
+        assert subset.features(subset.dataset / case['file']) == {
+            key: case[key] for key in ('variables', 'length', 'size')
+        }
@@ -0,0 +1,60 @@
+import json
+import multiprocessing as mp
+import os
+from pathlib import Path
+
+from ltl_learner.cache import ResultCache, fingerprint
+from ltl_learner.learner import Learner
+from ltl_learner.traces import Sample
+
+sample = Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve()
+
+
+def test_fingerprint_should_only_depend_on_canonical_words():
+    positives = [{'traces': [['a'], ['b', 'a']], 'repeat': 1}, {'traces': [['b']], 'repeat': 0}]
+    negatives = [{'traces': [[]], 'repeat': 0}]
+    # The same words, in another order, one of them duplicated and unrolled, with variables in another order
+    shuffled = [{'traces': [['b']], 'repeat': 0}, {'traces': [['a'], ['a', 'b'], ['a', 'b']], 'repeat': 1}]
+    shuffled.append(shuffled[0])
+    key = fingerprint(['a', 'b'], Sample(positives, ['a', 'b']), Sample(negatives, ['a', 'b']), {'engine': 'sat'})
+    assert key == fingerprint(
+        ['b', 'a'], Sample(shuffled, ['b', 'a']).canonical(), Sample(negatives, ['b', 'a']), {'engine': 'sat'}
+    )
+    assert key != fingerprint(['a', 'b'], Sample(positives, ['a', 'b']), Sample([], ['a', 'b']), {'engine': 'sat'})
+    assert key != fingerprint(['a', 'b'], Sample(positives, ['a', 'b']), Sample(negatives, ['a', 'b']), {'engine': 'greedy'})
+
+
+def test_learner_should_resume_from_cache(tmp_path):
+    assert not isinstance(Learner(sample = sample, k = 2, cache = tmp_path).main(), tuple)
+    learner = Learner(sample = sample, k = 5, cache = tmp_path)
+    formula, expected = learner.main()
+    assert [size['size'] for size in learner.metrics.sizes] == [3]
+    learner = Learner(sample = sample, k = 5, cache = tmp_path)
+    assert learner.main() == (formula, expected)
+    assert learner.size == 3 and learner.metrics.sizes == []
+    assert not isinstance(Learner(sample = sample, k = 2, cache = tmp_path).main(), tuple)
+
+
+def test_cache_should_evict_least_recently_used_entries(tmp_path):
+    cache = ResultCache(tmp_path, max_size = 70)
+    for key in ('a', 'b', 'c'):
+        cache.update(key, {'unsat': 1})
+        os.utime(cache.path(key), (len(key), ord(key)))
+    cache.get('a')
+    cache.update('d', {'formula': 'x0', 'size': 1, 'unsat': 0})
+    assert sorted(path.stem for path in tmp_path.glob('*.json')) == ['a', 'd']
+    assert cache.get('d') == {'unsat': 0, 'formula': 'x0', 'size': 1, 'errors': None}
+
+
+def update(directory, unsat):
+    ResultCache(directory).update('key', {'unsat': unsat})
+
+
+def test_cache_should_merge_concurrent_updates(tmp_path):
+    writers = [mp.Process(target = update, args = (tmp_path, unsat)) for unsat in range(1, 9)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert json.loads(ResultCache(tmp_path).path('key').read_text()) == {'unsat': 8}
+    assert not list(tmp_path.glob('*.tmp'))
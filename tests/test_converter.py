@@ -1,5 +1,25 @@
+import pytest
+
 from tests.fixtures.results import result_length_7, converter
 
+from ltl_learner.ltl.converter import parse
+
 def test_tree_str(result_length_7, converter):
     tree = converter.build(length = 7, true_nodes = result_length_7)
-    assert tree == 'U(!(F(&(crit2,crit1))),|(crit2,crit1))'
\ No newline at end of file
+    assert tree == 'U(!(F(&(crit2,crit1))),|(crit2,crit1))'
+
+def test_parse_should_invert_formula_printing():
+    formula = 'U(!(F(&(crit2,crit1))),|(crit2,crit1))'
+    assert str(parse(formula)) == formula
+    assert str(parse('->(F(x1),U(!(x0),x1))')) == '>(F(x1),U(!(x0),x1))'
+
+
+def test_parse_should_reject_malformed_formulas():
+    for formula in ['U(a,b', 'a)', 'unknown(a)', '']:
+        with pytest.raises(ValueError):
+            parse(formula)
+
+
+def test_converter_should_keep_built_tree(result_length_7, converter):
+    formula = converter.build(length = 7, true_nodes = result_length_7)
+    assert converter.tree.get_formula() == formula
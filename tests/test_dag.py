@@ -1,6 +1,13 @@
+import pytest
+from z3 import Not, Or, Solver, is_true, sat
+
 from tests.fixtures.learner import default_learner
+from tests.fixtures.traces import sample_with_2_traces
 
 from ltl_learner.constants import operators
+from ltl_learner.dag.builder import DAGBuilder
+from ltl_learner.ltl.evaluator import Evaluator
+from ltl_learner.traces import Sample
 
 
 def test_dag_length_1_should_return_only_labels_and_node_1(default_learner):
@@ -8,3 +15,102 @@ def test_dag_length_1_should_return_only_labels_and_node_1(default_learner):
     parts = dag_length_1.children()
     assert len(parts) == 2
     # Test becomes really complex -- will write it later
+
+
+def truth_values(encoding, sample, labels, left, right, child_values=False):
+    '''
+    Fixes the DAG described by labels, left and right and returns the truth values of its nodes.
+    Only the nodes are encoded, without the root constraints, so that any DAG has a model.
+    '''
+    solver = Solver()
+    builder = DAGBuilder(
+        solver=solver,
+        variables=["noncrit1", "wait1", "crit1", "noncrit2", "wait2", "crit2"],
+        temporal_encoding=encoding,
+        child_values=child_values
+    )
+    builder._reset()
+    for _ in labels:
+        builder.add_node(sample, Sample())
+    for i, label in enumerate(labels):
+        solver.add(builder.x[(i, label)])
+        for j in range(i):
+            solver.add(builder.l[(i, j)] if left.get(i) == j else Not(builder.l[(i, j)]))
+            solver.add(builder.r[(i, j)] if right.get(i) == j else Not(builder.r[(i, j)]))
+    assert solver.check() == sat
+    model = solver.model()
+    return {
+        key: is_true(model.eval(value, model_completion=True))
+        for key, value in builder.y.items() if key[1] == 'p'
+    }
+
+
+def evaluated(sample, labels, left, right):
+    '''
+    The truth values of the nodes of the same DAG, as computed by the Evaluator.
+    '''
+    evaluator = Evaluator(sample)
+    formulas = []
+    for i, label in enumerate(labels):
+        children = [formulas[c[i]] for c in (left, right) if i in c]
+        formulas.append(f'{label}({",".join(children)})' if children else label)
+    return {
+        (i, 'p', w, t): bool(evaluator.evaluate(formula) >> (evaluator.offsets[w] + t) & 1)
+        for i, formula in enumerate(formulas)
+        for w, trace in enumerate(sample)
+        for t in range(len(trace))
+    }
+
+
+@pytest.mark.parametrize('labels,left,right', [
+    (['wait1', 'F'], {1: 0}, {}),
+    (['wait2', 'G'], {1: 0}, {}),
+    (['wait1', 'crit1', 'U'], {2: 0}, {2: 1}),
+    (['noncrit2', 'wait2', 'U'], {2: 0}, {2: 1}),
+    (['wait2', 'noncrit1', '!', 'U', 'G'], {2: 1, 3: 0, 4: 3}, {3: 2}),
+])
+def test_fixpoint_encoding_should_match_expanded_encoding(sample_with_2_traces, labels, left, right):
+    expected = evaluated(sample_with_2_traces, labels, left, right)
+    assert truth_values('expanded', sample_with_2_traces, labels, left, right) == expected
+    assert truth_values('fixpoint', sample_with_2_traces, labels, left, right) == expected
+
+
+@pytest.mark.parametrize('encoding', ['expanded', 'fixpoint'])
+@pytest.mark.parametrize('labels,left,right', [
+    (['wait1', 'X'], {1: 0}, {}),
+    (['wait1', 'crit1', '>'], {2: 0}, {2: 1}),
+    (['wait2', 'noncrit1', '!', '&', '|', 'U'], {2: 1, 3: 0, 4: 2, 5: 4}, {3: 2, 4: 0, 5: 3}),
+])
+def test_child_values_should_not_change_semantics(sample_with_2_traces, encoding, labels, left, right):
+    expected = evaluated(sample_with_2_traces, labels, left, right)
+    assert truth_values(encoding, sample_with_2_traces, labels, left, right) == expected
+    assert truth_values(encoding, sample_with_2_traces, labels, left, right, child_values=True) == expected
+
+
+def test_unknown_temporal_encoding_should_raise():
+    with pytest.raises(ValueError):
+        DAGBuilder(solver=Solver(), variables=['a'], temporal_encoding='unknown')
+
+
+def count_dags(length, symmetry_breaking):
+    '''
+    Counts the DAGs of the given length over variables a, b and operator |, whatever their truth values.
+    '''
+    solver = Solver()
+    builder = DAGBuilder(solver=solver, variables=['a', 'b'], ops=['|'], symmetry_breaking=symmetry_breaking)
+    builder.build(length, Sample(), Sample())
+    structure = list(builder.x.values()) + list(builder.l.values()) + list(builder.r.values())
+    count = 0
+    while solver.check() == sat:
+        model = solver.model()
+        solver.add(Or(*[v != model.eval(v, model_completion=True) for v in structure]))
+        count += 1
+    return count
+
+
+def test_symmetry_breaking_should_keep_one_dag_per_formula():
+    # a | b, b | a, a | a and b | b, with either operand numbered first
+    assert count_dags(3, symmetry_breaking=False) == 8
+    # a | b only: a repeated variable or unordered operands are ruled out
+    assert count_dags(3, symmetry_breaking=True) == 1
+    assert count_dags(2, symmetry_breaking=True) == 0
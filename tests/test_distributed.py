@@ -0,0 +1,55 @@
+import csv
+import multiprocessing as mp
+from pathlib import Path
+
+from ltl_learner.distributed import WorkQueue, work
+
+fixtures = Path(Path(__file__) / '..' / 'fixtures').resolve()
+
+
+def test_work_queue_should_reclaim_expired_leases(tmp_path):
+    first, second = str(fixtures / 'globally_not_x0.json'), str(fixtures / 'mutex.json')
+    queue = WorkQueue(tmp_path / 'queue.db')
+    assert queue.create([first, second], k = 2, max_attempts = 2) == 2
+    assert queue.create([first]) == 0
+    assert queue.claim('crashed', lease = 0) == first
+    assert queue.claim('a', lease = 60) == first
+    assert queue.claim('b', lease = 60) == second
+    assert queue.claim('b', lease = 60) is None
+    assert queue.counts() == {'pending': 0, 'leased': 2, 'done': 0}
+    assert queue.complete(first, 'a', {'specs_file': 'globally_not_x0.json'})
+    assert not queue.complete(first, 'crashed', {'specs_file': 'globally_not_x0.json'})
+    assert queue.release('b') == 1
+    assert queue.claim('c', lease = 0) == second
+    assert queue.claim('d', lease = 0) == second
+    # Its lease expired max_attempts times
+    assert queue.claim('e', lease = 60) is None
+    assert queue.remaining() == 0
+    rows = queue.rows()
+    assert [row['specs_file'] for row in rows] == ['globally_not_x0.json', 'mutex.json']
+    assert rows[1]['comment'] == 'lost: its lease expired 2 times'
+
+
+def test_workers_should_share_the_queue(tmp_path):
+    path = tmp_path / 'queue.db'
+    files = [fixtures / 'globally_not_x0.json', fixtures / 'globally_not_x0.trace', fixtures / 'mutex.json']
+    queue = WorkQueue(path)
+    queue.create(files, timeout = 60, k = 3)
+    # A worker which crashed while holding the first sample
+    assert queue.claim('crashed', lease = 1) == str(files[0])
+    workers = [
+        mp.Process(target = work, args = (path,), kwargs = {'processes': 1, 'lease': 3, 'wait': 0.2})
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(120)
+        assert worker.exitcode == 0
+    assert queue.counts() == {'pending': 0, 'leased': 0, 'done': 3}
+    assert queue.merge(tmp_path / 'results.csv') == 3
+    with open(tmp_path / 'results.csv', newline = '') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['specs_file'] for row in rows] == [f.name for f in files]
+    assert [row['size'] for row in rows] == ['3', '3', '']
+    assert all(row['cutoff'] == '3' for row in rows)
@@ -0,0 +1,43 @@
+import pytest
+
+from tests.fixtures.learner import enumerative_learner, small_learner
+from tests.fixtures.traces import sample_with_2_traces
+
+from ltl_learner.enumeration.enumerator import Enumerator
+from ltl_learner.learner import Learner
+from ltl_learner.ltl.evaluator import Evaluator
+
+
+def test_enumerative_learner_should_separate_sample(enumerative_learner):
+    formula, _ = enumerative_learner.main()
+    assert enumerative_learner.size == 7
+    assert enumerative_learner.positive.satisfies(formula)
+    assert Evaluator(enumerative_learner.negative).satisfied_by_none(formula)
+
+
+def test_enumerator_should_find_same_size_as_sat(small_learner):
+    small_learner.main()
+    enumerator = Enumerator(variables=small_learner.variables)
+    formula, size = enumerator.search(small_learner.positive, small_learner.negative)
+    assert size == small_learner.size
+
+
+def test_enumerator_should_drop_equivalent_formulas(sample_with_2_traces):
+    enumerator = Enumerator(variables=["noncrit1", "wait1", "crit1", "noncrit2", "wait2", "crit2"])
+    # The same word is both positive and negative, hence nothing separates them
+    formula, size = enumerator.search(sample_with_2_traces[:1], sample_with_2_traces[:1], max_size = 3)
+    assert size is None
+    vectors = [values for formulas in enumerator.formulas.values() for _, values in formulas]
+    assert len(vectors) == len(set(vectors))
+    # G(noncrit2) and noncrit2 hold on the same positions of that word
+    assert 'G(noncrit2)' not in [formula for formula, _ in enumerator.formulas[2]]
+
+
+def test_enumerator_should_respect_cutoff(enumerative_learner):
+    enumerative_learner.cutoff = 3
+    assert enumerative_learner.main() is None
+
+
+def test_unknown_engine_should_raise():
+    with pytest.raises(ValueError):
+        Learner(engine='unknown')
@@ -0,0 +1,49 @@
+from tests.fixtures.traces import *
+
+from tests.fixtures.learner import small_learner
+
+from ltl_learner.ltl.evaluator import Evaluator
+
+
+def positions(evaluator, values, word):
+    offset = evaluator.offsets[word]
+    return [bool(values >> (offset + t) & 1) for t in range(len(evaluator.traces[word]))]
+
+
+def test_next_should_loop_back(trace_len5_repeat2):
+    evaluator = Evaluator([trace_len5_repeat2])
+    assert positions(evaluator, evaluator.evaluate('X(noncrit1)'), 0) == [False, False, False, True, False]
+    assert positions(evaluator, evaluator.evaluate('X(wait1)'), 0) == [True, True, False, False, True]
+
+
+def test_temporal_operators(trace_len5_repeat2):
+    evaluator = Evaluator([trace_len5_repeat2])
+    assert positions(evaluator, evaluator.evaluate('F(noncrit2)'), 0) == [True, True, False, False, False]
+    assert positions(evaluator, evaluator.evaluate('G(wait2)'), 0) == [False, False, True, True, True]
+    assert positions(evaluator, evaluator.evaluate('U(noncrit2,wait2)'), 0) == [True, True, True, True, True]
+    assert positions(evaluator, evaluator.evaluate('U(wait2,crit1)'), 0) == [False, False, True, True, True]
+    assert positions(evaluator, evaluator.evaluate('U(noncrit2,crit1)'), 0) == [False, False, False, True, False]
+
+
+def test_evaluator_on_several_words(sample_with_2_traces):
+    evaluator = Evaluator(sample_with_2_traces)
+    assert evaluator.accepted('F(crit1)') == [True, True]
+    assert evaluator.accepted('G(F(crit1))') == [True, True]
+    assert evaluator.accepted('G(F(noncrit1))') == [True, True]
+    assert evaluator.accepted('F(G(noncrit2))') == [True, False]
+    assert evaluator.evaluate_all(['F(wait2)', '!(F(wait2))']) == [
+        evaluator.evaluate('F(wait2)'),
+        evaluator.full & ~evaluator.evaluate('F(wait2)')
+    ]
+
+
+def test_sample_satisfies(sample_with_2_traces):
+    assert sample_with_2_traces.satisfies('G(F(crit1))')
+    assert not sample_with_2_traces.satisfies('F(G(noncrit2))')
+    assert sample_with_2_traces[0].satisfies('F(G(noncrit2))')
+
+
+def test_learned_formula_should_separate_sample(small_learner):
+    formula, _ = small_learner.main()
+    assert small_learner.positive.satisfies(formula)
+    assert Evaluator(small_learner.negative).satisfied_by_none(formula)
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from tests.fixtures.learner import greedy_learner
+from tests.fixtures.traces import sample_with_2_traces
+
+from ltl_learner.enumeration.greedy import GreedyCombiner, dag_size
+from ltl_learner.learner import Learner
+from ltl_learner.ltl.evaluator import Evaluator
+from ltl_learner.traces import Sample
+
+
+def test_dag_size_should_count_shared_subformulas_once():
+    assert dag_size('x0') == 1
+    assert dag_size('&(F(x0),G(F(x0)))') == 4
+    assert dag_size('U(!(U(F(crit2),crit1)),|(crit2,crit1))') == 7
+
+
+def test_greedy_learner_should_separate_sample(greedy_learner):
+    formula, _ = greedy_learner.main()
+    assert greedy_learner.size == dag_size(formula)
+    assert greedy_learner.size >= 7
+    assert greedy_learner.positive.satisfies(formula)
+    assert Evaluator(greedy_learner.negative).satisfied_by_none(formula)
+
+
+def test_greedy_learner_should_minimize_with_sat():
+    learner = Learner(
+        sample = Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(), engine = 'greedy', minimize = True, symmetry_breaking = True
+    )
+    formula, expected = learner.main()
+    assert learner.size == 3
+    # The SAT encoding only proves that no smaller formula exists
+    assert [size['result'] for size in learner.metrics.sizes] == ['unsat', 'unsat']
+
+
+def test_greedy_combiner_should_fail_on_contradictory_sample(sample_with_2_traces):
+    combiner = GreedyCombiner(variables=["noncrit1", "wait1", "crit1", "noncrit2", "wait2", "crit2"])
+    assert combiner.search(sample_with_2_traces[:1], sample_with_2_traces[:1]) == (None, None)
+
+
+def test_greedy_combiner_should_handle_one_sided_samples(sample_with_2_traces):
+    combiner = GreedyCombiner(variables=["noncrit1", "wait1", "crit1", "noncrit2", "wait2", "crit2"])
+    formula, size = combiner.search(sample_with_2_traces, Sample([]))
+    assert sample_with_2_traces.satisfies(formula)
+    assert size == dag_size(formula)
+    formula, size = combiner.search(Sample([]), sample_with_2_traces)
+    assert Evaluator(sample_with_2_traces).satisfied_by_none(formula)
+    assert size == dag_size(formula)
+
+
+def test_greedy_combiner_should_handle_samples_without_variables():
+    words = Sample([{'traces': [[], []], 'repeat': 0}], [])
+    formula, size = GreedyCombiner(variables=[]).search(words, Sample([], []))
+    assert (formula, size) == ('true', 1)
+    assert words.satisfies(formula)
+    formula, _ = GreedyCombiner(variables=[]).search(Sample([], []), words)
+    assert Evaluator(words).satisfied_by_none(formula)
@@ -1,9 +1,18 @@
+import json
+from pathlib import Path
+
+from ltl_learner.learner import Learner, PartialResult
 from ltl_learner.traces import Trace
 
 from tests.fixtures.learner import (
+    cegis_learner,
     default_learner,
     learner_with_ops,
-    operators_ux_or_not
+    non_incremental_cegis_learner,
+    operators_ux_or_not,
+    small_learner,
+    small_non_incremental_learner,
+    symmetry_breaking_learner
 )
 
 
@@ -58,3 +67,107 @@ def test_learner_with_specified_operators(learner_with_ops, operators_ux_or_not)
 
 # def test_learner_should_return_formula(default_learner):
 #     result = default_learner.main()
+
+
+def test_incremental_learner_should_find_minimal_formula(small_learner, small_non_incremental_learner):
+    formula, expected = small_learner.main()
+    assert expected == 'G(!(x0))'
+    assert small_learner.builder.current_length == 3
+    assert len(small_learner.builder.selectors) == 3
+    small_non_incremental_learner.main()
+    assert small_non_incremental_learner.builder.current_length == 3
+
+
+def test_symmetry_breaking_should_keep_minimal_size(symmetry_breaking_learner):
+    formula, expected = symmetry_breaking_learner.main()
+    assert symmetry_breaking_learner.size == 3
+    assert symmetry_breaking_learner.negative.satisfies(f'!({formula})')
+    assert symmetry_breaking_learner.positive.satisfies(formula)
+
+
+def test_learner_should_record_metrics(small_learner, tmp_path):
+    small_learner.metrics_file = tmp_path / 'metrics.json'
+    small_learner.main()
+    metrics = json.loads(small_learner.metrics_file.read_text())
+    assert {'load', 'encode', 'solve', 'decode'} <= set(metrics['phases'])
+    assert {'ap', 'structure', 'root', 'U', 'G'} <= set(metrics['constraints'])
+    assert [size['result'] for size in metrics['sizes']] == ['unsat', 'unsat', 'sat']
+    assert all(size['variables'] and size['assertions'] and size['statistics'] for size in metrics['sizes'])
+    assert metrics['sizes'][1]['assertions'] > metrics['sizes'][0]['assertions']
+    assert metrics['peak_rss'] > 0
+
+
+def test_cegis_should_keep_minimal_size(cegis_learner, non_incremental_cegis_learner):
+    for learner in (cegis_learner, non_incremental_cegis_learner):
+        formula, expected = learner.main()
+        assert learner.size == 3
+        assert learner.positive.satisfies(formula)
+        assert learner.negative.satisfies(f'!({formula})')
+        words = [size['words'] for size in learner.metrics.sizes]
+        assert words[0] == 2
+        assert words == sorted(words)
+        assert words[-1] == len(learner.active[0]) + len(learner.active[1])
+
+
+def test_budgets_should_give_partial_results():
+    sample = Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve()
+    result = Learner(sample = sample, timeout = 0).main()
+    assert isinstance(result, PartialResult)
+    assert result.unsat == [] and result.unknown == {1: 'timeout'}
+    assert result.formula is None
+    learner = Learner(sample = sample, max_memory = 1)
+    result = learner.main()
+    assert isinstance(result, PartialResult)
+    assert 'memory' in result.unknown[1]
+    assert learner.metrics.sizes[0]['result'] == 'unknown'
+    partial = PartialResult([1, 2, 4], {3: 'timeout', 5: 'canceled'}, 'F(x0)', 6)
+    assert partial.timed_out == 3
+    assert partial.lower_bound == 3
+
+
+def test_error_rate_should_allow_misclassified_words():
+    with open(Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve()) as f:
+        sample = json.load(f)
+    # The first negative word is given twice as positive: its two positive copies weigh more than it does
+    sample['positives'] += [sample['negatives'][0]] * 2
+    for incremental in (True, False):
+        learner = Learner(sample = sample, k = 5, incremental = incremental, error_rate = 0.1)
+        formula, _ = learner.main()
+        assert learner.size == 3
+        assert learner.errors == 1
+        assert Trace(sample['negatives'][0], sample['variables']).satisfies(formula)
+    result = Learner(sample = sample, k = 3, error_rate = 0).main()
+    assert isinstance(result, PartialResult)
+    assert result.unsat == [1, 2, 3] and result.timed_out is None
+    assert result.size == 3 and result.errors == 1
+
+
+def test_learner_should_enumerate_minimal_formulas(small_learner, small_non_incremental_learner, symmetry_breaking_learner):
+    formulas = list(small_learner.formulas())
+    assert sorted(formulas) == ['!(F(x0))', 'G(!(x0))']
+    for formula in formulas:
+        assert small_learner.positive.satisfies(formula)
+        assert small_learner.negative.satisfies(f'!({formula})')
+    assert sorted(small_non_incremental_learner.formulas()) == sorted(formulas)
+    assert len(list(symmetry_breaking_learner.formulas(1))) == 1
+
+
+def test_learner_should_dump_model_to_given_directory(tmp_path):
+    sample = Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve()
+    Learner(sample = sample, model_directory = tmp_path).main()
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.smtlib2']
+    Learner(sample = sample, model_directory = tmp_path / 'skipped', dump_model = False).main()
+    assert not (tmp_path / 'skipped').exists()
+
+
+def test_learner_should_block_renumbered_dags():
+    sample = {
+        'variables': ['a', 'b'],
+        'positives': [{'traces': [['a', 'b']], 'repeat': 0}],
+        'negatives': [{'traces': [['a']], 'repeat': 0}, {'traces': [['b']], 'repeat': 0}],
+    }
+    for incremental in (True, False):
+        learner = Learner(sample = sample, incremental = incremental)
+        assert sorted(learner.formulas()) == ['&(a,b)', '&(b,a)']
+        # Both leaves of &(a,b) may be numbered either way: one check per formula, plus the last unsat one
+        assert [size['result'] for size in learner.metrics.sizes][2:] == ['sat', 'sat', 'unsat']
@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import pytest
+
+from tests.fixtures.learner import small_learner
+
+from ltl_learner.learner import PartialResult
+from ltl_learner.portfolio import Portfolio
+
+
+def test_portfolio_should_find_minimal_length(small_learner):
+    small_learner.main()
+    portfolio = Portfolio(
+        sample=Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(),
+        processes=2,
+        configs=[{}, {'random_seed': 1}]
+    )
+    formula, expected = portfolio.main()
+    assert portfolio.size == small_learner.size
+    assert expected == 'G(!(x0))'
+    assert small_learner.positive.satisfies(formula)
+
+
+def test_portfolio_should_respect_cutoff():
+    portfolio = Portfolio(
+        k=2,
+        sample=Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(),
+        processes=2
+    )
+    assert portfolio.main() is None
+    assert portfolio.size is None
+
+
+def test_portfolio_should_not_count_unknown_as_unsat():
+    portfolio = Portfolio(
+        k=4,
+        sample=Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(),
+        processes=2,
+        configs=[{'timeout': 1}]
+    )
+    result = portfolio.main()
+    assert isinstance(result, PartialResult)
+    assert result.unknown
+    assert all(n not in result.unsat for n in result.unknown)
+    assert 'unknown' in result.unknown[result.timed_out]
+
+
+def test_portfolio_should_name_crashed_lengths():
+    portfolio = Portfolio(
+        k=2,
+        sample=Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(),
+        processes=2,
+        configs=[{'no_such_parameter': 1}]
+    )
+    result = portfolio.main()
+    assert isinstance(result, PartialResult)
+    assert sorted(result.unknown) == [1, 2]
+    assert 'crashed' in result.unknown[1]
+
+
+def test_portfolio_should_respect_error_rate(small_learner):
+    portfolio = Portfolio(
+        k=4,
+        sample=Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(),
+        processes=2,
+        error_rate=0.0
+    )
+    formula, _ = portfolio.main()
+    assert small_learner.positive.satisfies(formula)
+    assert not any(word.satisfies(formula) for word in small_learner.negative)
+
+
+def test_portfolio_should_reject_cegis():
+    with pytest.raises(ValueError):
+        Portfolio(sample=Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(), cegis=True)
+
+
+def test_portfolio_should_ignore_incremental(small_learner):
+    portfolio = Portfolio(
+        k=4,
+        sample=Path(Path(__file__) / '..' / 'fixtures' / 'globally_not_x0.json').resolve(),
+        processes=2,
+        incremental=True
+    )
+    formula, _ = portfolio.main()
+    assert portfolio.size == 3
+    assert small_learner.positive.satisfies(formula)
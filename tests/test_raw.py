@@ -0,0 +1,46 @@
+import importlib.util
+import json
+from pathlib import Path
+
+from ltl_learner import raw
+from ltl_learner.learner import Learner
+from ltl_learner.traces import Sample
+
+fixtures = Path(Path(__file__) / '..' / 'fixtures').resolve()
+converter_path = Path(Path(__file__) / '..' / '..' / 'dataset' / 'traces_converter.py').resolve()
+
+
+def test_parse_word():
+    assert raw.parse_word('1,0;0,1;1,1::1') == ([0b01, 0b10, 0b11], 1)
+
+
+def test_raw_sample_should_match_json_sample():
+    with open(fixtures / 'globally_not_x0.json') as f:
+        spec = json.load(f)
+    variables, positives, negatives, expected = raw.load(fixtures / 'globally_not_x0.trace')
+    assert variables == spec['variables']
+    assert expected == spec['expected']
+    assert positives == Sample(spec['positives'], spec['variables'])
+    assert negatives == Sample(spec['negatives'], spec['variables'])
+    converted = raw.to_spec(fixtures / 'globally_not_x0.trace')
+    assert [w['repeat'] for w in converted['negatives']] == [w['repeat'] for w in spec['negatives']]
+    assert Sample(converted['negatives'], variables) == negatives
+
+
+def test_learner_should_read_raw_samples():
+    learner = Learner(sample = fixtures / 'globally_not_x0.trace')
+    formula, expected = learner.main()
+    assert expected == 'G(!(x0))'
+    assert learner.size == 3
+
+
+def test_conversion_should_be_deterministic_and_incremental(tmp_path):
+    spec = importlib.util.spec_from_file_location('traces_converter', converter_path)
+    converter = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(converter)
+    target, written = converter.convert_trace(fixtures / 'globally_not_x0.trace', tmp_path)
+    assert written
+    assert converter.convert_trace(fixtures / 'globally_not_x0.trace', tmp_path) == (target, False)
+    assert [p.name for p in tmp_path.iterdir()] == [target.name]
+    with open(target) as f:
+        assert json.load(f) == raw.to_spec(fixtures / 'globally_not_x0.trace')
@@ -0,0 +1,56 @@
+import io
+import json
+import threading
+from pathlib import Path
+
+from ltl_learner.service import Service, request
+
+fixtures = Path(Path(__file__) / '..' / 'fixtures').resolve()
+
+
+def jobs():
+    with open(fixtures / 'globally_not_x0.json') as f:
+        spec = json.load(f)
+    return [
+        {'id': 'file', 'sample': str(fixtures / 'globally_not_x0.json'), 'k': 4},
+        {'id': 'inline', 'sample': spec, 'k': 4, 'symmetry_breaking': True},
+        {'id': 'budget', 'sample': str(fixtures / 'globally_not_x0.json'), 'timeout': 0},
+        {'id': 'unknown option', 'sample': str(fixtures / 'globally_not_x0.json'), 'colour': 'blue'},
+    ]
+
+
+def check(results: dict) -> None:
+    assert set(results) == {'file', 'inline', 'budget', 'unknown option'}
+    for id in ('file', 'inline'):
+        assert results[id]['status'] == 'ok'
+        assert results[id]['result']['size'] == 3
+        assert results[id]['result']['learned_formula'] in ('G(!(x0))', '!(F(x0))')
+    assert results['budget']['result']['comment'].startswith('partial')
+    assert results['unknown option']['status'] == 'error'
+    assert 'colour' in results['unknown option']['error']
+
+
+def test_service_should_answer_jobs_from_stdin():
+    input = io.StringIO('\n'.join(json.dumps(job) for job in jobs()) + '\nnot a job\n')
+    output = io.StringIO()
+    Service(processes = 1).serve_stdio(input, output)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    invalid = [result for result in results if result['id'] is None]
+    assert len(invalid) == 1 and invalid[0]['status'] == 'error'
+    check({result['id']: result for result in results if result['id'] is not None})
+
+
+def test_service_should_answer_clients_of_a_socket(tmp_path):
+    path = tmp_path / 'service.sock'
+    service = Service(processes = 1)
+    server = threading.Thread(target = service.serve_socket, args = (path,))
+    server.start()
+    try:
+        while not path.exists():
+            server.join(0.05)
+        check({result['id']: result for result in request(path, jobs())})
+        assert [result['status'] for result in request(path, jobs()[:1])] == ['ok']
+    finally:
+        service.stop()
+        server.join()
+    assert not path.exists()
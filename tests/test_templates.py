@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+
+from ltl_learner.enumeration.templates import TemplateMatcher
+from ltl_learner.learner import Learner
+from ltl_learner.ltl.evaluator import Evaluator
+from ltl_learner.traces import Sample
+
+variables = ['a', 'b']
+# Every a is eventually followed by b, though not always right after it
+positives = Sample([
+    {'traces': [['a'], ['b']], 'repeat': 1},
+    {'traces': [[], ['a'], ['b']], 'repeat': 2},
+    {'traces': [['a'], [], ['b']], 'repeat': 2},
+], variables)
+negatives = Sample([
+    {'traces': [['a'], []], 'repeat': 1},
+    {'traces': [['b'], ['a']], 'repeat': 1},
+], variables)
+
+
+def test_template_matcher_should_find_response():
+    assert TemplateMatcher(variables).search(positives, negatives) == ('G(>(a,F(b)))', 5)
+
+
+def test_template_matcher_should_only_use_given_templates():
+    assert TemplateMatcher(variables, catalog = ['existence', 'absence']).search(positives, negatives) == (None, None)
+    assert 'precedence' not in TemplateMatcher(variables, ops = ['!', 'F', 'G', '>']).catalog
+    with pytest.raises(ValueError):
+        TemplateMatcher(variables, catalog = ['response', 'eventually'])
+
+
+def test_template_matcher_should_handle_one_sided_samples():
+    formula, _ = TemplateMatcher(variables).search(positives, Sample([], variables))
+    assert positives.satisfies(formula)
+    formula, _ = TemplateMatcher(variables).search(Sample([], variables), negatives)
+    assert Evaluator(negatives).satisfied_by_none(formula)
+
+
+def test_templates_learner_should_separate_sample():
+    learner = Learner(sample = Path(Path(__file__) / '..' / 'fixtures' / 'mutex.json').resolve(), engine = 'templates')
+    formula, _ = learner.main()
+    assert learner.positive.satisfies(formula)
+    assert Evaluator(learner.negative).satisfied_by_none(formula)
@@ -65,4 +65,53 @@ def test_indexing_outside_trace_should_cycle_infinitely(trace_len5_repeat2, trac
         ["wait1", "wait2"],
         ["crit1", "wait2"],
         ["crit1", "crit2"],
-    ])
\ No newline at end of file
+    ])
+
+def test_lasso_index(trace_len5_repeat2):
+    assert trace_len5_repeat2.loop_start == 2
+    assert trace_len5_repeat2.loop_length == 3
+    assert trace_len5_repeat2.successors == (1, 2, 3, 4, 2)
+    assert trace_len5_repeat2.reachable[0] == (0, 1, 2, 3, 4)
+    assert trace_len5_repeat2.reachable[3] == (3, 4, 2)
+    assert "wait2" in trace_len5_repeat2.letters[2]
+    for t in range(len(trace_len5_repeat2)):
+        assert trace_len5_repeat2.next_index(t) == trace_len5_repeat2.successors[t]
+    assert trace_len5_repeat2.generate_aux_set(3) == [3, 4, 2, 3]
+
+
+def test_canonical_spec_should_fold_loop_and_merge_prefix():
+    trace = Trace({"traces": [["a"], ["b"], ["c"], ["b"], ["c"], ["b"], ["c"]], "repeat": 3})
+    # a b c (b c)(b c) -> a b c (b c) -> a b (c b) -> a (b c)
+    assert trace.canonical_spec() == {"traces": [["a"], ["b"], ["c"]], "repeat": 1}
+    assert Trace({"traces": [["a", "b"], ["b", "a"]], "repeat": 0}).canonical_spec() == {
+        "traces": [["a", "b"]],
+        "repeat": 0
+    }
+
+
+def test_canonical_sample_should_remove_duplicates(sample_with_2_traces):
+    sample = Sample([
+        {"traces": [["a"], ["b"]], "repeat": 0},
+        {"traces": [["c"]], "repeat": 0},
+        {"traces": [["a"], ["b"], ["a"], ["b"]], "repeat": 2},
+        {"traces": [["b"], ["a"]], "repeat": 1},
+    ])
+    canonical = sample.canonical()
+    assert len(canonical) == 3
+    assert canonical.origin == [0, 1, 0, 2]
+    assert canonical.original is sample
+    assert sample_with_2_traces.canonical() == sample_with_2_traces
+
+
+def test_sample_should_store_letters_as_bitmasks():
+    sample = Sample([
+        {"traces": [["a"], ["a", "b"]], "repeat": 1},
+        {"traces": [[], ["c"], ["b"]], "repeat": 0},
+    ], variables=["b", "a"])
+    assert sample.variables == ("b", "a", "c")
+    assert list(sample.masks) == [0b10, 0b11, 0b000, 0b100, 0b001]
+    assert sample.offsets == [0, 2]
+    assert list(sample[1].masks) == [0b000, 0b100, 0b001]
+    assert sample[0].holds("a", 1) and not sample[0].holds("b", 0)
+    assert not sample[0].holds("unknown", 0)
+    assert sample[1].letters == (frozenset(), frozenset({"c"}), frozenset({"b"}))